@@ -130,6 +130,23 @@ if __name__ == '__main__':
     logger.info(f"Working directory: {os.getcwd()}")
     logger.info("=" * 80)
     
+    # Whisper-Modell vorladen, damit der erste Song nicht auf das Laden warten muss
+    if os.getenv('WHISPER_PRELOAD', '1') != '0':
+        try:
+            from modules.transcriber_service import get_transcriber_service
+            get_transcriber_service().preload(background=os.getenv('WHISPER_PRELOAD_BACKGROUND', '1') != '0')
+        except Exception as e:
+            logger.error(f"Fehler beim Vorladen des Whisper-Modells: {e}", exc_info=True)
+    
+    # Nicht abgeschlossene Jobs aus der persistenten Queue fortsetzen
+    try:
+        from processing_queue import processing_queue
+        resumed = processing_queue.resume_pending_jobs()
+        if resumed:
+            logger.info(f"♻️ {resumed} Job(s) aus der persistenten Queue fortgesetzt")
+    except Exception as e:
+        logger.error(f"Fehler beim Fortsetzen der persistenten Queue: {e}", exc_info=True)
+    
     try:
         app.run(host='0.0.0.0', port=6000, debug=True, use_reloader=False)
     except Exception as e:
@@ -15,6 +15,7 @@ from .file_extensions import (
     is_lyrics_file,
     is_cover_file
 )
+from .paths import CACHE_ROOT, cache_path
 
 __all__ = [
     'AUDIO_EXTENSIONS',
@@ -26,5 +27,7 @@ __all__ = [
     'is_video_file',
     'is_media_file',
     'is_lyrics_file',
-    'is_cover_file'
+    'is_cover_file',
+    'CACHE_ROOT',
+    'cache_path'
 ]
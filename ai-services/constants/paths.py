@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Zentrale Speicherorte
+Gemeinsames Cache-Verzeichnis für Queue-Datenbank, Stem-, Transkript-, Loudness- und Probe-Cache
+"""
+
+import os
+
+# ai-services/.cache (überschreibbar per AI_SERVICES_CACHE_DIR; per .gitignore ausgeschlossen)
+CACHE_ROOT = os.getenv(
+    'AI_SERVICES_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+
+
+def cache_path(*parts: str) -> str:
+    """Pfad unterhalb des gemeinsamen Cache-Verzeichnisses"""
+    return os.path.join(CACHE_ROOT, *parts)
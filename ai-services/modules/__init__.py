@@ -10,10 +10,20 @@ from .audio_normalization import AudioNormalizer, normalize_audio_files
 from .audio_separation import AudioSeparator, separate_audio
 from .audio_dereverb import AudioDereverb, dereverb_audio
 from .video_remuxing import VideoRemuxer, remux_videos
-from .transcription import AudioTranscriber, transcribe_audio
+from .transcription import AudioTranscriber, transcribe_audio, rerender_transcription
+from .transcriber_service import TranscriberService, get_transcriber_service
 from .usdb_download import USDBDownloader, download_usdb_file, download_usdb_song, search_and_download_usdb
 from .ensure_source_files import SourceFileEnsurer, ensure_source_files
 from .cleanup import FileCleaner, cleanup_files, get_folder_summary
+from .model_pool import UVR5ModelPool, get_uvr5_model_pool
+from .audio_buffer import AudioBuffer, load_audio_buffer, encode_audio_buffer
+from .audio_decoder import AudioDecoder, get_audio_decoder, decode_audio
+from .ffmpeg_graph import AudioGraphPlan
+from .folder_index import FolderIndex
+from .stem_cache import StemCache, get_stem_cache
+from .transcript_cache import TranscriptCache, get_transcript_cache
+from .loudness_cache import LoudnessCache, get_loudness_cache
+from .media_probe import MediaInfo, MediaProbe, get_media_probe, probe_media
 
 __all__ = [
     # Meta-Objekt
@@ -46,6 +56,9 @@ __all__ = [
     # Transcription
     'AudioTranscriber',
     'transcribe_audio',
+    'rerender_transcription',
+    'TranscriberService',
+    'get_transcriber_service',
     
     # USDB Download
     'USDBDownloader',
@@ -60,7 +73,45 @@ __all__ = [
     # Cleanup
     'FileCleaner',
     'cleanup_files',
-    'get_folder_summary'
+    'get_folder_summary',
+    
+    # Model Pool
+    'UVR5ModelPool',
+    'get_uvr5_model_pool',
+    
+    # Audio Buffer
+    'AudioBuffer',
+    'load_audio_buffer',
+    'encode_audio_buffer',
+    
+    # Audio Decoder
+    'AudioDecoder',
+    'get_audio_decoder',
+    'decode_audio',
+    
+    # FFmpeg Graph
+    'AudioGraphPlan',
+    
+    # Folder Index
+    'FolderIndex',
+    
+    # Stem Cache
+    'StemCache',
+    'get_stem_cache',
+    
+    # Transcript Cache
+    'TranscriptCache',
+    'get_transcript_cache',
+    
+    # Loudness Cache
+    'LoudnessCache',
+    'get_loudness_cache',
+    
+    # Media Probe
+    'MediaInfo',
+    'MediaProbe',
+    'get_media_probe',
+    'probe_media'
 ]
 
 # Version
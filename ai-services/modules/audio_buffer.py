@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Audio Buffer Module
+In-Memory-Übergabe von Stems zwischen Separation, Dereverb und Transkription,
+damit Zwischenergebnisse nicht als WAV/MP3 geschrieben und wieder dekodiert werden
+"""
+
+import os
+import subprocess
+import logging
+from dataclasses import dataclass
+from typing import Optional, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AudioBuffer:
+    """
+    Dekodiertes Audiosignal im Speicher
+
+    samples: float32-Array der Form (Kanäle, Samples); aus dem Decoder eine
+             schreibgeschützte Sicht auf den geteilten PCM-Buffer
+    sample_rate: Samplerate in Hz
+    path: Datei, die dieses Signal auf Platte repräsentiert (optional)
+    """
+
+    samples: np.ndarray
+    sample_rate: int
+    path: Optional[str] = None
+
+    @classmethod
+    def from_array(cls, samples, sample_rate: int, path: Optional[str] = None) -> 'AudioBuffer':
+        """
+        Erstellt einen Buffer aus einem Array (Kanäle, Samples), (Samples, Kanäle) oder mono
+
+        Arrays mit mehr Zeilen als Spalten gelten als (Samples, Kanäle), wie sie
+        die UVR5-Rekonstruktion liefert.
+        """
+        data = np.asarray(samples, dtype=np.float32)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+        elif data.shape[0] > data.shape[1]:
+            data = data.T
+        return cls(np.ascontiguousarray(data), int(sample_rate), path)
+
+    @property
+    def channels(self) -> int:
+        return self.samples.shape[0]
+
+    @property
+    def duration(self) -> float:
+        return self.samples.shape[1] / float(self.sample_rate)
+
+    def to_mono(self) -> np.ndarray:
+        """Gibt das Signal als Mono-Array zurück"""
+        if self.channels == 1:
+            return self.samples[0]
+        return self.samples.mean(axis=0).astype(np.float32)
+
+    def resampled(self, target_sr: int, mono: bool = False) -> np.ndarray:
+        """Gibt das Signal in target_sr zurück (optional als Mono)"""
+        data = self.to_mono() if mono else self.samples
+        if target_sr == self.sample_rate:
+            return data
+        import librosa
+        return librosa.resample(data, orig_sr=self.sample_rate, target_sr=target_sr).astype(np.float32)
+
+
+def load_audio_buffer(file_path: str, sample_rate: Optional[int] = None, mono: bool = False) -> AudioBuffer:
+    """Dekodiert eine Audio-Datei in einen AudioBuffer (gemeinsamer ffmpeg-Decoder, schreibgeschützt)"""
+    from .audio_decoder import decode_audio
+    return decode_audio(file_path, sample_rate, 1 if mono else None)
+
+
+def encode_audio_buffer(buffer: AudioBuffer, output_path: str, codec_args: Optional[List[str]] = None) -> bool:
+    """
+    Kodiert einen AudioBuffer direkt über eine ffmpeg-Pipe (f32le) in eine Datei
+
+    Args:
+        buffer: Zu kodierendes Signal
+        output_path: Zieldatei (Format ergibt sich aus der Endung)
+        codec_args: ffmpeg-Codec-Argumente (Standard: MP3 mit 192 kbit/s)
+
+    Returns:
+        True wenn erfolgreich, False sonst
+    """
+    if codec_args is None:
+        codec_args = ['-c:a', 'libmp3lame', '-b:a', '192k']
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    cmd = [
+        'ffmpeg', '-y',
+        '-f', 'f32le',
+        '-ar', str(buffer.sample_rate),
+        '-ac', str(buffer.channels),
+        '-i', 'pipe:0',
+        *codec_args,
+        output_path
+    ]
+
+    try:
+        # Interleaved (Samples, Kanäle) wie von f32le erwartet
+        pcm = np.ascontiguousarray(buffer.samples.T, dtype='<f4').tobytes()
+        result = subprocess.run(cmd, input=pcm, capture_output=True)
+        if result.returncode != 0:
+            logger.error(f"FFmpeg-Kodierung fehlgeschlagen: {result.stderr.decode(errors='ignore')[-500:]}")
+            return False
+        return os.path.exists(output_path)
+    except Exception as e:
+        logger.error(f"Fehler beim Kodieren von {output_path}: {e}")
+        return False
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Audio Decoder Module
+Gemeinsamer Audio-Decoder für UVR5, MDXNet, Dereverb und Transkription: ein einzelner
+ffmpeg-Lauf (f32le-Pipe) direkt in einen vorallokierten numpy-Buffer, ohne den langsamen
+audioread-Umweg von librosa. Dekodierte Signale werden pro (Pfad, Größe, mtime,
+Samplerate, Kanäle) zwischengespeichert und am Ende des Jobs freigegeben.
+"""
+
+import os
+import threading
+import subprocess
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .audio_buffer import AudioBuffer
+from .media_probe import probe_media
+
+logger = logging.getLogger(__name__)
+
+# Größenlimit des Decode-Caches in MB (überschreibbar per AUDIO_DECODE_CACHE_MB, 0 = aus)
+DEFAULT_CACHE_MB = 1024
+
+# Reserve beim Vorallokieren (ffprobe-Dauer ist bei MP3/VBR nur eine Schätzung)
+_PREALLOC_MARGIN_SECONDS = 2.0
+
+
+def probe_audio_stream(file_path: str) -> Optional[Tuple[int, int, float]]:
+    """
+    Samplerate, Kanäle und Dauer des ersten Audio-Streams (gecachtes ffprobe)
+
+    Returns:
+        (sample_rate, channels, duration) oder None, wenn ffprobe fehlschlägt
+    """
+    info = probe_media(file_path)
+    audio = info.audio if info is not None else None
+    if audio is None or not audio.sample_rate or not audio.channels:
+        return None
+    return audio.sample_rate, audio.channels, info.audio_duration
+
+
+def read_pcm_stream(process: subprocess.Popen, n_channels: int, frames_hint: int) -> Tuple[np.ndarray, bytes]:
+    """
+    Liest f32le-PCM von process.stdout per readinto in einen vorallokierten Buffer
+
+    stderr wird parallel geleert, damit ffmpeg bei ausführlichen Logs nicht blockiert.
+
+    Returns:
+        (Samples als (Frames, Kanäle)-Sicht auf den Buffer, stderr-Ausgabe); der
+        Exit-Code steht danach in process.returncode
+    """
+    stderr_chunks = []
+    drain = None
+    if process.stderr is not None:
+        drain = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        drain.start()
+
+    frame_bytes = 4 * n_channels
+    pcm = np.empty(max(1, frames_hint) * n_channels, dtype='<f4')
+    view = memoryview(pcm).cast('B')
+    filled = 0
+    while True:
+        if filled == view.nbytes:
+            # Schätzung zu knapp: Buffer um 50% vergrößern
+            grown = np.empty(len(pcm) + len(pcm) // 2 + n_channels, dtype='<f4')
+            grown[:len(pcm)] = pcm
+            pcm = grown
+            view = memoryview(pcm).cast('B')
+        n = process.stdout.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    process.wait()
+    if drain is not None:
+        drain.join()
+
+    n_frames = filled // frame_bytes
+    return pcm[:n_frames * n_channels].reshape(n_frames, n_channels), b''.join(stderr_chunks)
+
+
+class AudioDecoder:
+    """
+    Dekodiert Audio-Dateien per ffmpeg-Pipe in AudioBuffer und hält sie im Speicher
+
+    Die zurückgegebenen Samples sind eine schreibgeschützte Sicht (Kanäle, Samples) auf
+    den interleaved f32le-Buffer; sie werden zwischen allen Aufrufern geteilt und
+    dürfen nicht verändert werden (bei Bedarf kopieren).
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Initialisiert den Decoder
+
+        Args:
+            max_bytes: Größenlimit des Caches in Bytes (None = AUDIO_DECODE_CACHE_MB bzw. 1 GB)
+        """
+        if max_bytes is None:
+            try:
+                max_mb = float(os.getenv('AUDIO_DECODE_CACHE_MB', DEFAULT_CACHE_MB))
+            except ValueError:
+                max_mb = DEFAULT_CACHE_MB
+            max_bytes = int(max_mb * 1024 ** 2)
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[tuple, AudioBuffer]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(file_path: str, sample_rate: Optional[int], channels: Optional[int]) -> tuple:
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, sample_rate, channels)
+
+    def decode(self, file_path: str, sample_rate: Optional[int] = None, channels: Optional[int] = None) -> AudioBuffer:
+        """
+        Dekodiert eine Datei (bzw. liefert sie aus dem Cache)
+
+        Args:
+            file_path: Audio- oder Video-Datei (erster Audio-Stream)
+            sample_rate: Ziel-Samplerate (None = Original)
+            channels: Ziel-Kanäle, z.B. 1 für Mono-Mixdown (None = Original)
+
+        Returns:
+            AudioBuffer mit float32-Samples (Kanäle, Samples)
+        """
+        key = self._make_key(file_path, sample_rate, channels)
+        with self._lock:
+            buffer = self._entries.get(key)
+            if buffer is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return buffer
+            self.misses += 1
+
+        buffer = self._decode_ffmpeg(file_path, sample_rate, channels)
+        if buffer is None:
+            buffer = self._decode_librosa(file_path, sample_rate, channels)
+
+        if self.max_bytes > 0 and buffer.samples.nbytes <= self.max_bytes:
+            with self._lock:
+                self._entries[key] = buffer
+                self._evict_if_needed()
+        return buffer
+
+    def _decode_ffmpeg(self, file_path: str, sample_rate: Optional[int], channels: Optional[int]) -> Optional[AudioBuffer]:
+        """Ein ffmpeg-Lauf (f32le) per readinto direkt in den vorallokierten Buffer"""
+        info = probe_audio_stream(file_path)
+        if info is None:
+            logger.warning(f"⚠️ ffprobe fand keinen Audio-Stream in {file_path}, nutze librosa")
+            return None
+        native_sr, native_channels, duration = info
+        sr = int(sample_rate or native_sr)
+        n_channels = int(channels or native_channels)
+
+        frames = int((duration + _PREALLOC_MARGIN_SECONDS) * sr) if duration > 0 else sr * 60
+
+        cmd = [
+            'ffmpeg', '-v', 'error', '-nostdin',
+            '-i', file_path,
+            '-map', '0:a:0',
+            '-ac', str(n_channels), '-ar', str(sr),
+            '-f', 'f32le', '-acodec', 'pcm_f32le',
+            'pipe:1'
+        ]
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            logger.warning(f"⚠️ ffmpeg nicht verfügbar ({e}), nutze librosa")
+            return None
+
+        interleaved, stderr = read_pcm_stream(process, n_channels, frames)
+        if process.returncode != 0:
+            logger.warning(f"⚠️ ffmpeg-Dekodierung fehlgeschlagen für {file_path}: "
+                           f"{stderr.decode(errors='ignore')[-300:]}, nutze librosa")
+            return None
+
+        samples = interleaved.T
+        samples.flags.writeable = False
+        return AudioBuffer(samples, sr, file_path)
+
+    @staticmethod
+    def _decode_librosa(file_path: str, sample_rate: Optional[int], channels: Optional[int]) -> AudioBuffer:
+        """Rückfallpfad ohne ffmpeg (bisheriges Verhalten)"""
+        import librosa
+        samples, sr = librosa.load(file_path, sr=sample_rate, mono=(channels == 1))
+        buffer = AudioBuffer.from_array(samples, sr, file_path)
+        if channels and channels > 1 and buffer.channels == 1:
+            buffer = AudioBuffer(np.repeat(buffer.samples, channels, axis=0), sr, file_path)
+        buffer.samples.flags.writeable = False
+        return buffer
+
+    def _evict_if_needed(self):
+        """Entfernt die am längsten ungenutzten Signale, bis das Budget eingehalten ist (Lock gehalten)"""
+        total = sum(buffer.samples.nbytes for buffer in self._entries.values())
+        while total > self.max_bytes and self._entries:
+            _, buffer = self._entries.popitem(last=False)
+            total -= buffer.samples.nbytes
+
+    def release(self, folder_path: Optional[str] = None) -> int:
+        """
+        Gibt zwischengespeicherte Signale frei
+
+        Args:
+            folder_path: Nur Dateien unterhalb dieses Ordners (Ende eines Jobs); None = alle
+
+        Returns:
+            Anzahl freigegebener Einträge
+        """
+        with self._lock:
+            if folder_path is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            prefix = os.path.join(os.path.abspath(folder_path), '')
+            keys = [key for key in self._entries if key[0].startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def get_stats(self) -> dict:
+        """Statistiken des Decode-Caches"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': sum(buffer.samples.nbytes for buffer in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Globale Decoder-Instanz
+_global_audio_decoder = None
+_global_audio_decoder_lock = threading.Lock()
+
+
+def get_audio_decoder() -> AudioDecoder:
+    """Gibt den prozessweiten Audio-Decoder zurück"""
+    global _global_audio_decoder
+    if _global_audio_decoder is None:
+        with _global_audio_decoder_lock:
+            if _global_audio_decoder is None:
+                _global_audio_decoder = AudioDecoder()
+    return _global_audio_decoder
+
+
+def decode_audio(file_path: str, sample_rate: Optional[int] = None, channels: Optional[int] = None) -> AudioBuffer:
+    """Convenience-Funktion: dekodiert über den prozessweiten Audio-Decoder"""
+    return get_audio_decoder().decode(file_path, sample_rate, channels)
@@ -11,6 +11,7 @@ from typing import Optional, Dict, Any
 
 from .meta import ProcessingMeta, ProcessingStatus
 from .logger_utils import log_start, send_processing_status
+from .stem_cache import get_stem_cache, fingerprint_audio, read_modelparams, uvr5_resample_profile, uvr5_chunking
 
 logger = logging.getLogger(__name__)
 
@@ -31,20 +32,25 @@ class AudioDereverb:
             # ONNX (MDXNet)
             'model': 'onnx_dereverb_By_FoxJoy',
             'chunks': 15,
+            'batch_size': None,  # Fenster pro ONNX-Aufruf (None = UVR5_MDX_BATCH_SIZE)
             # VR/PyTorch (.pth) – absoluter Pfad zu RVC-Modell
             'vr_model_path': r'J:\Karaoke\Tools\RVC1006Nvidia\assets\uvr5_weights\VR-DeEchoDeReverb.pth',
             'agg': 5,  # Reduzierte Aggressivität für bessere Vocals-Qualität
+            # Inferenz-Backend des VR-Modells: 'torch', 'onnx', 'onnx_int8' (explizit, folgt nicht UVR5_VR_BACKEND)
+            'vr_backend': 'torch',
             # Allgemein
             'output_format': 'mp3',
             'device': 'auto',  # 'auto', 'cuda', 'cpu'
             'denoise': True,
             'margin': 44100,
             'shifts': 10,
-            'mixing': 'min_mag'
+            'mixing': 'min_mag',
+            'stem_cache': True  # Ergebnisse im inhaltsadressierten Stem-Cache ablegen/wiederverwenden
         }
         
         self.dereverb_model = None
         self.model_name = None
+        self._vr_pool_args = None
     
     def _load_model(self, model_name: str, device: str):
         """
@@ -66,7 +72,6 @@ class AudioDereverb:
 
                 if backend == 'vr':
                     # VR/PyTorch Backend (AudioPreDeEcho), nutzt .pth Models
-                    from vr import AudioPreDeEcho
                     import torch
                     # Modellpfad auflösen
                     vr_model_path = config.get('vr_model_path') or ''
@@ -80,13 +85,19 @@ class AudioDereverb:
                     agg = int(config.get('agg', 10))
 
                     logger.info(f"Lade VR Dereverb (.pth) '{os.path.basename(vr_model_path)}' auf {('cuda' if is_cuda else 'cpu')} (half={is_half})")
-                    self.dereverb_model = AudioPreDeEcho(
-                        agg=agg,
-                        model_path=vr_model_path,
-                        device=('cuda' if is_cuda else 'cpu'),
-                        is_half=is_half,
-                        tta=False,
-                    )
+                    # Geteilte Instanz aus dem prozessweiten Modell-Pool
+                    from .model_pool import get_uvr5_model_pool
+                    self._vr_pool_args = {
+                        'model_path': vr_model_path,
+                        'agg': agg,
+                        'device': ('cuda' if is_cuda else 'cpu'),
+                        'is_half': is_half,
+                        'kind': 'AudioPreDeEcho',
+                        'backend': str(config.get('vr_backend') or 'torch').lower(),
+                    }
+                    # Nur in den Pool laden, keine Referenz halten (sonst bliebe ein verdrängtes Modell
+                    # im Speicher); die Inferenz löst die Instanz per acquire() auf
+                    get_uvr5_model_pool().get(**self._vr_pool_args)
                     self.model_name = f"vr::{os.path.basename(vr_model_path)}"
                     logger.info(f"✅ VR Dereverb-Modell geladen: {self.model_name}")
                 else:
@@ -94,7 +105,9 @@ class AudioDereverb:
                     from mdxnet import MDXNetDereverb
                     chunks = config.get('chunks', 15)
                     logger.info(f"Lade ONNX Dereverb '{model_name}' auf {device}")
-                    self.dereverb_model = MDXNetDereverb(chunks=chunks, device=device)
+                    self.dereverb_model = MDXNetDereverb(
+                        chunks=chunks, device=device, batch_size=config.get('batch_size')
+                    )
                     self.model_name = model_name
                     logger.info(f"✅ Dereverb-Modell '{model_name}' erfolgreich geladen")
 
@@ -112,18 +125,105 @@ class AudioDereverb:
         Returns:
             Pfad zur Vocals-Datei oder None
         """
+        index = meta.folder_index
+        
         # Suche nach .vocals.mp3 Datei
-        for file in os.listdir(meta.folder_path):
-            if file.endswith('.vocals.mp3'):
-                return meta.get_file_path(file)
+        matches = index.with_suffix('.vocals.mp3')
+        if matches:
+            return matches[0]
         
         # Fallback: Suche nach anderen Audio-Dateien
         audio_extensions = ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.webm']
-        for file in os.listdir(meta.folder_path):
-            if any(file.lower().endswith(ext) for ext in audio_extensions):
-                return meta.get_file_path(file)
+        matches = index.with_extensions(audio_extensions)
+        return matches[0] if matches else None
+    
+    @staticmethod
+    def _peak_normalize(audio):
+        """Mono-Mixdown und Peak-Normalisierung auf -3dB"""
+        import librosa
+        import numpy as np
+        
+        # Konvertiere zu Mono falls Stereo
+        if audio.ndim > 1:
+            audio = librosa.to_mono(audio)
+        
+        # Normalisiere Lautstärke (Peak-Normalisierung auf -3dB)
+        peak = np.max(np.abs(audio))
+        if peak > 0:
+            target_peak = 0.7  # -3dB
+            audio = audio * (target_peak / peak)
+        return audio
+    
+    def _dereverb_buffer_vr(self, buffer, output_dir: str, base_name: str, meta: ProcessingMeta) -> bool:
+        """
+        Dereverb direkt auf einem In-Memory-Signal (VR-Backend)
+        
+        Normalisierung, Inferenz und Rekonstruktion laufen im Speicher; geschrieben
+        wird nur die finale [base].dereverbed.mp3. Das Ergebnis bleibt als AudioBuffer
+        im Meta-Objekt für die Transkription erhalten.
+        """
+        from vr import path_audio_multi
+        from .model_pool import get_uvr5_model_pool
+        from .audio_buffer import AudioBuffer, encode_audio_buffer
+        
+        logger.info(f"Dereverb aus dem Speicher: {buffer.path} ({buffer.duration:.1f}s)")
+        normalized = self._peak_normalize(buffer.samples)
+        
+        with get_uvr5_model_pool().acquire(**self._vr_pool_args) as vr_model:
+            # AudioPreDeEcho: der "instrumental"-Stem enthält die eigentlichen Vocals (ohne Reverb)
+            result = path_audio_multi(
+                [{"model": vr_model, "keep": ("instrumental",)}],
+                buffer.path,
+                wave=normalized,
+                wave_sr=buffer.sample_rate,
+            )[0]
+        
+        if result['instrumental'] is None:
+            logger.error("❌ VR-Dereverb hat keine Vocals geliefert")
+            return False
+        
+        dereverbed_file = os.path.join(output_dir, f"{base_name}.dereverbed.mp3")
+        dereverbed = AudioBuffer.from_array(result['instrumental'], result['sample_rate'], dereverbed_file)
+        if not encode_audio_buffer(dereverbed, dereverbed_file):
+            logger.error(f"❌ Kodierung der dereverbed Vocals fehlgeschlagen: {dereverbed_file}")
+            return False
         
-        return None
+        meta.set_audio_buffer(dereverbed)
+        meta.add_output_file(dereverbed_file)
+        meta.add_temp_file(dereverbed_file)
+        logger.info(f"✅ Dereverbed Vocals gespeichert: {dereverbed_file}")
+        return True
+    
+    def stem_cache_key(self, cache, input_path: str, config: Dict[str, Any], meta: Optional[ProcessingMeta] = None) -> Optional[str]:
+        """
+        Cache-Schlüssel aus der Herkunft der Vocals und der Dereverb-Konfiguration
+        
+        Stammen die Vocals aus einer Separation mit bekanntem Cache-Schlüssel, wird dieser
+        weiterverwendet (kein erneutes Dekodieren); sonst wird die Eingabedatei gehasht.
+        """
+        separation_key = meta.metadata.get('stem_cache_key') if meta else None
+        if separation_key and input_path.endswith('.vocals.mp3'):
+            source_key = f"separation:{separation_key}"
+        else:
+            source_key = fingerprint_audio(input_path)
+            if source_key is None:
+                return None
+        
+        backend = str(config.get('backend', 'onnx')).lower()
+        if backend == 'vr':
+            model_config = {
+                'model': os.path.basename(config.get('vr_model_path') or ''),
+                'agg': int(config.get('agg', 10)),
+                'modelparams': read_modelparams('4band_v3'),
+                'resample_profile': uvr5_resample_profile(),
+                'chunking': uvr5_chunking(),
+            }
+            # Quantisierte Ausgaben sind verlustbehaftet und dürfen fp32-Anfragen nicht bedienen
+            if str(config.get('vr_backend') or 'torch').lower() == 'onnx_int8':
+                model_config['vr_backend'] = 'onnx_int8'
+        else:
+            model_config = {'model': config.get('model'), 'chunks': config.get('chunks', 15)}
+        return cache.make_key(source_key, {'stage': 'audio_dereverb', 'backend': backend, **model_config})
     
     def _normalize_audio(self, input_path: str, output_dir: str, base_name: str) -> Optional[str]:
         """
@@ -138,24 +238,16 @@ class AudioDereverb:
             Pfad zur normalisierten Datei oder None bei Fehler
         """
         try:
-            import librosa
             import soundfile as sf
-            import numpy as np
+            from .audio_decoder import decode_audio
             
             logger.info(f"Normalisiere Audio: {input_path}")
             
-            # Lade Audio
-            audio, sr = librosa.load(input_path, sr=None, mono=False)
-            
-            # Konvertiere zu Mono falls Stereo
-            if audio.ndim > 1:
-                audio = librosa.to_mono(audio)
+            # Lade Audio (gemeinsamer ffmpeg-Decoder, Ergebnis wird nicht verändert)
+            buffer = decode_audio(input_path)
+            audio, sr = buffer.samples, buffer.sample_rate
             
-            # Normalisiere Lautstärke (Peak-Normalisierung auf -3dB)
-            peak = np.max(np.abs(audio))
-            if peak > 0:
-                target_peak = 0.7  # -3dB
-                audio = audio * (target_peak / peak)
+            audio = self._peak_normalize(audio)
             
             # Erstelle normalisierte Datei
             normalized_path = os.path.join(output_dir, f"{base_name}.normalized_for_dereverb.wav")
@@ -185,6 +277,17 @@ class AudioDereverb:
         try:
             config = {**self.default_config, **self.config}
             model_name = config.get('model', 'onnx_dereverb_By_FoxJoy')
+            dereverbed_file = os.path.join(output_dir, f"{base_name}.dereverbed.mp3")
+            
+            # Stem-Cache: Treffer überspringt Modell-Laden und Inferenz
+            cache = get_stem_cache() if config.get('stem_cache', True) else None
+            cache_key = self.stem_cache_key(cache, input_path, config, meta) if cache else None
+            if cache_key and cache.restore(cache_key, {'dereverbed.mp3': dereverbed_file}):
+                if meta:
+                    meta.add_output_file(dereverbed_file)
+                    meta.add_temp_file(dereverbed_file)
+                logger.info(f"♻️ Dereverbed Vocals aus dem Cache übernommen ({cache_key[:12]}): {dereverbed_file}")
+                return True
             
             # Bestimme Device
             device = config.get('device', 'auto')
@@ -197,6 +300,17 @@ class AudioDereverb:
             
             logger.info(f"Dereverb-Verarbeitung: {input_path}")
             
+            # Liegt die Eingabe bereits dekodiert im Speicher, entfällt der Umweg über Platte
+            backend = str(config.get('backend', 'onnx')).lower()
+            buffer = meta.get_audio_buffer(input_path) if meta else None
+            if backend == 'vr' and buffer is not None:
+                if self._dereverb_buffer_vr(buffer, output_dir, base_name, meta):
+                    if cache_key:
+                        cache.put(cache_key, {'dereverbed.mp3': dereverbed_file})
+                    logger.info(f"✅ Dereverb erfolgreich abgeschlossen: {base_name}")
+                    return True
+                logger.warning("In-Memory-Dereverb fehlgeschlagen, verwende Datei-Pfad")
+            
             # Normalisiere Eingabedatei vor Dereverbing
             normalized_input = self._normalize_audio(input_path, output_dir, base_name)
             if not normalized_input:
@@ -212,18 +326,19 @@ class AudioDereverb:
             os.makedirs(others_root, exist_ok=True)
             
             # Führe Dereverb-Verarbeitung durch – abhängig vom Backend
-            backend = str(config.get('backend', 'onnx')).lower()
             if backend == 'vr':
                 # VR/PyTorch Backend
                 # Für reine Vocals-Eingabe: Das Backend trennt in "vocals" (Reverb) und "instruments" (eigentliche Vocals)
                 # Da unsere Eingabe nur Vocals enthält, wollen wir die "instruments" Ausgabe (die eigentlichen Vocals)
                 logger.info("Verwende VR-Backend für reine Vocals-Verarbeitung")
-                try:
-                    # Verwende ins_root für die eigentlichen Vocals (ohne Reverb)
-                    self.dereverb_model._path_audio_(normalized_input, vocal_root=None, ins_root=vocal_root, format=format, is_hp3=False)
-                except TypeError:
-                    # Fallback für ältere Signaturen
-                    self.dereverb_model._path_audio_(normalized_input, None, vocal_root, format)
+                from .model_pool import get_uvr5_model_pool
+                with get_uvr5_model_pool().acquire(**self._vr_pool_args) as vr_model:
+                    try:
+                        # Verwende ins_root für die eigentlichen Vocals (ohne Reverb)
+                        vr_model._path_audio_(normalized_input, vocal_root=None, ins_root=vocal_root, format=format, is_hp3=False)
+                    except TypeError:
+                        # Fallback für ältere Signaturen
+                        vr_model._path_audio_(normalized_input, None, vocal_root, format)
             else:
                 # ONNX/MDXNet Backend
                 self.dereverb_model._path_audio_(normalized_input, vocal_root, others_root, format)
@@ -234,7 +349,6 @@ class AudioDereverb:
             # Dokumentiere erzeugte Dateien und Ordner im Meta-Objekt
             if success and meta:
                 # .dereverbed.mp3 Datei als temporär markieren (wird vom Cleanup gelöscht)
-                dereverbed_file = os.path.join(output_dir, f"{base_name}.dereverbed.mp3")
                 if os.path.exists(dereverbed_file):
                     meta.add_output_file(dereverbed_file)
                     meta.add_temp_file(dereverbed_file)
@@ -258,6 +372,8 @@ class AudioDereverb:
                     logger.warning(f"Konnte temporäre Datei nicht löschen: {e}")
             
             if success:
+                if cache_key:
+                    cache.put(cache_key, {'dereverbed.mp3': dereverbed_file})
                 logger.info(f"✅ Dereverb erfolgreich abgeschlossen: {base_name}")
                 return True
             else:
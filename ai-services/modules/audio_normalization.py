@@ -12,6 +12,9 @@ from typing import Optional, Dict, Any, List
 
 from .meta import ProcessingMeta, ProcessingStatus
 from .logger_utils import log_start
+from .ffmpeg_graph import AudioGraphPlan, STAGE_NORMALIZED
+from .loudness_cache import get_loudness_cache, measure_loudness, linear_gain_db
+from .media_probe import probe_media
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +35,19 @@ class AudioNormalizer:
             'channels': 2,
             'loudness_target': -23.0,  # LUFS
             'true_peak': -1.0,  # dBTP
-            'audio_codec': 'pcm_s16le'  # Für bessere Qualität
+            'audio_codec': 'pcm_s16le',  # Für bessere Qualität
+            # Normalisiertes Signal im selben ffmpeg-Lauf zusätzlich als float-PCM (44.1 kHz Stereo)
+            # an die Separation übergeben, statt die MP3 erneut zu dekodieren (nur wenn direkt
+            # danach separiert wird, sonst bleibt das PCM unnötig im Speicher)
+            'emit_pcm': False,
+            # Zwei Durchgänge: Messung (gecacht pro Datei-Hash) + lineare Verstärkung statt loudnorm;
+            # Dateien innerhalb der Toleranz werden nicht neu gerendert
+            'two_pass': True,
+            'tolerance_lu': 1.0,
+            'ffmpeg_timeout': 600,  # Sekunden pro ffmpeg-Graph (hängendes ffmpeg wird beendet)
+            # Ziele der einfachen Normalisierung (loudnorm-Standardwerte)
+            'simple_loudness_target': -24.0,  # LUFS
+            'simple_true_peak': -2.0  # dBTP
         }
     
     def find_audio_files(self, meta: ProcessingMeta) -> List[str]:
@@ -54,22 +69,83 @@ class AudioNormalizer:
                 audio_files.append(file_path)
         
         # Suche im Ordner
-        if os.path.exists(meta.folder_path):
-            for file in os.listdir(meta.folder_path):
-                file_path = os.path.join(meta.folder_path, file)
-                if os.path.isfile(file_path) and any(file.lower().endswith(ext) for ext in audio_extensions):
-                    if file_path not in audio_files:
-                        audio_files.append(file_path)
+        for file_path in meta.folder_index.with_extensions(audio_extensions):
+            if file_path not in audio_files:
+                audio_files.append(file_path)
         
         return audio_files
     
-    def normalize_audio(self, input_path: str, output_path: str) -> bool:
+    def _run_normalization(self, input_path: str, output_path: str, loudnorm: Optional[str],
+                           codec_args: List[str], meta: Optional[ProcessingMeta] = None,
+                           gain_db: Optional[float] = None) -> bool:
+        """
+        loudnorm (bzw. lineare Verstärkung gain_db) als ffmpeg-Graph; mit meta entsteht im
+        selben Lauf das float-PCM für die Separation (als AudioBuffer zu output_path in meta)
+        """
+        config = {**self.default_config, **self.config}
+        plan = AudioGraphPlan(input_path, loudnorm=loudnorm, normalize_gain_db=gain_db)
+        plan.add_file(STAGE_NORMALIZED, output_path, codec_args)
+        if meta is not None:
+            plan.add_pcm(STAGE_NORMALIZED)
+        result = plan.run(timeout_seconds=config.get('ffmpeg_timeout'))
+        if not result.success:
+            logger.error(f"❌ Audio-Normalisierung fehlgeschlagen: {result.error}")
+            return False
+        if result.pcm is not None:
+            result.pcm.path = output_path
+            meta.set_audio_buffer(result.pcm)
+            logger.info(f"Normalisiertes Signal im Speicher für die Separation: {os.path.basename(output_path)}")
+        logger.info(f"✅ Audio erfolgreich normalisiert: {output_path}")
+        return True
+    
+    def _normalize_two_pass(self, input_path: str, output_path: str, target_i: float, target_tp: float,
+                            loudnorm: str, codec_args: List[str], meta: Optional[ProcessingMeta] = None) -> bool:
+        """
+        Zwei Durchgänge: Messung (Cache pro Datei-Hash) und lineare Verstärkung
+        
+        Liegt die Eingabe bereits innerhalb der Toleranz, wird nichts gerendert (output_path
+        entsteht dann nicht); ist output_path unverändert aus derselben Eingabe mit denselben
+        Zielen erzeugt worden, wird er übernommen (auch mit meta: die Separation dekodiert die
+        vorhandene Datei dann selbst). Ohne Messung greift loudnorm (ein Durchgang).
+        """
+        config = {**self.default_config, **self.config}
+        cache = get_loudness_cache()
+        measurement = cache.get_measurement(input_path) if cache else measure_loudness(input_path)
+        if measurement is None:
+            logger.warning(f"Keine Lautheitsmessung für {input_path}, verwende loudnorm")
+            return self._run_normalization(input_path, output_path, loudnorm, codec_args, meta)
+        
+        gain = linear_gain_db(measurement, target_i, target_tp)
+        if gain is None:
+            logger.info(f"Stille bzw. nicht messbar, überspringe Normalisierung: {input_path}")
+            return True
+        deviation = target_i - measurement['input_i']
+        if abs(deviation) <= config['tolerance_lu'] and measurement['input_tp'] <= target_tp:
+            logger.info(f"♻️ Bereits normalisiert ({measurement['input_i']:.1f} LUFS, Ziel {target_i} LUFS): {input_path}")
+            return True
+        
+        settings = {'target_i': target_i, 'target_tp': target_tp, 'gain_db': round(gain, 2), 'codec': codec_args}
+        if cache and cache.is_render_current(input_path, output_path, settings):
+            logger.info(f"♻️ Normalisierte Datei ist aktuell: {output_path}")
+            return True
+        
+        logger.info(f"Lineare Verstärkung {gain:+.2f} dB ({measurement['input_i']:.1f} -> "
+                    f"{measurement['input_i'] + gain:.1f} LUFS)")
+        if not self._run_normalization(input_path, output_path, None, codec_args, meta, gain_db=gain):
+            return False
+        if cache:
+            cache.put_render(input_path, output_path, settings)
+        return True
+    
+    def normalize_audio(self, input_path: str, output_path: str, meta: Optional[ProcessingMeta] = None) -> bool:
         """
         Normalisiert eine Audio-Datei
         
         Args:
             input_path: Eingabedatei
             output_path: Ausgabedatei
+            meta: ProcessingMeta-Objekt; wenn gesetzt, wird das normalisierte Signal
+                  zusätzlich im Speicher hinterlegt
             
         Returns:
             True wenn erfolgreich, False sonst
@@ -77,78 +153,58 @@ class AudioNormalizer:
         try:
             config = {**self.default_config, **self.config}
             
-            # FFmpeg-Kommando für Normalisierung
-            cmd = [
-                'ffmpeg',
-                '-i', input_path,
-                '-af', f'loudnorm=I={config["loudness_target"]}:TP={config["true_peak"]}:LRA=7',
-                '-ar', str(config['sample_rate']),
-                '-ac', str(config['channels']),
-                '-c:a', config['audio_codec'],
-                '-y',  # Überschreiben ohne Nachfrage
-                output_path
-            ]
-            
             logger.info(f"Normalisiere Audio: {input_path} -> {output_path}")
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                logger.info(f"✅ Audio erfolgreich normalisiert: {output_path}")
-                return True
-            else:
-                logger.error(f"❌ Audio-Normalisierung fehlgeschlagen: {result.stderr}")
-                return False
+            loudnorm = f'I={config["loudness_target"]}:TP={config["true_peak"]}:LRA=7'
+            codec_args = ['-ar', str(config['sample_rate']), '-ac', str(config['channels']), '-c:a', config['audio_codec']]
+            if config.get('two_pass', True):
+                return self._normalize_two_pass(
+                    input_path, output_path, config['loudness_target'], config['true_peak'],
+                    loudnorm, codec_args, meta
+                )
+            return self._run_normalization(input_path, output_path, loudnorm, codec_args, meta)
                 
         except Exception as e:
             logger.error(f"Fehler bei Audio-Normalisierung: {e}")
             return False
     
-    def normalize_audio_simple(self, input_path: str, output_path: str) -> bool:
+    def normalize_audio_simple(self, input_path: str, output_path: str, meta: Optional[ProcessingMeta] = None) -> bool:
         """
         Einfache Audio-Normalisierung (nur Lautstärke-Anpassung)
         
         Args:
             input_path: Eingabedatei
             output_path: Ausgabedatei
+            meta: ProcessingMeta-Objekt; wenn gesetzt, wird das normalisierte Signal
+                  zusätzlich im Speicher hinterlegt
             
         Returns:
             True wenn erfolgreich, False sonst
         """
         try:
-            # Einfache Normalisierung mit FFmpeg
-            cmd = [
-                'ffmpeg',
-                '-i', input_path,
-                '-af', 'loudnorm',
-                '-c:a', 'libmp3lame',
-                '-b:a', '192k',
-                '-y',
-                output_path
-            ]
-            
+            # Einfache Normalisierung mit FFmpeg (loudnorm-Standardziele, MP3 192 kbit/s)
+            config = {**self.default_config, **self.config}
             logger.info(f"Normalisiere Audio (einfach): {input_path} -> {output_path}")
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                logger.info(f"✅ Audio erfolgreich normalisiert: {output_path}")
-                return True
-            else:
-                logger.error(f"❌ Audio-Normalisierung fehlgeschlagen: {result.stderr}")
-                return False
+            codec_args = ['-c:a', 'libmp3lame', '-b:a', '192k']
+            if config.get('two_pass', True):
+                return self._normalize_two_pass(
+                    input_path, output_path, config['simple_loudness_target'], config['simple_true_peak'],
+                    '', codec_args, meta
+                )
+            return self._run_normalization(input_path, output_path, '', codec_args, meta)
                 
         except Exception as e:
             logger.error(f"Fehler bei einfacher Audio-Normalisierung: {e}")
             return False
     
-    def process_meta(self, meta: ProcessingMeta, simple: bool = False) -> bool:
+    def process_meta(self, meta: ProcessingMeta, simple: bool = False, emit_pcm: Optional[bool] = None) -> bool:
         """
         Normalisiert alle Audio-Dateien im Meta-Objekt
         
         Args:
             meta: ProcessingMeta-Objekt
             simple: Verwende einfache Normalisierung
+            emit_pcm: Normalisiertes Signal für eine direkt folgende Separation im Speicher
+                      halten (None = Konfiguration 'emit_pcm')
             
         Returns:
             True wenn erfolgreich, False sonst
@@ -162,12 +218,7 @@ class AudioNormalizer:
                 logger.warning("Keine Audio-Dateien zum Normalisieren gefunden")
                 try:
                     video_extensions = ['.webm', '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.xvid', '.mpeg', '.mpg']
-                    video_files: List[str] = []
-                    if os.path.exists(meta.folder_path):
-                        for file in os.listdir(meta.folder_path):
-                            file_path = os.path.join(meta.folder_path, file)
-                            if os.path.isfile(file_path) and any(file.lower().endswith(ext) for ext in video_extensions):
-                                video_files.append(file_path)
+                    video_files: List[str] = meta.folder_index.with_extensions(video_extensions)
 
                     if not video_files:
                         logger.warning("Keine Video-Dateien gefunden, überspringe Normalisierung")
@@ -237,21 +288,37 @@ class AudioNormalizer:
             meta.status = ProcessingStatus.IN_PROGRESS
             success_count = 0
             
+            # PCM nur für die Datei, die die Separation voraussichtlich verwendet
+            # ([base].normalized.mp3, sonst die erste), um Speicher zu sparen
+            config = {**self.default_config, **self.config}
+            if emit_pcm is None:
+                emit_pcm = config.get('emit_pcm', False)
+            pcm_file = None
+            if emit_pcm:
+                pcm_file = audio_files[0]
+                for audio_file in audio_files:
+                    if getattr(meta, 'base_filename', None) and Path(audio_file).stem == meta.base_filename:
+                        pcm_file = audio_file
+                        break
+            
             for audio_file in audio_files:
                 # Erstelle Ausgabedateiname
                 audio_path = Path(audio_file)
                 normalized_name = f"{audio_path.stem}.normalized.mp3"
                 normalized_path = meta.get_file_path(normalized_name)
+                pcm_meta = meta if audio_file == pcm_file else None
                 
                 # Normalisiere Audio
                 if simple:
-                    success = self.normalize_audio_simple(audio_file, normalized_path)
+                    success = self.normalize_audio_simple(audio_file, normalized_path, pcm_meta)
                 else:
-                    success = self.normalize_audio(audio_file, normalized_path)
+                    success = self.normalize_audio(audio_file, normalized_path, pcm_meta)
                 
                 if success:
-                    meta.add_output_file(normalized_path)
-                    meta.add_keep_file(normalized_name)
+                    # Innerhalb der Toleranz entsteht keine normalisierte Datei
+                    if os.path.exists(normalized_path):
+                        meta.add_output_file(normalized_path)
+                        meta.add_keep_file(normalized_name)
                     success_count += 1
                 else:
                     logger.error(f"Normalisierung fehlgeschlagen für: {audio_file}")
@@ -284,59 +351,40 @@ class AudioNormalizer:
             Audio-Informationen oder None
         """
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                audio_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            info = probe_media(audio_path)
             
-            if result.returncode == 0:
-                import json
-                info = json.loads(result.stdout)
-                
-                # Extrahiere relevante Informationen
-                format_info = info.get('format', {})
-                streams = info.get('streams', [])
-                
-                audio_stream = None
-                for stream in streams:
-                    if stream.get('codec_type') == 'audio':
-                        audio_stream = stream
-                        break
-                
+            if info is not None:
+                audio_stream = info.audio
                 return {
-                    'duration': float(format_info.get('duration', 0)),
-                    'size': int(format_info.get('size', 0)),
-                    'bitrate': int(format_info.get('bit_rate', 0)),
-                    'sample_rate': int(audio_stream.get('sample_rate', 0)) if audio_stream else 0,
-                    'channels': int(audio_stream.get('channels', 0)) if audio_stream else 0,
-                    'codec': audio_stream.get('codec_name', '') if audio_stream else '',
-                    'format': format_info.get('format_name', '')
+                    'duration': info.duration,
+                    'size': info.size,
+                    'bitrate': info.bit_rate,
+                    'sample_rate': audio_stream.sample_rate if audio_stream else 0,
+                    'channels': audio_stream.channels if audio_stream else 0,
+                    'codec': audio_stream.codec_name if audio_stream else '',
+                    'format': info.format_name
                 }
             else:
-                logger.error(f"Fehler beim Abrufen der Audio-Informationen: {result.stderr}")
+                logger.error(f"Fehler beim Abrufen der Audio-Informationen: {audio_path}")
                 return None
                 
         except Exception as e:
             logger.error(f"Fehler bei Audio-Info-Abruf: {e}")
             return None
 
-def normalize_audio_files(meta: ProcessingMeta, simple: bool = False) -> bool:
+def normalize_audio_files(meta: ProcessingMeta, simple: bool = False, emit_pcm: bool = False) -> bool:
     """
     Convenience-Funktion für Audio-Normalisierung
     
     Args:
         meta: ProcessingMeta-Objekt
         simple: Verwende einfache Normalisierung
+        emit_pcm: Normalisiertes Signal für separate_audio im Speicher halten (nur setzen,
+                  wenn die Separation direkt folgt)
         
     Returns:
         True wenn erfolgreich, False sonst
     """
     log_start('normalize_audio_files', meta)
     normalizer = AudioNormalizer()
-    return normalizer.process_meta(meta, simple)
+    return normalizer.process_meta(meta, simple, emit_pcm)
@@ -8,10 +8,13 @@ import os
 import subprocess
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from .meta import ProcessingMeta, ProcessingStatus
 from .logger_utils import log_start, send_processing_status
+from .audio_buffer import AudioBuffer, encode_audio_buffer
+from .ffmpeg_graph import AudioGraphPlan, STAGE_SOURCE, STAGE_REDUCED
+from .stem_cache import get_stem_cache, fingerprint_audio, read_modelparams, uvr5_resample_profile, uvr5_chunking, fingerprint_samples
 
 try:
     from ..constants import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS
@@ -25,6 +28,32 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# UVR5-Modelle der Separation (in Verarbeitungsreihenfolge) und deren Aggressivität (UVR5Wrapper.agg)
+UVR5_MODELS = ("HP5", "HP2")
+UVR5_AGG = 10
+
+# Einmal geladenes uvr5_correct-Modul (verhindert erneutes exec_module pro Song)
+_uvr5_module = None
+
+def _load_uvr5_module():
+    """Lädt uvr5_correct.py per Dateipfad (einmalig pro Prozess), damit kein Paketname benötigt wird"""
+    global _uvr5_module
+    if _uvr5_module is None:
+        try:
+            import importlib.util
+            wrapper_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'uvr5_correct.py'))
+            spec = importlib.util.spec_from_file_location('uvr5_correct', wrapper_path)
+            if spec is None or spec.loader is None:
+                logger.error('Konnte Spec für uvr5_correct.py nicht erstellen')
+                return None
+            uvr5_module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(uvr5_module)
+            _uvr5_module = uvr5_module
+        except Exception as e:
+            logger.error(f"UVR5-Wrapper konnte nicht geladen werden: {e}")
+            return None
+    return _uvr5_module
+
 class AudioSeparator:
     """Audio-Separator mit UVR5 für Vocal/Instrumental-Trennung"""
     
@@ -43,42 +72,51 @@ class AudioSeparator:
             'gain_reduction': 2.0,  # dB Reduktion vor Separation
             'aggression': 10,  # UVR5 Aggression-Level
             'window_size': 512,
-            'hop_length': 128
+            'hop_length': 128,
+            'stem_cache': True,  # Ergebnisse im inhaltsadressierten Stem-Cache ablegen/wiederverwenden
+            'uvr5_backend': None,  # 'torch', 'onnx', 'onnx_int8' (quantisiertes CPU-Profil); None = UVR5_VR_BACKEND
+            # Extraktion, Gain-Reduktion und Dekodierung als ein ffmpeg-Graph (float-PCM direkt an UVR5)
+            # statt über [base].extracted.mp3 und [base].reduced.mp3
+            'fused_ffmpeg': True,
+            'ffmpeg_timeout': 600  # Sekunden pro ffmpeg-Graph (hängendes ffmpeg wird beendet)
         }
     
-    def find_audio_source(self, meta: ProcessingMeta) -> Optional[str]:
+    def find_audio_source(self, meta: ProcessingMeta, extract: bool = True) -> Optional[str]:
         """
         Findet die beste Audio-Quelle für die Separation
         Priorität: dereverbed.mp3 > normalized.mp3 > andere Audio-Dateien > Audio aus Video extrahieren
         
         Args:
             meta: ProcessingMeta-Objekt
+            extract: Audio aus Video sofort als [base].extracted.mp3 extrahieren; False liefert
+                     den Video-Pfad (Extraktion dann im ffmpeg-Graph der Separation)
             
         Returns:
             Pfad zur Audio-Quelle oder None
         """
         # Priorität: dereverbed.mp3 > normalized.mp3 > andere Audio-Dateien > Audio aus Video extrahieren
         audio_extensions = ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.webm']
+        index = meta.folder_index
         
         # Suche nach dereverbed Datei (höchste Priorität)
-        for file in os.listdir(meta.folder_path):
-            if file.endswith('.dereverbed.mp3'):
-                return meta.get_file_path(file)
+        matches = index.with_suffix('.dereverbed.mp3')
+        if matches:
+            return matches[0]
         
         # Wenn ein stabiler Basisname vorhanden ist, priorisiere [base].normalized.mp3
         if getattr(meta, 'base_filename', None):
             candidate = meta.get_file_path(f"{meta.base_filename}.normalized.mp3")
-            if os.path.exists(candidate):
+            if index.contains(candidate):
                 return candidate
         # Suche nach normalisierter Datei (allgemein)
-        for file in os.listdir(meta.folder_path):
-            if file.endswith('.normalized.mp3'):
-                return meta.get_file_path(file)
+        matches = index.with_suffix('.normalized.mp3')
+        if matches:
+            return matches[0]
         
         # Suche nach anderen Audio-Dateien
-        for file in os.listdir(meta.folder_path):
-            if any(file.lower().endswith(ext) for ext in audio_extensions):
-                return meta.get_file_path(file)
+        matches = index.with_extensions(audio_extensions)
+        if matches:
+            return matches[0]
         
         # Suche in Eingabedateien
         for file_path in meta.input_files:
@@ -87,40 +125,107 @@ class AudioSeparator:
         
         # Falls keine Audio-Datei gefunden wurde, prüfe auf Video-Dateien und extrahiere Audio
         video_extensions = VIDEO_EXTENSIONS
-        for file in os.listdir(meta.folder_path):
+        for file in index.names():
             if any(file.lower().endswith(ext) for ext in video_extensions):
                 video_path = meta.get_file_path(file)
-                # Benennung: [base].extracted.mp3, wenn base vorhanden, sonst vom Videonamen abgeleitet
-                extracted_stem = meta.base_filename or Path(video_path).stem
-                # Entferne etwaige bereits vorhandene Suffixe wie .extracted oder .reduced
-                if extracted_stem.endswith('.extracted'):
-                    extracted_stem = extracted_stem[:-10]
-                if extracted_stem.endswith('.reduced'):
-                    extracted_stem = extracted_stem[:-8]
-                extracted = meta.get_file_path(f"{extracted_stem}.extracted.mp3")
-                try:
-                    cmd = [
-                        'ffmpeg',
-                        '-i', video_path,
-                        '-vn',
-                        '-acodec', 'libmp3lame',
-                        '-b:a', '192k',
-                        '-y',
-                        extracted
-                    ]
-                    logger.info(f"Extrahiere Audio aus Video: {video_path} -> {extracted}")
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode == 0 and os.path.exists(extracted):
-                        meta.add_input_file(extracted)
-                        meta.add_output_file(extracted)
-                        return extracted
-                    else:
-                        logger.error(f"Audio-Extraktion fehlgeschlagen: {result.stderr}")
-                except Exception as e:
-                    logger.error(f"Fehler bei Audio-Extraktion: {e}")
+                if not extract:
+                    return video_path
+                extracted = self.extract_audio(meta, video_path)
+                if extracted:
+                    return extracted
         
         return None
     
+    @staticmethod
+    def _extracted_path(meta: ProcessingMeta, video_path: str) -> str:
+        """Benennung: [base].extracted.mp3, wenn base vorhanden, sonst vom Videonamen abgeleitet"""
+        extracted_stem = meta.base_filename or Path(video_path).stem
+        # Entferne etwaige bereits vorhandene Suffixe wie .extracted oder .reduced
+        if extracted_stem.endswith('.extracted'):
+            extracted_stem = extracted_stem[:-10]
+        if extracted_stem.endswith('.reduced'):
+            extracted_stem = extracted_stem[:-8]
+        return meta.get_file_path(f"{extracted_stem}.extracted.mp3")
+    
+    def extract_audio(self, meta: ProcessingMeta, video_path: str) -> Optional[str]:
+        """Extrahiert die Audiospur eines Videos als [base].extracted.mp3 (eigener ffmpeg-Lauf)"""
+        extracted = self._extracted_path(meta, video_path)
+        try:
+            cmd = [
+                'ffmpeg',
+                '-i', video_path,
+                '-vn',
+                '-acodec', 'libmp3lame',
+                '-b:a', '192k',
+                '-y',
+                extracted
+            ]
+            logger.info(f"Extrahiere Audio aus Video: {video_path} -> {extracted}")
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode == 0 and os.path.exists(extracted):
+                meta.add_input_file(extracted)
+                meta.add_output_file(extracted)
+                return extracted
+            else:
+                logger.error(f"Audio-Extraktion fehlgeschlagen: {result.stderr}")
+        except Exception as e:
+            logger.error(f"Fehler bei Audio-Extraktion: {e}")
+        return None
+    
+    def prepare_separation_input(self, meta: ProcessingMeta, audio_source: str, base_root: str,
+                                 config: Dict[str, Any]) -> Tuple[Optional[str], Optional[AudioBuffer]]:
+        """
+        Bereitet den Eingang der Separation vor (Extraktion, Gain-Reduktion, Dekodierung)
+        
+        Mit 'fused_ffmpeg' wird ein bereits normalisiertes Signal aus meta direkt verwendet
+        (Gain in numpy), sonst erledigt ein einziger ffmpeg-Graph Extraktion
+        ([base].extracted.mp3 aus Videos) und Gain-Reduktion und liefert float-PCM.
+        Schlägt das fehl, greifen die bisherigen Einzelschritte.
+        
+        Returns:
+            (Dateipfad der Eingabe, float-PCM oder None); (None, None) bei Fehler
+        """
+        gain_reduction = config.get('gain_reduction', 0)
+        is_video = Path(audio_source).suffix.lower() in VIDEO_EXTENSIONS
+        
+        if config.get('fused_ffmpeg', True):
+            buffer = meta.get_audio_buffer(audio_source)
+            if buffer is not None:
+                if gain_reduction > 0:
+                    buffer = AudioBuffer(buffer.samples * (10 ** (-gain_reduction / 20)), buffer.sample_rate, audio_source)
+                logger.info(f"Verwende In-Memory-Signal für die Separation (Gain -{gain_reduction}dB): {audio_source}")
+                return audio_source, buffer
+            
+            plan = AudioGraphPlan(audio_source, gain_db=-gain_reduction)
+            extracted = self._extracted_path(meta, audio_source) if is_video else None
+            if extracted:
+                plan.add_file(STAGE_SOURCE, extracted)
+            plan.add_pcm(STAGE_REDUCED)
+            result = plan.run(timeout_seconds=config.get('ffmpeg_timeout'))
+            if result.success:
+                input_path = audio_source
+                if extracted and extracted in result.files:
+                    meta.add_input_file(extracted)
+                    meta.add_output_file(extracted)
+                    input_path = extracted
+                result.pcm.path = input_path
+                return input_path, result.pcm
+            logger.warning("FFmpeg-Graph fehlgeschlagen, verwende Einzelschritte")
+        
+        if is_video:
+            audio_source = self.extract_audio(meta, audio_source)
+            if not audio_source:
+                return None, None
+        
+        if gain_reduction > 0:
+            # Benennung: [filename].reduced.mp3 (Suffixe nicht verkettet)
+            reduced_path = meta.get_file_path(f"{base_root}.reduced.mp3")
+            if self.reduce_gain(audio_source, reduced_path, gain_reduction):
+                meta.add_temp_file(reduced_path)
+                return reduced_path, None
+            logger.warning("Gain-Reduktion fehlgeschlagen, verwende Original")
+        return audio_source, None
+    
     def reduce_gain(self, input_path: str, output_path: str, reduction_db: float = 2.0) -> bool:
         """
         Reduziert den Gain einer Audio-Datei
@@ -159,33 +264,22 @@ class AudioSeparator:
             logger.error(f"Fehler bei Gain-Reduktion: {e}")
             return False
     
-    def separate_with_uvr5(self, input_path: str, output_dir: str, base_root: str) -> bool:
+    def separate_with_uvr5(self, input_path: str, output_dir: str, base_root: str,
+                           meta: Optional[ProcessingMeta] = None, buffer: Optional[AudioBuffer] = None) -> bool:
         """
         Trennt Audio mit UVR5 über den vorhandenen Wrapper und erzeugt Ziel-Dateien:
         [base].hp2.mp3, [base].hp5.mp3, optional [base].vocals.mp3
+        
+        Die Stems werden im Speicher übergeben und direkt zu MP3 kodiert (kein Zwischen-WAV).
+        Ist meta gesetzt, bleibt die Vocals-Spur dort als AudioBuffer für Dereverb und
+        Transkription erhalten. Mit buffer (float-PCM des Eingangs) wird input_path nicht
+        dekodiert.
         """
-        # Lade UVR5Wrapper per Dateipfad, damit kein Paketname benötigt wird
-        try:
-            import importlib.util
-            wrapper_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'uvr5_correct.py'))
-            spec = importlib.util.spec_from_file_location('uvr5_correct', wrapper_path)
-            if spec is None or spec.loader is None:
-                logger.error('Konnte Spec für uvr5_correct.py nicht erstellen')
-                return False
-            uvr5_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(uvr5_module)
-            UVR5Wrapper = getattr(uvr5_module, 'UVR5Wrapper')
-        except Exception as e:
-            logger.error(f"UVR5-Wrapper konnte nicht geladen werden: {e}")
+        uvr5_module = _load_uvr5_module()
+        if uvr5_module is None:
             return False
         
         try:
-            # Konvertierer-Funktion
-            def wav_to_mp3(src: str, dst: str) -> bool:
-                cmd = ['ffmpeg', '-i', src, '-c:a', 'libmp3lame', '-b:a', '192k', '-y', dst]
-                res = subprocess.run(cmd, capture_output=True, text=True)
-                return res.returncode == 0 and os.path.exists(dst)
-
             # Ziel-Dateien
             hp2_mp3 = os.path.join(output_dir, f"{base_root}.hp2.mp3")
             hp5_mp3 = os.path.join(output_dir, f"{base_root}.hp5.mp3")
@@ -193,41 +287,33 @@ class AudioSeparator:
 
             success_any = False
 
-            # 1) HP5-Separation (liefert Vocals und auch eine Instrumentalspur nach HP5-Modell)
-            wrapper_hp5 = UVR5Wrapper(model_choice="HP5")
-            wrapper_hp5.separate(input_path)
-            sep_dir = os.path.join(os.path.dirname(input_path), 'separated')
-            hp5_vocals_dir = os.path.join(sep_dir, 'vocals')
-            hp5_inst_dir = os.path.join(sep_dir, 'instrumental')
-            hp5_vocals_wavs = [f for f in os.listdir(hp5_vocals_dir) if f.lower().endswith('.wav')] if os.path.isdir(hp5_vocals_dir) else []
-            hp5_inst_wavs = [f for f in os.listdir(hp5_inst_dir) if f.lower().endswith('.wav')] if os.path.isdir(hp5_inst_dir) else []
+            # HP5 (Vocals + Instrumental) und HP2 (alternative Instrumentalspur) in einem Durchgang,
+            # das STFT-Frontend wird dabei nur einmal berechnet
+            stems = uvr5_module.separate_with_models(
+                input_path, UVR5_MODELS, vocals_for=("HP5",), in_memory=True,
+                backend=self.uvr5_backend(),
+                wave=buffer.samples if buffer is not None else None,
+                wave_sr=buffer.sample_rate if buffer is not None else None
+            )
+            hp5_stems = stems.get('HP5', {})
+            hp2_stems = stems.get('HP2', {})
 
-            # Konvertiere HP5-Ergebnisse SOFORT nach der Separation zu MP3,
-            # bevor HP2 die Dateien überschreibt
-            if hp5_inst_wavs:
-                hp5_inst_wav_path = os.path.join(hp5_inst_dir, hp5_inst_wavs[0])
-                if wav_to_mp3(hp5_inst_wav_path, hp5_mp3):
+            if hp5_stems.get('instrumental') is not None:
+                if encode_audio_buffer(hp5_stems['instrumental'], hp5_mp3):
                     success_any = True
                     logger.info(f"HP5-Instrumental gespeichert: {hp5_mp3}")
 
-            if hp5_vocals_wavs:
-                hp5_vocals_wav_path = os.path.join(hp5_vocals_dir, hp5_vocals_wavs[0])
-                if wav_to_mp3(hp5_vocals_wav_path, vocals_mp3):
+            if hp5_stems.get('vocals') is not None:
+                vocals_buffer = hp5_stems['vocals']
+                if encode_audio_buffer(vocals_buffer, vocals_mp3):
                     success_any = True
                     logger.info(f"Vocals gespeichert: {vocals_mp3}")
+                    if meta is not None:
+                        vocals_buffer.path = vocals_mp3
+                        meta.set_audio_buffer(vocals_buffer)
 
-            # 2) HP2-Separation für alternative Instrumentalspur
-            # Überschreibt die Dateien in separated/, aber HP5 ist bereits gespeichert
-            wrapper_hp2 = UVR5Wrapper(model_choice="HP2")
-            wrapper_hp2.separate(input_path)
-            hp2_vocals_dir = os.path.join(sep_dir, 'vocals')
-            hp2_inst_dir = os.path.join(sep_dir, 'instrumental')
-            hp2_inst_wavs = [f for f in os.listdir(hp2_inst_dir) if f.lower().endswith('.wav')] if os.path.isdir(hp2_inst_dir) else []
-
-            # Konvertiere HP2-Ergebnisse
-            if hp2_inst_wavs:
-                hp2_inst_wav_path = os.path.join(hp2_inst_dir, hp2_inst_wavs[0])
-                if wav_to_mp3(hp2_inst_wav_path, hp2_mp3):
+            if hp2_stems.get('instrumental') is not None:
+                if encode_audio_buffer(hp2_stems['instrumental'], hp2_mp3):
                     success_any = True
                     logger.info(f"HP2-Instrumental gespeichert: {hp2_mp3}")
 
@@ -307,7 +393,7 @@ class AudioSeparator:
             renamed_files = []
             
             # Suche nach getrennten Dateien
-            for file in os.listdir(meta.folder_path):
+            for file in meta.folder_index.names():
                 file_path = meta.get_file_path(file)
                 
                 # HP2 (Instrumental)
@@ -315,6 +401,7 @@ class AudioSeparator:
                     hp2_name = f"{base_name}.hp2.mp3"
                     hp2_path = meta.get_file_path(hp2_name)
                     os.rename(file_path, hp2_path)
+                    meta.folder_index.rename(file_path, hp2_path)
                     meta.add_output_file(hp2_path)
                     meta.add_keep_file(hp2_name)
                     renamed_files.append(hp2_name)
@@ -325,6 +412,7 @@ class AudioSeparator:
                     hp5_name = f"{base_name}.hp5.mp3"
                     hp5_path = meta.get_file_path(hp5_name)
                     os.rename(file_path, hp5_path)
+                    meta.folder_index.rename(file_path, hp5_path)
                     meta.add_output_file(hp5_path)
                     meta.add_keep_file(hp5_name)
                     renamed_files.append(hp5_name)
@@ -354,6 +442,7 @@ class AudioSeparator:
                         
                         # Lösche WAV-Datei
                         os.remove(file_path)
+                        meta.folder_index.remove(file_path)
             
             if renamed_files:
                 logger.info(f"✅ {len(renamed_files)} Dateien erfolgreich umbenannt")
@@ -366,6 +455,51 @@ class AudioSeparator:
             logger.error(f"Fehler beim Umbenennen der getrennten Dateien: {e}")
             return False
     
+    def uvr5_backend(self) -> str:
+        """Inferenz-Backend der UVR5-Modelle (Konfiguration 'uvr5_backend', sonst UVR5_VR_BACKEND)"""
+        config = {**self.default_config, **self.config}
+        return (config.get('uvr5_backend') or os.getenv('UVR5_VR_BACKEND', 'torch')).lower()
+    
+    def stem_cache_key(self, cache, audio_source: str, config: Dict[str, Any],
+                       input_buffer: Optional[AudioBuffer] = None) -> Optional[str]:
+        """
+        Cache-Schlüssel aus dem Fingerprint der Audio-Quelle und der Separations-Konfiguration
+        
+        Liegt das Eingangssignal bereits dekodiert vor (input_buffer), wird es direkt gehasht
+        statt die Quelle ein zweites Mal zu dekodieren.
+        
+        Returns:
+            Schlüssel oder None, wenn die Quelle nicht dekodiert werden konnte
+        """
+        if input_buffer is not None:
+            fingerprint = fingerprint_samples(input_buffer)
+        else:
+            fingerprint = fingerprint_audio(audio_source)
+        if fingerprint is None:
+            return None
+        key_config = {
+            'stage': 'audio_separation',
+            'models': list(UVR5_MODELS),
+            'agg': UVR5_AGG,
+            'modelparams': read_modelparams('4band_v2'),
+            'resample_profile': uvr5_resample_profile(),
+            'chunking': uvr5_chunking(),
+            'gain_reduction': config.get('gain_reduction', 0),
+        }
+        # Quantisierte Stems sind verlustbehaftet und dürfen fp32-Anfragen nicht bedienen
+        if self.uvr5_backend() == 'onnx_int8':
+            key_config['backend'] = 'onnx_int8'
+        return cache.make_key(fingerprint, key_config)
+    
+    @staticmethod
+    def _stem_targets(meta: ProcessingMeta, base_root: str) -> Dict[str, str]:
+        """Stem-Name im Cache -> Zielpfad im Song-Ordner"""
+        return {
+            'hp2.mp3': meta.get_file_path(f"{base_root}.hp2.mp3"),
+            'hp5.mp3': meta.get_file_path(f"{base_root}.hp5.mp3"),
+            'vocals.mp3': meta.get_file_path(f"{base_root}.vocals.mp3"),
+        }
+    
     def process_meta(self, meta: ProcessingMeta) -> bool:
         """
         Trennt Audio im Meta-Objekt
@@ -379,8 +513,10 @@ class AudioSeparator:
         log_start('audio_separation.process_meta', meta)
         send_processing_status(meta, 'separating')
         try:
-            # Finde Audio-Quelle
-            audio_source = self.find_audio_source(meta)
+            config = {**self.default_config, **self.config}
+            
+            # Finde Audio-Quelle (Videos werden im ffmpeg-Graph extrahiert)
+            audio_source = self.find_audio_source(meta, extract=not config.get('fused_ffmpeg', True))
             if not audio_source:
                 logger.error("Keine Audio-Quelle für Separation gefunden")
                 meta.mark_step_failed('audio_separation')
@@ -389,8 +525,6 @@ class AudioSeparator:
             logger.info(f"Verwende Audio-Quelle: {audio_source}")
             meta.status = ProcessingStatus.IN_PROGRESS
             
-            # Reduziere Gain falls nötig
-            config = {**self.default_config, **self.config}
             # Stabiler Basisname: meta.base_filename, sonst vom audio_source abgeleitet
             if getattr(meta, 'base_filename', None):
                 base_root = meta.base_filename
@@ -403,28 +537,45 @@ class AudioSeparator:
                 else:
                     base_root = base_name
             
-            if config.get('gain_reduction', 0) > 0:
-                # Benennung: [filename].reduced.mp3 (Suffixe nicht verkettet)
-                reduced_name = f"{base_root}.reduced.mp3"
-                reduced_path = meta.get_file_path(reduced_name)
-                
-                if not self.reduce_gain(audio_source, reduced_path, config['gain_reduction']):
-                    logger.warning("Gain-Reduktion fehlgeschlagen, verwende Original")
-                    reduced_path = audio_source
-                    reduced_name = Path(audio_source).name
-                else:
-                    meta.add_temp_file(reduced_path)
-            else:
-                reduced_path = audio_source
-                reduced_name = Path(audio_source).name
+            # Stem-Cache: identisches Audio mit identischer Konfiguration wurde bereits getrennt
+            cache = get_stem_cache() if config.get('stem_cache', True) else None
+            prepared = None
+            if cache and config.get('fused_ffmpeg', True):
+                # Der ffmpeg-Graph dekodiert ohnehin: Fingerprint aus dessen PCM statt eigenem Dekodierlauf
+                prepared = self.prepare_separation_input(meta, audio_source, base_root, config)
+            cache_key = self.stem_cache_key(cache, audio_source, config, prepared[1] if prepared else None) if cache else None
+            if cache_key:
+                meta.metadata['stem_cache_key'] = cache_key
+                restored = cache.restore(cache_key, self._stem_targets(meta, base_root))
+                if restored:
+                    for p in restored.values():
+                        meta.add_output_file(p)
+                        meta.add_keep_file(os.path.basename(p))
+                    logger.info(f"♻️ Stems aus dem Cache übernommen ({cache_key[:12]}): {', '.join(sorted(restored))}")
+                    logger.info(f"✅ Audio erfolgreich getrennt für: {meta.artist} - {meta.title}")
+                    meta.mark_step_completed('audio_separation')
+                    meta.status = ProcessingStatus.COMPLETED
+                    return True
+            
+            # Reduziere Gain falls nötig (bei Videos inkl. Extraktion, ein ffmpeg-Lauf)
+            reduced_path, input_buffer = prepared or self.prepare_separation_input(meta, audio_source, base_root, config)
+            if not reduced_path:
+                logger.error("Audio-Quelle konnte nicht vorbereitet werden")
+                meta.mark_step_failed('audio_separation')
+                meta.status = ProcessingStatus.FAILED
+                send_processing_status(meta, 'failed')
+                return False
             
             # Trenne Audio
             model = config.get('model', 'HP2')
             separation_success = False
             
             # Versuche UVR5 zuerst
-            if self.separate_with_uvr5(reduced_path, meta.folder_path, base_root):
+            if self.separate_with_uvr5(reduced_path, meta.folder_path, base_root, meta, input_buffer):
                 separation_success = True
+                # Nur echte UVR5-Ergebnisse cachen (nicht den FFmpeg-Fallback)
+                if cache_key:
+                    cache.put(cache_key, self._stem_targets(meta, base_root))
             else:
                 logger.warning("UVR5-Separation fehlgeschlagen, verwende FFmpeg-Fallback")
                 # Fallback erzeugt direkt [base].hp2.mp3 und [base].hp5.mp3
@@ -25,34 +25,27 @@ def find_best_vocals_file(meta: ProcessingMeta) -> Optional[str]:
         Pfad zur besten Vocals-Datei oder None
     """
     audio_extensions = ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.webm']
+    index = meta.folder_index
     
     # Suche nach dereverbed Vocals-Dateien (höchste Priorität)
-    for file in os.listdir(meta.folder_path):
-        if file.endswith('.dereverbed.mp3'):
-            vocals_path = meta.get_file_path(file)
-            logger.info(f"Verwende dereverbed Vocals: {file}")
-            return vocals_path
+    for vocals_path in index.with_suffix('.dereverbed.mp3'):
+        logger.info(f"Verwende dereverbed Vocals: {os.path.basename(vocals_path)}")
+        return vocals_path
     
     # Suche nach normalen Vocals-Dateien
-    for file in os.listdir(meta.folder_path):
-        if file.endswith('.vocals.mp3'):
-            vocals_path = meta.get_file_path(file)
-            logger.info(f"Verwende normale Vocals: {file}")
-            return vocals_path
+    for vocals_path in index.with_suffix('.vocals.mp3'):
+        logger.info(f"Verwende normale Vocals: {os.path.basename(vocals_path)}")
+        return vocals_path
     
     # Suche nach HP5-Dateien
-    for file in os.listdir(meta.folder_path):
-        if file.endswith('.hp5.mp3'):
-            vocals_path = meta.get_file_path(file)
-            logger.info(f"Verwende HP5-Datei als Vocals: {file}")
-            return vocals_path
+    for vocals_path in index.with_suffix('.hp5.mp3'):
+        logger.info(f"Verwende HP5-Datei als Vocals: {os.path.basename(vocals_path)}")
+        return vocals_path
     
     # Suche nach anderen Audio-Dateien
-    for file in os.listdir(meta.folder_path):
-        if any(file.lower().endswith(ext) for ext in audio_extensions):
-            vocals_path = meta.get_file_path(file)
-            logger.info(f"Verwende Audio-Datei als Vocals: {file}")
-            return vocals_path
+    for vocals_path in index.with_extensions(audio_extensions):
+        logger.info(f"Verwende Audio-Datei als Vocals: {os.path.basename(vocals_path)}")
+        return vocals_path
     
     logger.warning("Keine Vocals-Datei gefunden")
     return None
@@ -69,34 +62,29 @@ def find_best_audio_source(meta: ProcessingMeta) -> Optional[str]:
         Pfad zur besten Audio-Quelle oder None
     """
     audio_extensions = ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.webm']
+    index = meta.folder_index
     
     # Suche nach dereverbed Datei (höchste Priorität)
-    for file in os.listdir(meta.folder_path):
-        if file.endswith('.dereverbed.mp3'):
-            audio_path = meta.get_file_path(file)
-            logger.info(f"Verwende dereverbed Audio: {file}")
-            return audio_path
+    for audio_path in index.with_suffix('.dereverbed.mp3'):
+        logger.info(f"Verwende dereverbed Audio: {os.path.basename(audio_path)}")
+        return audio_path
     
     # Wenn ein stabiler Basisname vorhanden ist, priorisiere [base].normalized.mp3
     if getattr(meta, 'base_filename', None):
         candidate = meta.get_file_path(f"{meta.base_filename}.normalized.mp3")
-        if os.path.exists(candidate):
+        if index.contains(candidate):
             logger.info(f"Verwende normalisierte Audio: {meta.base_filename}.normalized.mp3")
             return candidate
     
     # Suche nach normalisierter Datei (allgemein)
-    for file in os.listdir(meta.folder_path):
-        if file.endswith('.normalized.mp3'):
-            audio_path = meta.get_file_path(file)
-            logger.info(f"Verwende normalisierte Audio: {file}")
-            return audio_path
+    for audio_path in index.with_suffix('.normalized.mp3'):
+        logger.info(f"Verwende normalisierte Audio: {os.path.basename(audio_path)}")
+        return audio_path
     
     # Suche nach anderen Audio-Dateien
-    for file in os.listdir(meta.folder_path):
-        if any(file.lower().endswith(ext) for ext in audio_extensions):
-            audio_path = meta.get_file_path(file)
-            logger.info(f"Verwende Audio-Datei: {file}")
-            return audio_path
+    for audio_path in index.with_extensions(audio_extensions):
+        logger.info(f"Verwende Audio-Datei: {os.path.basename(audio_path)}")
+        return audio_path
     
     # Suche in Eingabedateien
     for file_path in meta.input_files:
@@ -78,7 +78,7 @@ class FileCleaner:
             
             # 1) Lösche .vocals Dateien
             try:
-                files = os.listdir(meta.folder_path)
+                files = meta.folder_index.names()
             except Exception as e:
                 logger.warning(f"Konnte Ordner nicht lesen: {e}")
                 return
@@ -89,13 +89,14 @@ class FileCleaner:
                     try:
                         if os.path.exists(file_path) and os.path.isfile(file_path):
                             os.remove(file_path)
+                            meta.folder_index.remove(file_path)
                             logger.info(f"🗑️ .vocals Datei gelöscht: {file}")
                     except Exception as e:
                         logger.warning(f"⚠️ Konnte .vocals Datei nicht löschen {file}: {e}")
             
             # 2) Entferne .normalized aus Dateinamen
             try:
-                files = os.listdir(meta.folder_path)
+                files = meta.folder_index.names()
             except Exception as e:
                 logger.warning(f"Konnte Ordner nicht lesen (zweiter Durchlauf): {e}")
                 return
@@ -114,6 +115,7 @@ class FileCleaner:
                         # Ziel existiert bereits - lösche .normalized Datei
                         try:
                             os.remove(old_path)
+                            meta.folder_index.remove(old_path)
                             logger.info(f"🗑️ .normalized Datei gelöscht (Ziel existiert): {file}")
                         except Exception as e:
                             logger.warning(f"⚠️ Konnte .normalized Datei nicht löschen {file}: {e}")
@@ -121,6 +123,7 @@ class FileCleaner:
                         # Ziel existiert nicht - benenne um
                         try:
                             os.rename(old_path, new_path)
+                            meta.folder_index.rename(old_path, new_path)
                             logger.info(f"📝 .normalized entfernt: {file} → {new_name}")
                         except Exception as e:
                             logger.warning(f"⚠️ Konnte Datei nicht umbenennen {file}: {e}")
@@ -283,16 +286,16 @@ class FileCleaner:
                 os.makedirs(subdir_path, exist_ok=True)
                 
                 # Verschiebe Dateien in entsprechende Unterordner
-                for file in os.listdir(meta.folder_path):
-                    if os.path.isfile(os.path.join(meta.folder_path, file)):
-                        file_ext = os.path.splitext(file)[1].lower()
-                        if file_ext in extensions:
-                            old_path = os.path.join(meta.folder_path, file)
-                            new_path = os.path.join(subdir_path, file)
-                            
-                            if old_path != new_path:
-                                os.rename(old_path, new_path)
-                                logger.info(f"Datei organisiert: {file} -> {subdir}/")
+                for file in meta.folder_index.names():
+                    file_ext = os.path.splitext(file)[1].lower()
+                    if file_ext in extensions:
+                        old_path = os.path.join(meta.folder_path, file)
+                        new_path = os.path.join(subdir_path, file)
+                        
+                        if old_path != new_path:
+                            os.rename(old_path, new_path)
+                            meta.folder_index.remove(old_path)
+                            logger.info(f"Datei organisiert: {file} -> {subdir}/")
             
             logger.info("✅ Dateien erfolgreich organisiert")
             return True
@@ -353,6 +356,9 @@ class FileCleaner:
             logger.info(f"Starte Cleanup für: {meta.artist} - {meta.title}")
             meta.status = ProcessingStatus.IN_PROGRESS
             
+            # In-Memory-Stems werden nach dem Cleanup nicht mehr benötigt
+            meta.clear_audio_buffers()
+            
             # Erstelle Backup falls konfiguriert
             if not dry_run:
                 self.create_backup(meta)
@@ -370,6 +376,8 @@ class FileCleaner:
                 for file_path in files_to_remove:
                     if self.remove_file_safely(file_path, dry_run):
                         removed_count += 1
+                        if not dry_run:
+                            meta.folder_index.remove(file_path)
                 
                 logger.info(f"✅ {removed_count} Dateien entfernt")
             else:
@@ -446,7 +454,7 @@ class FileCleaner:
             Zusammenfassung des Ordners
         """
         try:
-            all_files = self.get_all_files_in_folder(meta.folder_path)
+            all_files = meta.folder_index.paths()
             keep_files = self.identify_files_to_keep(meta)
             remove_files = self.identify_files_to_remove(meta)
             
@@ -9,10 +9,11 @@ import re
 import subprocess
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import yt_dlp
 
 from .meta import ProcessingMeta, ProcessingStatus
+from .media_probe import probe_media
 try:
     from ..constants import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, is_audio_file, is_video_file
 except ImportError:
@@ -32,6 +33,17 @@ from .logger_utils import log_start, send_processing_status
 
 logger = logging.getLogger(__name__)
 
+# Video-Codecs, die ohne Neukodierung in MP4 übernommen werden können (mpeg4 = MPEG-4 Part 2, XviD/DivX)
+MP4_COPY_VIDEO_CODECS = {'h264', 'mpeg4'}
+
+# Audio-Codecs, die ohne Neukodierung in MP4 übernommen werden können
+MP4_COPY_AUDIO_CODECS = {'aac', 'mp3'}
+
+# Wege der MP4-Konvertierung (in meta.metadata['video_transcode_mode'])
+TRANSCODE_MODE_REMUX = 'remux'              # Video und Audio kopiert
+TRANSCODE_MODE_REMUX_AUDIO = 'remux_audio'  # Video kopiert, Audio zu AAC
+TRANSCODE_MODE_TRANSCODE = 'transcode'      # Vollständige Neukodierung (libx264)
+
 class SourceFileEnsurer:
     """Stellt sicher, dass Audio- und Video-Dateien verfügbar sind"""
     
@@ -47,8 +59,15 @@ class SourceFileEnsurer:
             'audio_codec': 'mp3',
             'video_codec': 'mp4',
             'audio_bitrate': '192k',
-            'video_quality': 'best'
+            'video_quality': 'best',
+            # MP4-Konvertierung: Stream-Copy wenn möglich, sonst libx264 mit diesem Preset
+            'stream_copy': True,
+            'transcode_preset': 'veryfast',
+            'transcode_crf': 23,
+            'transcode_timeout': 600
         }
+        # Weg der letzten MP4-Konvertierung (siehe TRANSCODE_MODE_*)
+        self.last_transcode_mode: Optional[str] = None
     
     def extract_video_id_from_txt(self, meta: ProcessingMeta) -> Optional[str]:
         """
@@ -61,7 +80,7 @@ class SourceFileEnsurer:
             YouTube-Video-ID oder None
         """
         try:
-            txt_files = [f for f in os.listdir(meta.folder_path) if f.endswith('.txt')]
+            txt_files = [f for f in meta.folder_index.names() if f.endswith('.txt')]
             if not txt_files:
                 return None
             
@@ -93,12 +112,8 @@ class SourceFileEnsurer:
             True wenn Audio-Spur vorhanden, False sonst
         """
         try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-select_streams', 'a', 
-                '-show_entries', 'stream=codec_name', '-of', 'csv=p=0', video_file
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            return result.returncode == 0 and result.stdout.strip() != ''
+            info = probe_media(video_file)
+            return info is not None and info.has_audio
         except Exception as e:
             logger.error(f"❌ Fehler beim Prüfen der Audio-Spur: {e}")
             return False
@@ -223,22 +238,22 @@ class SourceFileEnsurer:
                 logger.error(f"❌ Ordner existiert nicht: {meta.folder_path}")
                 return files
             
-            for file in os.listdir(meta.folder_path):
+            # Ordner-Index enthält nur Dateien (kein isfile-Aufruf pro Eintrag)
+            for file in meta.folder_index.names():
                 file_path = os.path.join(meta.folder_path, file)
-                if os.path.isfile(file_path):
-                    ext = Path(file).suffix.lower()
-                    
-                    # Debug: Log alle gefundenen Dateien
-                    logger.debug(f"🔍 Gefundene Datei: {file} (Erweiterung: {ext})")
-                    
-                    if ext in AUDIO_EXTENSIONS:
-                        files['audio'].append(file_path)
-                        logger.info(f"🎵 Audio-Datei gefunden: {file}")
-                    elif ext in VIDEO_EXTENSIONS:
-                        files['video'].append(file_path)
-                        logger.info(f"🎬 Video-Datei gefunden: {file}")
-                    else:
-                        logger.debug(f"📄 Andere Datei ignoriert: {file} (Erweiterung: {ext})")
+                ext = Path(file).suffix.lower()
+                
+                # Debug: Log alle gefundenen Dateien
+                logger.debug(f"🔍 Gefundene Datei: {file} (Erweiterung: {ext})")
+                
+                if ext in AUDIO_EXTENSIONS:
+                    files['audio'].append(file_path)
+                    logger.info(f"🎵 Audio-Datei gefunden: {file}")
+                elif ext in VIDEO_EXTENSIONS:
+                    files['video'].append(file_path)
+                    logger.info(f"🎬 Video-Datei gefunden: {file}")
+                else:
+                    logger.debug(f"📄 Andere Datei ignoriert: {file} (Erweiterung: {ext})")
             
             logger.info(f"📁 Gefundene Dateien - Audio: {len(files['audio'])}, Video: {len(files['video'])}")
             return files
@@ -247,9 +262,48 @@ class SourceFileEnsurer:
             logger.error(f"❌ Fehler beim Suchen der Dateien: {e}")
             return files
     
+    def get_mp4_copy_mode(self, input_file: str) -> Tuple[Optional[str], str]:
+        """
+        Prüft per (gecachtem) ffprobe, ob die Streams ohne Neukodierung in MP4 passen
+        
+        Args:
+            input_file: Pfad zur Eingabe-Video-Datei
+            
+        Returns:
+            (TRANSCODE_MODE_REMUX, TRANSCODE_MODE_REMUX_AUDIO oder None für Neukodierung,
+             Video-Codec bzw. '' wenn unbekannt)
+        """
+        info = probe_media(input_file)
+        if info is None or info.video is None:
+            return None, ''
+        video_codec = info.video.codec_name
+        if video_codec not in MP4_COPY_VIDEO_CODECS:
+            return None, video_codec
+        if info.audio is not None and info.audio.codec_name not in MP4_COPY_AUDIO_CODECS:
+            return TRANSCODE_MODE_REMUX_AUDIO, video_codec
+        return TRANSCODE_MODE_REMUX, video_codec
+    
+    def _run_mp4_conversion(self, cmd: List[str], output_file: str, timeout: float) -> bool:
+        """Startet ffmpeg; entfernt bei Fehlschlag oder Zeitüberschreitung eine unvollständige Ausgabe"""
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            if result.returncode == 0 and os.path.exists(output_file):
+                return True
+            logger.warning(f"⚠️ FFmpeg fehlgeschlagen: {result.stderr[-500:]}")
+        except subprocess.TimeoutExpired:
+            logger.warning(f"⚠️ FFmpeg nach {timeout}s abgebrochen")
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        return False
+    
     def transcode_to_mp4(self, input_file: str, output_file: str) -> bool:
         """
-        Transkodiert Video-Datei zu MP4
+        Konvertiert Video-Datei zu MP4
+        
+        Sind Video- (H.264/MPEG-4 Part 2) und Audio-Codec MP4-kompatibel, werden die Streams
+        nur kopiert (bzw. nur das Audio zu AAC kodiert); sonst oder wenn das Kopieren
+        fehlschlägt, wird mit libx264 und dem konfigurierten Preset neu kodiert. Der
+        gewählte Weg steht danach in self.last_transcode_mode.
         
         Args:
             input_file: Pfad zur Eingabe-Video-Datei
@@ -258,20 +312,43 @@ class SourceFileEnsurer:
         Returns:
             True wenn erfolgreich, False sonst
         """
+        self.last_transcode_mode = None
         try:
+            config = {**self.default_config, **self.config}
+            timeout = config['transcode_timeout']
+            
+            copy_mode, video_codec = self.get_mp4_copy_mode(input_file) if config['stream_copy'] else (None, '')
+            if copy_mode:
+                # AVI hat oft keine Zeitstempel (genpts); gepackte B-Frames (DivX/XviD) entpacken
+                cmd = ['ffmpeg', '-fflags', '+genpts', '-i', input_file, '-map', '0:v:0', '-map', '0:a:0?', '-c:v', 'copy']
+                if video_codec == 'mpeg4':
+                    cmd += ['-bsf:v', 'mpeg4_unpack_bframes']
+                if copy_mode == TRANSCODE_MODE_REMUX:
+                    cmd += ['-c:a', 'copy']
+                else:
+                    cmd += ['-c:a', 'aac', '-b:a', config['audio_bitrate']]
+                cmd += ['-movflags', '+faststart', '-y', output_file]
+                
+                logger.info(f"🎬 Remuxe Video zu MP4 ({copy_mode}, ohne Neukodierung): {input_file} -> {output_file}")
+                if self._run_mp4_conversion(cmd, output_file, timeout):
+                    self.last_transcode_mode = copy_mode
+                    logger.info(f"✅ Video erfolgreich zu MP4 geremuxt: {output_file}")
+                    return True
+                logger.warning("⚠️ Remux fehlgeschlagen, kodiere neu")
+            
             cmd = [
                 'ffmpeg', '-i', input_file, '-c:v', 'libx264', '-c:a', 'aac',
-                '-preset', 'medium', '-crf', '23', '-y', output_file
+                '-preset', config['transcode_preset'], '-crf', str(config['transcode_crf']),
+                '-movflags', '+faststart', '-y', output_file
             ]
             
-            logger.info(f"🎬 Transkodiere Video zu MP4: {input_file} -> {output_file}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-            
-            if result.returncode == 0 and os.path.exists(output_file):
+            logger.info(f"🎬 Transkodiere Video zu MP4 (libx264 {config['transcode_preset']}): {input_file} -> {output_file}")
+            if self._run_mp4_conversion(cmd, output_file, timeout):
+                self.last_transcode_mode = TRANSCODE_MODE_TRANSCODE
                 logger.info(f"✅ Video erfolgreich zu MP4 transkodiert: {output_file}")
                 return True
             else:
-                logger.error(f"❌ Video-Transkodierung fehlgeschlagen: {result.stderr}")
+                logger.error("❌ Video-Transkodierung fehlgeschlagen")
                 return False
                 
         except Exception as e:
@@ -336,7 +413,8 @@ class SourceFileEnsurer:
                         meta.add_output_file(mp4_file)
                         meta.add_keep_file(f"{base_name}.mp4")
                         meta.metadata['transcoded_video'] = True
-                        logger.info("✅ Video erfolgreich zu MP4 transkodiert")
+                        meta.metadata['video_transcode_mode'] = self.last_transcode_mode
+                        logger.info(f"✅ Video erfolgreich zu MP4 konvertiert ({self.last_transcode_mode})")
                     else:
                         logger.info("✅ MP4-Version bereits vorhanden, verwende diese")
             
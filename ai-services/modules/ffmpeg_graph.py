@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+FFmpeg Graph Module
+Plant Extraktion, Loudnorm und Lautstärke-Reduktion als einen ffmpeg-Filtergraphen mit
+mehreren Ausgängen: die MP3-Artefakte der Bibliothek und das float-PCM für die Separation
+entstehen in einem einzigen Lauf statt über verkettete, verlustbehaftete MP3-Zwischenstufen
+"""
+
+import os
+import threading
+import subprocess
+import logging
+from dataclasses import dataclass, field
+from typing import Optional, List
+
+from .audio_buffer import AudioBuffer
+from .audio_decoder import probe_audio_stream, read_pcm_stream
+
+logger = logging.getLogger(__name__)
+
+# Stufen der Kette (jede Stufe verarbeitet die vorherige weiter)
+STAGE_SOURCE = 'source'          # Erster Audio-Stream der Eingabe (Extraktion aus Video)
+STAGE_NORMALIZED = 'normalized'  # nach loudnorm
+STAGE_REDUCED = 'reduced'        # nach Lautstärke-Reduktion (Eingang der Separation)
+STAGES = (STAGE_SOURCE, STAGE_NORMALIZED, STAGE_REDUCED)
+
+# Codec der MP3-Artefakte (wie bisher bei Extraktion, Normalisierung und Gain-Reduktion)
+MP3_192K = ['-c:a', 'libmp3lame', '-b:a', '192k']
+
+
+@dataclass
+class GraphOutput:
+    """Ein Ausgang des Graphen: Datei (path) oder f32le-PCM über stdout (path=None)"""
+
+    stage: str
+    path: Optional[str] = None
+    codec_args: List[str] = field(default_factory=list)
+    sample_rate: int = 44100
+    channels: int = 2
+
+
+@dataclass
+class GraphResult:
+    """Ergebnis eines Laufs: geschriebene Dateien und ggf. das PCM als AudioBuffer"""
+
+    success: bool
+    files: List[str] = field(default_factory=list)
+    pcm: Optional[AudioBuffer] = None
+    error: str = ''
+
+
+class AudioGraphPlan:
+    """
+    Baut und startet einen ffmpeg-Lauf für die Kette Quelle -> loudnorm -> volume
+
+    Es werden nur die Stufen gebaut, die ein Ausgang benötigt; Stufen mit mehreren
+    Abnehmern werden per asplit verzweigt. Höchstens ein Ausgang darf PCM sein.
+
+    Beispiel (Video -> extracted.mp3 + reduziertes PCM für UVR5):
+        plan = AudioGraphPlan(video_path, gain_db=-2.0)
+        plan.add_file(STAGE_SOURCE, extracted_mp3)
+        plan.add_pcm(STAGE_REDUCED)
+        result = plan.run()
+    """
+
+    def __init__(self, input_path: str, loudnorm: Optional[str] = None, gain_db: float = 0.0,
+                 normalize_gain_db: Optional[float] = None):
+        """
+        Args:
+            input_path: Audio- oder Video-Datei (erster Audio-Stream)
+            loudnorm: loudnorm-Parameter, z.B. 'I=-16:TP=-1.5:LRA=11' ('' = Standardwerte,
+                      None = Stufe 'normalized' entspricht der Quelle)
+            gain_db: Lautstärke-Änderung der Stufe 'reduced' in dB (negativ = leiser)
+            normalize_gain_db: Lineare Verstärkung der Stufe 'normalized' statt loudnorm
+                               (zweiter Durchgang mit gemessener Lautheit)
+        """
+        if loudnorm is not None and normalize_gain_db is not None:
+            raise ValueError("loudnorm und normalize_gain_db schließen sich aus")
+        self.input_path = input_path
+        self.loudnorm = loudnorm
+        self.gain_db = gain_db
+        self.normalize_gain_db = normalize_gain_db
+        self.outputs: List[GraphOutput] = []
+
+    def add_file(self, stage: str, path: str, codec_args: Optional[List[str]] = None) -> 'AudioGraphPlan':
+        """Fügt eine Ausgabedatei hinzu (Standard: MP3 192 kbit/s)"""
+        self._check_stage(stage)
+        self.outputs.append(GraphOutput(stage, path, list(MP3_192K if codec_args is None else codec_args)))
+        return self
+
+    def add_pcm(self, stage: str, sample_rate: int = 44100, channels: int = 2) -> 'AudioGraphPlan':
+        """Fügt den PCM-Ausgang (float32 über stdout) hinzu"""
+        self._check_stage(stage)
+        if any(output.path is None for output in self.outputs):
+            raise ValueError("Nur ein PCM-Ausgang pro Graph möglich")
+        self.outputs.append(GraphOutput(stage, None, sample_rate=sample_rate, channels=channels))
+        return self
+
+    @staticmethod
+    def _check_stage(stage: str):
+        if stage not in STAGES:
+            raise ValueError(f"Unbekannte Stufe '{stage}' (verfügbar: {', '.join(STAGES)})")
+
+    def _stage_filter(self, stage: str) -> Optional[str]:
+        if stage == STAGE_NORMALIZED and self.loudnorm is not None:
+            return f"loudnorm={self.loudnorm}" if self.loudnorm else 'loudnorm'
+        if stage == STAGE_NORMALIZED and self.normalize_gain_db:
+            return f"volume={self.normalize_gain_db:.2f}dB"
+        if stage == STAGE_REDUCED and self.gain_db:
+            return f"volume={self.gain_db}dB"
+        return None
+
+    def build_command(self) -> List[str]:
+        """ffmpeg-Kommando mit -filter_complex und einem -map pro Ausgang"""
+        if not self.outputs:
+            raise ValueError("Graph ohne Ausgänge")
+        last = max(STAGES.index(output.stage) for output in self.outputs)
+
+        parts = []
+        labels = {}
+        current = '0:a:0'
+        for index, stage in enumerate(STAGES[:last + 1]):
+            stage_filter = self._stage_filter(stage)
+            if stage_filter:
+                parts.append(f"[{current}]{stage_filter}[{stage}]")
+                current = stage
+            consumers = [output for output in self.outputs if output.stage == stage]
+            n = len(consumers) + (1 if index < last else 0)
+            if n > 1:
+                split = [f"{stage}{i}" for i in range(n)]
+                parts.append(f"[{current}]asplit={n}" + ''.join(f"[{label}]" for label in split))
+            else:
+                split = [current] * n
+            for output, label in zip(consumers, split):
+                labels[id(output)] = label
+            if index < last:
+                current = split[-1]
+
+        cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-y', '-i', self.input_path]
+        if parts:
+            cmd += ['-filter_complex', ';'.join(parts)]
+        for output in self.outputs:
+            label = labels[id(output)]
+            cmd += ['-map', label if label == '0:a:0' else f"[{label}]", '-vn']
+            if output.path is None:
+                cmd += ['-f', 'f32le', '-c:a', 'pcm_f32le',
+                        '-ar', str(output.sample_rate), '-ac', str(output.channels), 'pipe:1']
+            else:
+                cmd += [*output.codec_args, output.path]
+        return cmd
+
+    def run(self, timeout_seconds: Optional[float] = None) -> GraphResult:
+        """Startet ffmpeg einmal für alle Ausgänge"""
+        cmd = self.build_command()
+        pcm_output = next((output for output in self.outputs if output.path is None), None)
+        for output in self.outputs:
+            if output.path:
+                output_dir = os.path.dirname(output.path)
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
+
+        logger.info(f"FFmpeg-Graph: {os.path.basename(self.input_path)} -> "
+                    f"{', '.join(os.path.basename(o.path) if o.path else f'PCM ({o.stage})' for o in self.outputs)}")
+        timed_out = threading.Event()
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE if pcm_output else subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            if pcm_output:
+                info = probe_audio_stream(self.input_path)
+                duration = info[2] if info else 0
+                frames = int((duration + 2.0) * pcm_output.sample_rate) if duration > 0 else pcm_output.sample_rate * 60
+                # read_pcm_stream blockiert bis EOF: hängendes ffmpeg per Timer beenden
+                timer = None
+                if timeout_seconds:
+                    timer = threading.Timer(timeout_seconds, lambda: (timed_out.set(), process.kill()))
+                    timer.daemon = True
+                    timer.start()
+                try:
+                    interleaved, stderr = read_pcm_stream(process, pcm_output.channels, frames)
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+            else:
+                try:
+                    _, stderr = process.communicate(timeout=timeout_seconds)
+                except subprocess.TimeoutExpired:
+                    timed_out.set()
+                    process.kill()
+                    _, stderr = process.communicate()
+        except Exception as e:
+            logger.error(f"❌ FFmpeg-Graph fehlgeschlagen: {e}")
+            return GraphResult(False, error=str(e))
+
+        if timed_out.is_set():
+            error = f"Zeitüberschreitung nach {timeout_seconds}s"
+            logger.error(f"❌ FFmpeg-Graph fehlgeschlagen: {error}")
+            return GraphResult(False, error=error)
+
+        if process.returncode != 0:
+            error = stderr.decode(errors='ignore')[-500:]
+            logger.error(f"❌ FFmpeg-Graph fehlgeschlagen: {error}")
+            return GraphResult(False, error=error)
+
+        files = [output.path for output in self.outputs if output.path and os.path.exists(output.path)]
+        pcm = None
+        if pcm_output:
+            if interleaved.shape[0] == 0:
+                return GraphResult(False, files, error='Kein PCM erhalten')
+            pcm = AudioBuffer(interleaved.T, pcm_output.sample_rate, self.input_path)
+        return GraphResult(True, files, pcm)
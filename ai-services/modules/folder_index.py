@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Folder Index Module
+Einmal gescannter, inkrementell gepflegter Index eines Song-Ordners, damit die
+Finder der Module nicht bei jeder Suche os.listdir aufrufen müssen
+"""
+
+import os
+import logging
+from typing import Optional, Dict, List, Iterable
+
+try:
+    from ..constants import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, LYRICS_EXTENSIONS, COVER_EXTENSIONS
+except ImportError:
+    try:
+        from constants import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS, LYRICS_EXTENSIONS, COVER_EXTENSIONS
+    except ImportError:
+        # Fallback: define constants locally
+        AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma'}
+        VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'}
+        LYRICS_EXTENSIONS = {'.txt', '.lrc', '.srt', '.vtt'}
+        COVER_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+
+logger = logging.getLogger(__name__)
+
+# Pipeline-Artefakte, erkannt am zusammengesetzten Suffix (Reihenfolge = Priorität beim Klassifizieren)
+ARTIFACT_SUFFIXES = [
+    ('.dereverbed.mp3', 'dereverbed'),
+    ('.vocals.mp3', 'vocals'),
+    ('.hp2.mp3', 'hp2'),
+    ('.hp5.mp3', 'hp5'),
+    ('.normalized.mp3', 'normalized'),
+    ('.extracted.mp3', 'extracted'),
+    ('.reduced.mp3', 'reduced'),
+]
+
+
+def classify_file(name: str) -> str:
+    """
+    Ordnet einen Dateinamen einer Kategorie zu
+
+    Returns:
+        Artefakt-Kategorie (z.B. 'dereverbed', 'hp2') oder 'audio', 'video',
+        'lyrics', 'cover', 'other'
+    """
+    for suffix, category in ARTIFACT_SUFFIXES:
+        if name.endswith(suffix):
+            return category
+    lower = name.lower()
+    ext = os.path.splitext(lower)[1]
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    if ext in AUDIO_EXTENSIONS:
+        return 'audio'
+    if ext in LYRICS_EXTENSIONS:
+        return 'lyrics'
+    if ext in COVER_EXTENSIONS:
+        return 'cover'
+    return 'other'
+
+
+class FolderIndex:
+    """Index der Dateien eines Ordners, klassifiziert nach Suffix"""
+
+    def __init__(self, folder_path: str):
+        """
+        Initialisiert den Index (gescannt wird erst beim ersten Zugriff)
+
+        Args:
+            folder_path: Zu indizierender Ordner
+        """
+        self.folder_path = folder_path
+        self._files: Optional[Dict[str, str]] = None  # Name -> Kategorie, in Scan-Reihenfolge
+        self.scans = 0
+
+    def refresh(self):
+        """Liest den Ordner neu ein (z.B. nach Schreibzugriffen externer Tools)"""
+        files: Dict[str, str] = {}
+        try:
+            with os.scandir(self.folder_path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        files[entry.name] = classify_file(entry.name)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ordner konnte nicht gelesen werden: {self.folder_path}: {e}")
+        self._files = files
+        self.scans += 1
+
+    def invalidate(self):
+        """Verwirft den Index; der nächste Zugriff liest den Ordner neu ein"""
+        self._files = None
+
+    def _entries(self) -> Dict[str, str]:
+        if self._files is None:
+            self.refresh()
+        return self._files
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.folder_path, name)
+
+    def _name_in_folder(self, path: str) -> Optional[str]:
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.folder_path):
+            return None
+        return os.path.basename(path)
+
+    def names(self) -> List[str]:
+        """Alle Dateinamen im Ordner (Ersatz für os.listdir, nur Dateien)"""
+        return list(self._entries().keys())
+
+    def paths(self) -> List[str]:
+        """Alle Dateipfade im Ordner"""
+        return [self._path(name) for name in self._entries()]
+
+    def by_category(self, category: str) -> List[str]:
+        """Alle Dateipfade einer Kategorie"""
+        return [self._path(name) for name, cat in self._entries().items() if cat == category]
+
+    def first(self, category: str) -> Optional[str]:
+        """Erste Datei einer Kategorie oder None"""
+        for name, cat in self._entries().items():
+            if cat == category:
+                return self._path(name)
+        return None
+
+    def with_suffix(self, suffix: str, ignore_case: bool = False) -> List[str]:
+        """Alle Dateipfade, deren Name auf suffix endet"""
+        if ignore_case:
+            suffix = suffix.lower()
+            return [self._path(name) for name in self._entries() if name.lower().endswith(suffix)]
+        return [self._path(name) for name in self._entries() if name.endswith(suffix)]
+
+    def with_extensions(self, extensions: Iterable[str]) -> List[str]:
+        """Alle Dateipfade mit einer der Endungen (ohne Beachtung der Groß-/Kleinschreibung)"""
+        extensions = tuple(ext.lower() for ext in extensions)
+        return [self._path(name) for name in self._entries() if name.lower().endswith(extensions)]
+
+    def contains(self, path: str) -> bool:
+        name = self._name_in_folder(path)
+        return name is not None and name in self._entries()
+
+    def add(self, path: str):
+        """Trägt eine neu erzeugte Datei ein (ignoriert Ordner und Pfade außerhalb)"""
+        if self._files is None:
+            return
+        name = self._name_in_folder(path)
+        if name is None or not os.path.isfile(path):
+            return
+        self._files[name] = classify_file(name)
+
+    def remove(self, path: str):
+        """Entfernt eine gelöschte Datei aus dem Index"""
+        if self._files is None:
+            return
+        name = self._name_in_folder(path)
+        if name is not None:
+            self._files.pop(name, None)
+
+    def rename(self, old_path: str, new_path: str):
+        """Aktualisiert den Index nach einem Umbenennen"""
+        self.remove(old_path)
+        self.add(new_path)
@@ -1,7 +1,18 @@
 #!/usr/bin/env python3
+import os
+import atexit
 import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
 import requests
 
+# Node-Server, der Status-Updates per WebSocket weiterleitet (überschreibbar per STATUS_SERVER_URL)
+DEFAULT_STATUS_SERVER_URL = 'http://localhost:5000'
+PROCESSING_STATUS_PATH = '/api/songs/processing-status'
+QUEUE_STATUS_PATH = '/api/songs/queue-status'
+
 
 def meta_to_short_dict(meta) -> dict:
     try:
@@ -25,6 +36,134 @@ def log_start(function_name: str, meta) -> None:
     logger.info(f"▶ {function_name} | meta={meta_to_short_dict(meta)}")
 
 
+class StatusNotifier:
+    """Asynchroner Versand von Status-Updates an den Node-Server
+
+    Updates landen in einer begrenzten Warteschlange, die ein einzelner Hintergrund-Thread
+    über eine Keep-Alive-Session abarbeitet. Noch nicht gesendete Updates desselben Songs
+    werden durch das neueste ersetzt; ist die Warteschlange voll, fällt das älteste weg.
+    Aufrufer blockieren dadurch nie auf Netzwerk-I/O.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_pending: Optional[int] = None, timeout: float = 3.0):
+        self.base_url = (base_url or os.getenv('STATUS_SERVER_URL', DEFAULT_STATUS_SERVER_URL)).rstrip('/')
+        if max_pending is None:
+            try:
+                max_pending = int(os.getenv('STATUS_NOTIFY_MAX_PENDING', 256))
+            except ValueError:
+                max_pending = 256
+        self.max_pending = max(1, max_pending)
+        self.timeout = timeout
+
+        self._pending = OrderedDict()  # Schlüssel -> (Pfad, Payload), älteste zuerst
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._thread = None
+        self._session = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def notify(self, key, path: str, payload: dict) -> None:
+        """Reiht ein Update ein (ersetzt ein noch wartendes Update mit gleichem Schlüssel)"""
+        with self._cond:
+            if key in self._pending:
+                self._pending[key] = (path, payload)
+                self.coalesced += 1
+            else:
+                while len(self._pending) >= self.max_pending:
+                    self._pending.popitem(last=False)
+                    self.dropped += 1
+                self._pending[key] = (path, payload)
+            self._ensure_thread()
+            self._cond.notify_all()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name='status-notifier')
+            self._thread.start()
+
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch = list(self._pending.values())
+                self._pending.clear()
+                self._in_flight = len(batch)
+
+            for path, payload in batch:
+                self._post(path, payload)
+
+            with self._cond:
+                self._in_flight = 0
+                self._cond.notify_all()
+
+    def _post(self, path: str, payload: dict):
+        logger = logging.getLogger(__name__)
+        try:
+            response = self._get_session().post(self.base_url + path, json=payload, timeout=self.timeout)
+            response.close()
+            self.sent += 1
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"⚠️ Status-Update an {path} fehlgeschlagen: {e}")
+            # Verbindung verwerfen, die nächste Anfrage baut eine neue auf
+            try:
+                self._session.close()
+            except Exception:
+                pass
+            self._session = None
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wartet, bis alle eingereihten Updates gesendet wurden
+
+        Returns:
+            True wenn die Warteschlange leer ist, False bei Timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def get_status(self) -> dict:
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'sent': self.sent,
+                'coalesced': self.coalesced,
+                'dropped': self.dropped,
+                'failed': self.failed,
+            }
+
+
+# Globale Notifier-Instanz (ein Thread und eine Session pro Prozess)
+_global_status_notifier = None
+_global_status_notifier_lock = threading.Lock()
+
+
+def get_status_notifier() -> StatusNotifier:
+    """Gibt den prozessweiten StatusNotifier zurück"""
+    global _global_status_notifier
+    if _global_status_notifier is None:
+        with _global_status_notifier_lock:
+            if _global_status_notifier is None:
+                _global_status_notifier = StatusNotifier()
+                # Beim Beenden noch wartende Updates kurz ausliefern
+                atexit.register(_global_status_notifier.flush, 2.0)
+    return _global_status_notifier
+
+
 def send_processing_status(meta, status: str) -> None:
     """Sendet den Verarbeitungs-Status an den Node-Server (HTTP), zur Weiterleitung per WebSocket.
 
@@ -45,8 +184,9 @@ def send_processing_status(meta, status: str) -> None:
         if youtube_url:
             payload['youtube_url'] = youtube_url
         logger.info(f"📡 send_processing_status → {payload}")
-        # kleiner Timeout, non-blocking Charakter
-        requests.post('http://localhost:5000/api/songs/processing-status', json=payload, timeout=3)
+        # Asynchron, neuere Updates desselben Songs ersetzen noch nicht gesendete
+        song_key = song_id or youtube_url or (artist, title)
+        get_status_notifier().notify(('processing', song_key), PROCESSING_STATUS_PATH, payload)
     except Exception as e:
         logger.warning(f"⚠️ send_processing_status fehlgeschlagen: {e}")
 
@@ -68,7 +208,7 @@ def send_queue_status(queue_status: dict) -> None:
             'total_jobs': queue_status.get('total_jobs', 0)
         }
         logger.info(f"📡 send_queue_status → {payload}")
-        # kleiner Timeout, non-blocking Charakter
-        requests.post('http://localhost:5000/api/songs/queue-status', json=payload, timeout=3)
+        # Asynchron, nur der jeweils neueste Queue-Status wird gesendet
+        get_status_notifier().notify(('queue',), QUEUE_STATUS_PATH, payload)
     except Exception as e:
         logger.warning(f"⚠️ send_queue_status fehlgeschlagen: {e}")
\ No newline at end of file
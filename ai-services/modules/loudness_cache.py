@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Loudness Cache Module
+Speichert Lautheitsmessungen (Integrated Loudness, True Peak, LRA) pro Datei-Hash und merkt
+sich, welche normalisierten Dateien daraus erzeugt wurden, damit eine erneut ausgelöste
+Normalisierung einer bereits verarbeiteten Bibliothek weder misst noch rendert
+"""
+
+import os
+import re
+import json
+import time
+import math
+import hashlib
+import threading
+import subprocess
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+try:
+    from ..constants.paths import cache_path
+except ImportError:
+    from constants.paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+# Standard-Speicherort (überschreibbar per LOUDNESS_CACHE_DIR)
+DEFAULT_CACHE_DIR = cache_path('loudness')
+
+# Einträge im Datei-Cache (überschreibbar per LOUDNESS_CACHE_MAX_ENTRIES); geprüft alle EVICT_INTERVAL Schreibvorgänge
+DEFAULT_MAX_ENTRIES = 20000
+EVICT_INTERVAL = 256
+
+# Datei-Hashes pro (Pfad, Größe, mtime), damit eine Datei pro Prozess nur einmal gelesen wird
+# (LRU, höchstens HASH_CACHE_SIZE Einträge)
+HASH_CACHE_SIZE = 4096
+_hash_cache: 'OrderedDict[tuple, str]' = OrderedDict()
+_hash_lock = threading.Lock()
+
+
+def file_hash(file_path: str) -> Optional[str]:
+    """SHA-256 des Dateiinhalts (Lesen ist deutlich billiger als Dekodieren)"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    stat_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _hash_lock:
+        if stat_key in _hash_cache:
+            _hash_cache.move_to_end(stat_key)
+            return _hash_cache[stat_key]
+
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError as e:
+        logger.warning(f"Datei-Hash fehlgeschlagen: {file_path}: {e}")
+        return None
+
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_cache[stat_key] = value
+        while len(_hash_cache) > HASH_CACHE_SIZE:
+            _hash_cache.popitem(last=False)
+    return value
+
+
+def measure_loudness(file_path: str) -> Optional[Dict[str, float]]:
+    """
+    Messdurchlauf (loudnorm-Analyse, ohne Ausgabe)
+
+    Returns:
+        Dict mit input_i (LUFS), input_tp (dBTP), input_lra (LU), input_thresh (LUFS)
+        oder None, wenn die Messung fehlschlägt
+    """
+    cmd = [
+        'ffmpeg', '-hide_banner', '-nostdin',
+        '-i', file_path,
+        '-map', '0:a:0',
+        '-af', 'loudnorm=print_format=json',
+        '-f', 'null', '-'
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        logger.warning(f"Lautheitsmessung fehlgeschlagen: {file_path}: {e}")
+        return None
+    # loudnorm schreibt den JSON-Block ans Ende von stderr
+    match = re.search(r'\{[^{}]*"input_i"[^{}]*\}', result.stderr or '')
+    if result.returncode != 0 or not match:
+        logger.warning(f"Lautheitsmessung fehlgeschlagen: {file_path}: {(result.stderr or '')[-300:]}")
+        return None
+    try:
+        data = json.loads(match.group(0))
+        return {key: float(data[key]) for key in ('input_i', 'input_tp', 'input_lra', 'input_thresh')}
+    except (KeyError, ValueError) as e:
+        logger.warning(f"Lautheitsmessung nicht lesbar: {file_path}: {e}")
+        return None
+
+
+class LoudnessCache:
+    """Dateibasierter Cache für Lautheitsmessungen und erzeugte Normalisierungen"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Initialisiert den Cache
+
+        Args:
+            cache_dir: Cache-Ordner (None = LOUDNESS_CACHE_DIR bzw. Standardpfad)
+        """
+        self.cache_dir = cache_dir or os.getenv('LOUDNESS_CACHE_DIR', DEFAULT_CACHE_DIR)
+        try:
+            self.max_entries = int(os.getenv('LOUDNESS_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+        except ValueError:
+            self.max_entries = DEFAULT_MAX_ENTRIES
+        self._writes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # mtime des Eintrags = letzte Nutzung (für die Verdrängung)
+            os.utime(path, None)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, key: str, entry: Dict[str, Any]):
+        path = self._entry_path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        self._writes += 1
+
+    def _evict_if_due(self):
+        with self._lock:
+            due = self._writes >= EVICT_INTERVAL
+            if due:
+                self._writes = 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Entfernt die am längsten nicht genutzten Einträge, bis max_entries eingehalten ist"""
+        try:
+            with os.scandir(self.cache_dir) as it:
+                entries = [(entry.stat().st_mtime, entry.path) for entry in it
+                           if entry.is_file() and entry.name.endswith('.json')]
+        except OSError as e:
+            logger.warning(f"⚠️ Loudness-Cache konnte nicht gelesen werden: {e}")
+            return
+        excess = len(entries) - self.max_entries
+        for _, path in sorted(entries)[:max(0, excess)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_measurement(self, file_path: str) -> Optional[Dict[str, float]]:
+        """Messung aus dem Cache bzw. per Messdurchlauf (wird dann gespeichert)"""
+        key = file_hash(file_path)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._read_entry(key)
+        if entry and entry.get('measurement'):
+            self.hits += 1
+            return entry['measurement']
+
+        self.misses += 1
+        start = time.time()
+        measurement = measure_loudness(file_path)
+        if measurement is None:
+            return None
+        logger.info(f"📏 Lautheit gemessen ({time.time() - start:.1f}s): {os.path.basename(file_path)} "
+                    f"I={measurement['input_i']:.1f} LUFS, TP={measurement['input_tp']:.1f} dBTP, "
+                    f"LRA={measurement['input_lra']:.1f} LU")
+        try:
+            with self._lock:
+                entry = self._read_entry(key) or {}
+                entry.update({'measurement': measurement, 'file': os.path.basename(file_path), 'measured_at': time.time()})
+                self._write_entry(key, entry)
+            self._evict_if_due()
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Lautheitsmessung konnte nicht im Cache gespeichert werden: {e}")
+        return measurement
+
+    @staticmethod
+    def _output_signature(output_path: str) -> Optional[Dict[str, int]]:
+        try:
+            stat = os.stat(output_path)
+        except OSError:
+            return None
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def is_render_current(self, source_path: str, output_path: str, settings: Dict[str, Any]) -> bool:
+        """True, wenn output_path unverändert aus source_path mit settings erzeugt wurde"""
+        key = file_hash(source_path)
+        signature = self._output_signature(output_path)
+        if key is None or signature is None:
+            return False
+        with self._lock:
+            entry = self._read_entry(key) or {}
+        render = entry.get('renders', {}).get(os.path.abspath(output_path))
+        return bool(render) and render.get('settings') == settings and render.get('output') == signature
+
+    def put_render(self, source_path: str, output_path: str, settings: Dict[str, Any]) -> bool:
+        """Merkt sich eine erzeugte Normalisierung (Einstellungen + Signatur der Ausgabe)"""
+        key = file_hash(source_path)
+        signature = self._output_signature(output_path)
+        if key is None or signature is None:
+            return False
+        try:
+            with self._lock:
+                entry = self._read_entry(key) or {}
+                entry.setdefault('renders', {})[os.path.abspath(output_path)] = {
+                    'settings': settings,
+                    'output': signature,
+                    'rendered_at': time.time(),
+                }
+                self._write_entry(key, entry)
+            self._evict_if_due()
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Normalisierung konnte nicht im Cache vermerkt werden: {e}")
+            return False
+
+    def get_status(self) -> Dict[str, Any]:
+        return {'cache_dir': self.cache_dir, 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses}
+
+
+def linear_gain_db(measurement: Dict[str, float], target_i: float, target_tp: float) -> Optional[float]:
+    """
+    Lineare Verstärkung auf target_i, begrenzt durch target_tp (kein Limiter)
+
+    Returns:
+        Verstärkung in dB oder None bei Stille (nicht messbar)
+    """
+    gain = target_i - measurement['input_i']
+    headroom = target_tp - measurement['input_tp']
+    if not math.isfinite(gain):
+        return None
+    if math.isfinite(headroom):
+        gain = min(gain, headroom)
+    return gain
+
+
+# Globale Cache-Instanz
+_global_loudness_cache = None
+_global_loudness_cache_lock = threading.Lock()
+
+
+def get_loudness_cache() -> Optional[LoudnessCache]:
+    """Gibt den prozessweiten Loudness-Cache zurück (None wenn per LOUDNESS_CACHE=0 deaktiviert)"""
+    global _global_loudness_cache
+    if os.getenv('LOUDNESS_CACHE', '1').lower() in ('0', 'false', 'no'):
+        return None
+    if _global_loudness_cache is None:
+        with _global_loudness_cache_lock:
+            if _global_loudness_cache is None:
+                try:
+                    _global_loudness_cache = LoudnessCache()
+                except OSError as e:
+                    logger.warning(f"⚠️ Loudness-Cache nicht verfügbar: {e}")
+                    return None
+    return _global_loudness_cache
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+Media Probe Module
+Gemeinsame ffprobe-Schicht für alle Medien-Abfragen (Audio-Spur vorhanden?, Audio-/Video-Infos,
+Decoder-Vorallokation): typisierte MediaInfo-Objekte, In-Process-LRU und Datei-Cache pro
+(Pfad, Größe, mtime), damit dieselbe Datei pro Job bzw. Bibliotheks-Scan nur einmal geprüft wird
+"""
+
+import os
+import json
+import hashlib
+import threading
+import subprocess
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Optional, Dict, Any, List, Iterable
+
+try:
+    from ..constants.paths import cache_path
+except ImportError:
+    from constants.paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+# Standard-Speicherort (überschreibbar per MEDIA_PROBE_CACHE_DIR)
+DEFAULT_CACHE_DIR = cache_path('media_probe')
+
+# Einträge im Speicher (überschreibbar per MEDIA_PROBE_CACHE_SIZE)
+DEFAULT_MAX_ENTRIES = 2048
+
+# Dateien im Datei-Cache (überschreibbar per MEDIA_PROBE_DISK_ENTRIES); geprüft alle EVICT_INTERVAL Schreibvorgänge
+DEFAULT_MAX_DISK_ENTRIES = 20000
+EVICT_INTERVAL = 256
+
+# Parallele ffprobe-Prozesse beim Ordner-Scan
+DEFAULT_PROBE_WORKERS = 4
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v', '.mpg', '.mpeg')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.opus', '.wma')
+
+
+def _parse_rate(value: Optional[str]) -> float:
+    """ffprobe-Bildrate wie '30000/1001' als float (0 bei ungültigen Werten)"""
+    try:
+        if value and '/' in value:
+            num, den = value.split('/', 1)
+            return float(num) / float(den) if float(den) else 0.0
+        return float(value or 0)
+    except ValueError:
+        return 0.0
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class StreamInfo:
+    """Ein Stream aus der ffprobe-Ausgabe"""
+
+    index: int
+    codec_type: str
+    codec_name: str = ''
+    duration: float = 0.0
+    bit_rate: int = 0
+    sample_rate: int = 0
+    channels: int = 0
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+
+    @classmethod
+    def from_ffprobe(cls, stream: Dict[str, Any]) -> 'StreamInfo':
+        return cls(
+            index=_to_int(stream.get('index')),
+            codec_type=stream.get('codec_type', ''),
+            codec_name=stream.get('codec_name', ''),
+            duration=_to_float(stream.get('duration')),
+            bit_rate=_to_int(stream.get('bit_rate')),
+            sample_rate=_to_int(stream.get('sample_rate')),
+            channels=_to_int(stream.get('channels')),
+            width=_to_int(stream.get('width')),
+            height=_to_int(stream.get('height')),
+            fps=_parse_rate(stream.get('r_frame_rate')),
+        )
+
+
+@dataclass
+class MediaInfo:
+    """Format- und Stream-Informationen einer Mediendatei"""
+
+    path: str
+    format_name: str = ''
+    duration: float = 0.0
+    size: int = 0
+    bit_rate: int = 0
+    streams: List[StreamInfo] = field(default_factory=list)
+
+    @classmethod
+    def from_ffprobe(cls, path: str, data: Dict[str, Any]) -> 'MediaInfo':
+        format_info = data.get('format', {})
+        return cls(
+            path=path,
+            format_name=format_info.get('format_name', ''),
+            duration=_to_float(format_info.get('duration')),
+            size=_to_int(format_info.get('size')),
+            bit_rate=_to_int(format_info.get('bit_rate')),
+            streams=[StreamInfo.from_ffprobe(stream) for stream in data.get('streams', [])],
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MediaInfo':
+        return cls(**{**data, 'streams': [StreamInfo(**stream) for stream in data.get('streams', [])]})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def audio(self) -> Optional[StreamInfo]:
+        """Erster Audio-Stream"""
+        return next((stream for stream in self.streams if stream.codec_type == 'audio'), None)
+
+    @property
+    def video(self) -> Optional[StreamInfo]:
+        """Erster Video-Stream"""
+        return next((stream for stream in self.streams if stream.codec_type == 'video'), None)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    @property
+    def has_video(self) -> bool:
+        return self.video is not None
+
+    @property
+    def audio_duration(self) -> float:
+        """Dauer des ersten Audio-Streams (Format-Dauer, wenn der Stream keine angibt)"""
+        audio = self.audio
+        return audio.duration if audio and audio.duration > 0 else self.duration
+
+
+def run_ffprobe(file_path: str, timeout_seconds: Optional[float] = 30) -> Optional[MediaInfo]:
+    """Ein ffprobe-Lauf (Format + alle Streams) ohne Cache"""
+    cmd = [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        '-show_format',
+        '-show_streams',
+        file_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout_seconds)
+        if result.returncode != 0:
+            logger.debug(f"ffprobe fehlgeschlagen für {file_path}: {result.stderr}")
+            return None
+        return MediaInfo.from_ffprobe(file_path, json.loads(result.stdout or '{}'))
+    except (OSError, ValueError, subprocess.TimeoutExpired) as e:
+        logger.debug(f"ffprobe fehlgeschlagen für {file_path}: {e}")
+        return None
+
+
+class MediaProbe:
+    """ffprobe mit In-Process-LRU und Datei-Cache pro (Pfad, Größe, mtime)"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        """
+        Initialisiert die Probe-Schicht
+
+        Args:
+            cache_dir: Ordner des Datei-Caches (None = MEDIA_PROBE_CACHE_DIR bzw. Standardpfad,
+                       '' = nur im Speicher)
+            max_entries: Einträge im Speicher (None = MEDIA_PROBE_CACHE_SIZE bzw. 2048)
+        """
+        if max_entries is None:
+            try:
+                max_entries = int(os.getenv('MEDIA_PROBE_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+            except ValueError:
+                max_entries = DEFAULT_MAX_ENTRIES
+        self.max_entries = max_entries
+        try:
+            self.max_disk_entries = int(os.getenv('MEDIA_PROBE_DISK_ENTRIES', DEFAULT_MAX_DISK_ENTRIES))
+        except ValueError:
+            self.max_disk_entries = DEFAULT_MAX_DISK_ENTRIES
+        self._stores = 0
+        self.cache_dir = os.getenv('MEDIA_PROBE_CACHE_DIR', DEFAULT_CACHE_DIR) if cache_dir is None else cache_dir
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"⚠️ Media-Probe-Cache-Ordner nicht verfügbar, nur im Speicher: {e}")
+                self.cache_dir = ''
+        self._entries: 'OrderedDict[tuple, MediaInfo]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(file_path: str) -> Optional[tuple]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+    def _entry_path(self, key: tuple) -> str:
+        """Eine Datei pro Pfad: ein neuer Stand (Größe/mtime) ersetzt den veralteten Eintrag"""
+        digest = hashlib.sha1(key[0].encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _remember(self, key: tuple, info: MediaInfo):
+        with self._lock:
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _lookup(self, key: tuple) -> Optional[MediaInfo]:
+        """Speicher, dann Datei-Cache"""
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return info
+
+        if not self.cache_dir:
+            return None
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') != list(key):
+                return None
+            info = MediaInfo.from_dict(data['info'])
+            # mtime des Eintrags = letzte Nutzung (für die Verdrängung)
+            os.utime(entry_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        info.path = key[0]
+        self.disk_hits += 1
+        self._remember(key, info)
+        return info
+
+    def _store(self, key: tuple, info: MediaInfo):
+        self._remember(key, info)
+        if not self.cache_dir:
+            return
+        path = self._entry_path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': list(key), 'info': info.to_dict()}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.debug(f"Media-Probe-Eintrag konnte nicht gespeichert werden: {e}")
+            return
+        with self._lock:
+            self._stores += 1
+            due = self._stores % EVICT_INTERVAL == 0
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Entfernt die am längsten nicht genutzten Dateien, bis max_disk_entries eingehalten ist"""
+        if not self.cache_dir:
+            return
+        try:
+            with os.scandir(self.cache_dir) as it:
+                entries = [(entry.stat().st_mtime, entry.path) for entry in it
+                           if entry.is_file() and entry.name.endswith('.json')]
+        except OSError as e:
+            logger.warning(f"⚠️ Media-Probe-Cache konnte nicht gelesen werden: {e}")
+            return
+        excess = len(entries) - self.max_disk_entries
+        for _, path in sorted(entries)[:max(0, excess)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def probe(self, file_path: str) -> Optional[MediaInfo]:
+        """
+        Media-Informationen einer Datei (aus dem Cache bzw. per ffprobe)
+
+        Returns:
+            MediaInfo oder None, wenn die Datei fehlt oder ffprobe sie nicht lesen kann
+        """
+        key = self._make_key(file_path)
+        if key is None:
+            return None
+        info = self._lookup(key)
+        if info is not None:
+            return info
+
+        with self._lock:
+            self.misses += 1
+        info = run_ffprobe(file_path)
+        if info is not None:
+            self._store(key, info)
+        return info
+
+    def probe_many(self, file_paths: Iterable[str], max_workers: int = DEFAULT_PROBE_WORKERS) -> Dict[str, MediaInfo]:
+        """
+        Prüft mehrere Dateien; Cache-Treffer ohne Prozessstart, der Rest parallel
+
+        Returns:
+            Dict Pfad -> MediaInfo (nicht lesbare Dateien fehlen)
+        """
+        results: Dict[str, MediaInfo] = {}
+        pending = []
+        for file_path in file_paths:
+            key = self._make_key(file_path)
+            if key is None:
+                continue
+            info = self._lookup(key)
+            if info is not None:
+                results[file_path] = info
+            else:
+                pending.append(file_path)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+                for file_path, info in zip(pending, executor.map(self.probe, pending)):
+                    if info is not None:
+                        results[file_path] = info
+        return results
+
+    def probe_folder(self, folder_path: str, extensions: Optional[Iterable[str]] = None,
+                     max_workers: int = DEFAULT_PROBE_WORKERS) -> Dict[str, MediaInfo]:
+        """
+        Prüft alle Mediendateien eines Ordners in einem Aufruf
+
+        Args:
+            folder_path: Ordner (nicht rekursiv)
+            extensions: Dateiendungen (None = Video- und Audio-Endungen)
+
+        Returns:
+            Dict Dateiname -> MediaInfo
+        """
+        suffixes = tuple(ext.lower() for ext in (extensions or VIDEO_EXTENSIONS + AUDIO_EXTENSIONS))
+        try:
+            names = sorted(name for name in os.listdir(folder_path) if name.lower().endswith(suffixes))
+        except OSError as e:
+            logger.warning(f"⚠️ Ordner konnte nicht gelesen werden: {folder_path}: {e}")
+            return {}
+        paths = {os.path.join(folder_path, name): name for name in names}
+        return {paths[path]: info for path, info in self.probe_many(paths, max_workers).items()}
+
+    def invalidate(self, file_path: Optional[str] = None):
+        """Verwirft Einträge im Speicher (None = alle); geänderte Dateien erkennt der Schlüssel selbst"""
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                return
+            path = os.path.abspath(file_path)
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'max_disk_entries': self.max_disk_entries,
+                'cache_dir': self.cache_dir,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+            }
+
+
+# Globale Probe-Instanz
+_global_media_probe = None
+_global_media_probe_lock = threading.Lock()
+
+
+def get_media_probe() -> MediaProbe:
+    """Gibt die prozessweite Probe-Schicht zurück (MEDIA_PROBE_CACHE_DIR='' = nur im Speicher)"""
+    global _global_media_probe
+    if _global_media_probe is None:
+        with _global_media_probe_lock:
+            if _global_media_probe is None:
+                _global_media_probe = MediaProbe()
+    return _global_media_probe
+
+
+def probe_media(file_path: str) -> Optional[MediaInfo]:
+    """Convenience-Funktion: Media-Informationen über die prozessweite Probe-Schicht"""
+    return get_media_probe().probe(file_path)
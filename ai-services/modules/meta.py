@@ -82,6 +82,12 @@ class ProcessingMeta:
     # Konfiguration
     config: Dict[str, Any] = field(default_factory=dict)
     
+    # In-Memory-Stems (AudioBuffer) nach Dateipfad; nur zur Laufzeit, wird nicht serialisiert
+    audio_buffers: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
+    
+    # Ordner-Index (FolderIndex) für die Datei-Suche; nur zur Laufzeit
+    _folder_index: Any = field(default=None, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         """Initialisierung nach der Erstellung"""
         if not self.folder_path:
@@ -90,20 +96,35 @@ class ProcessingMeta:
         # Erstelle Ordner falls er nicht existiert
         os.makedirs(self.folder_path, exist_ok=True)
     
+    @property
+    def folder_index(self):
+        """Index der Dateien in folder_path (wird beim ersten Zugriff gescannt)"""
+        if self._folder_index is None or self._folder_index.folder_path != self.folder_path:
+            from .folder_index import FolderIndex
+            self._folder_index = FolderIndex(self.folder_path)
+        return self._folder_index
+    
+    def _index_file(self, file_path: str):
+        if self._folder_index is not None and self._folder_index.folder_path == self.folder_path:
+            self._folder_index.add(file_path)
+    
     def add_input_file(self, file_path: str):
         """Fügt eine Eingabedatei hinzu"""
         if file_path not in self.input_files:
             self.input_files.append(file_path)
+        self._index_file(file_path)
     
     def add_output_file(self, file_path: str):
         """Fügt eine Ausgabedatei hinzu"""
         if file_path not in self.output_files:
             self.output_files.append(file_path)
+        self._index_file(file_path)
     
     def add_temp_file(self, file_path: str):
         """Fügt eine temporäre Datei hinzu"""
         if file_path not in self.temp_files:
             self.temp_files.append(file_path)
+        self._index_file(file_path)
     
     def add_keep_file(self, file_path: str):
         """Fügt eine zu behaltende Datei hinzu"""
@@ -112,6 +133,9 @@ class ProcessingMeta:
     
     def mark_step_completed(self, step_name: str):
         """Markiert einen Schritt als abgeschlossen"""
+        # Ordner nach jedem Schritt einmal neu einlesen (fängt Dateien externer Tools ab)
+        if self._folder_index is not None:
+            self._folder_index.invalidate()
         if step_name not in self.steps_completed:
             self.steps_completed.append(step_name)
         if step_name in self.steps_failed:
@@ -119,6 +143,8 @@ class ProcessingMeta:
     
     def mark_step_failed(self, step_name: str):
         """Markiert einen Schritt als fehlgeschlagen"""
+        if self._folder_index is not None:
+            self._folder_index.invalidate()
         if step_name not in self.steps_failed:
             self.steps_failed.append(step_name)
         if step_name in self.steps_completed:
@@ -144,6 +170,23 @@ class ProcessingMeta:
         """Holt Metadaten"""
         return self.metadata.get(key, default)
     
+    def set_audio_buffer(self, buffer: Any):
+        """Hinterlegt ein dekodiertes Signal (AudioBuffer) für die Datei buffer.path"""
+        if buffer is not None and buffer.path:
+            self.audio_buffers[os.path.abspath(buffer.path)] = buffer
+    
+    def get_audio_buffer(self, file_path: Optional[str]) -> Optional[Any]:
+        """Holt das In-Memory-Signal zu einer Datei (None, falls nicht vorhanden)"""
+        if not file_path:
+            return None
+        return self.audio_buffers.get(os.path.abspath(file_path))
+    
+    def clear_audio_buffers(self):
+        """Gibt alle In-Memory-Signale frei (inkl. dekodierter Dateien des Job-Ordners)"""
+        self.audio_buffers.clear()
+        from .audio_decoder import get_audio_decoder
+        get_audio_decoder().release(self.folder_path)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Konvertiert das Objekt zu einem Dictionary"""
         return {
@@ -163,7 +206,9 @@ class ProcessingMeta:
             'steps_completed': self.steps_completed,
             'steps_failed': self.steps_failed,
             'metadata': self.metadata,
-            'config': self.config
+            'config': self.config,
+            'base_filename': self.base_filename,
+            'input_audio_file': self.input_audio_file
         }
     
     @classmethod
@@ -190,6 +235,7 @@ class ProcessingMeta:
         meta.metadata = data.get('metadata', {})
         meta.config = data.get('config', {})
         meta.base_filename = data.get('base_filename')
+        meta.input_audio_file = data.get('input_audio_file')
         
         return meta
 
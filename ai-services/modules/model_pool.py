@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Model Pool Module
+Prozessweites Register für UVR5-Modelle (AudioPre/AudioPreDeEcho), damit
+Checkpoints nur einmal geladen und zwischen Jobs wiederverwendet werden
+"""
+
+import os
+import sys
+import threading
+import logging
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Speicherbudget für geladene Modelle in MB (0 = unbegrenzt)
+DEFAULT_POOL_BUDGET_MB = 2048
+
+
+def _ensure_uvr5_path():
+    """Stellt sicher, dass uvr5/ und uvr5/lib_v5 importierbar sind"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    uvr5_path = os.path.abspath(os.path.join(current_dir, '..', 'uvr5'))
+    lib_v5_path = os.path.join(uvr5_path, 'lib_v5')
+    for path in (lib_v5_path, uvr5_path):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _estimate_model_bytes(instance) -> int:
+    """Schätzt den Speicherbedarf eines geladenen Modells anhand seiner Parameter/Buffer"""
+    try:
+        model = getattr(instance, 'model', None)
+        if model is None:
+            return 0
+        # ONNX-Backend: Größe der .onnx-Datei
+        if getattr(model, 'size_bytes', None) is not None:
+            return model.size_bytes
+        total = 0
+        for tensor in list(model.parameters()) + list(model.buffers()):
+            total += tensor.numel() * tensor.element_size()
+        return total
+    except Exception:
+        return 0
+
+
+class _PoolEntry:
+    """Ein geladenes Modell inkl. Lock für exklusive Nutzung"""
+
+    def __init__(self, instance, size_bytes: int):
+        self.instance = instance
+        self.size_bytes = size_bytes
+        self.lock = threading.Lock()
+        self.in_use = 0
+
+
+class UVR5ModelPool:
+    """LRU-Pool für UVR5-Modelle mit Speicherbudget"""
+
+    def __init__(self, budget_mb: Optional[float] = None):
+        """
+        Initialisiert den Modell-Pool
+
+        Args:
+            budget_mb: Speicherbudget in MB (None = aus UVR5_MODEL_POOL_MB, 0 = unbegrenzt)
+        """
+        if budget_mb is None:
+            try:
+                budget_mb = float(os.getenv('UVR5_MODEL_POOL_MB', DEFAULT_POOL_BUDGET_MB))
+            except ValueError:
+                budget_mb = DEFAULT_POOL_BUDGET_MB
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self._entries: 'OrderedDict[Tuple, _PoolEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Tuple, threading.Lock] = {}
+        # Schlüssel mit ONNX-Backend, deren Laden auf PyTorch zurückgefallen ist -> PyTorch-Schlüssel
+        self._fallbacks: Dict[Tuple, Tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _make_key(kind: str, model_path: str, device, is_half: bool, backend: Optional[str] = None) -> Tuple:
+        backend = (backend or os.getenv('UVR5_VR_BACKEND', 'torch')).lower()
+        return (kind, os.path.abspath(model_path), str(device), bool(is_half), backend)
+
+    def _load(self, kind: str, model_path: str, agg: int, device, is_half: bool, backend: str):
+        """Lädt ein Modell von Platte (teurer Pfad: torch.load + load_state_dict + .to(device))"""
+        _ensure_uvr5_path()
+        from vr import AudioPre, AudioPreDeEcho
+
+        cls = AudioPreDeEcho if kind == 'AudioPreDeEcho' else AudioPre
+        logger.info(f"Lade UVR5-Modell in Pool: {os.path.basename(model_path)} ({kind}, device={device}, half={is_half}, backend={backend})")
+        return cls(agg=agg, model_path=model_path, device=device, is_half=is_half, backend=backend)
+
+    def _evict_if_needed(self):
+        """Entfernt die am längsten ungenutzten Modelle, bis das Budget eingehalten ist"""
+        if self.budget_bytes <= 0:
+            return
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        for key in list(self._entries.keys()):
+            if total <= self.budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.in_use > 0:
+                continue
+            del self._entries[key]
+            total -= entry.size_bytes
+            logger.info(f"♻️ UVR5-Modell aus Pool entfernt (LRU): {os.path.basename(key[1])} ({entry.size_bytes / 1024 / 1024:.1f} MB)")
+
+    def _get_entry(self, kind: str, model_path: str, agg: int, device, is_half: bool,
+                   backend: Optional[str] = None) -> _PoolEntry:
+        key = self._make_key(kind, model_path, device, is_half, backend)
+        with self._lock:
+            key = self._fallbacks.get(key, key)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Laden außerhalb des Pool-Locks, damit andere Modelle parallel verfügbar bleiben
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry
+            instance = self._load(kind, model_path, agg, device, is_half, key[4])
+            entry = _PoolEntry(instance, _estimate_model_bytes(instance))
+            with self._lock:
+                self.misses += 1
+                actual_backend = getattr(instance, 'backend', key[4])
+                if actual_backend != key[4]:
+                    # ONNX nicht nutzbar (CUDA, fehlendes Modell): unter dem PyTorch-Schlüssel führen,
+                    # damit dasselbe Modell nicht ein zweites Mal unter dem ONNX-Schlüssel im Pool liegt
+                    fallback_key = key[:4] + (actual_backend,)
+                    self._fallbacks[key] = fallback_key
+                    key = fallback_key
+                    existing = self._entries.get(key)
+                    if existing is not None:
+                        self._entries.move_to_end(key)
+                        return existing
+                self._entries[key] = entry
+                self._evict_if_needed()
+            return entry
+
+    @contextmanager
+    def acquire(self, model_path: str, agg: int = 10, device='cpu', is_half: bool = False, kind: str = 'AudioPre',
+                backend: Optional[str] = None):
+        """
+        Liefert eine geteilte Modell-Instanz für die exklusive Dauer des with-Blocks
+
+        Args:
+            model_path: Pfad zur .pth-Datei
+            agg: Aggressivität (wird pro Nutzung gesetzt)
+            device: Torch-Device
+            is_half: Half-Precision verwenden
+            kind: 'AudioPre' oder 'AudioPreDeEcho'
+            backend: 'torch', 'onnx' oder 'onnx_int8' (None = UVR5_VR_BACKEND)
+        """
+        entry = self._get_entry(kind, model_path, agg, device, is_half, backend)
+        with self._lock:
+            entry.in_use += 1
+        try:
+            with entry.lock:
+                entry.instance.data['agg'] = agg
+                yield entry.instance
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                self._evict_if_needed()
+
+    def get(self, model_path: str, agg: int = 10, device='cpu', is_half: bool = False, kind: str = 'AudioPre',
+            backend: Optional[str] = None):
+        """
+        Liefert eine geteilte Modell-Instanz (ohne exklusiven Lock)
+
+        Nur zum Laden bzw. Inspizieren: agg wird hier nicht gesetzt, da eine parallele
+        Nutzung über acquire() sonst mitten im Lauf umgestellt würde. Inferenz immer
+        über acquire() ausführen.
+        """
+        entry = self._get_entry(kind, model_path, agg, device, is_half, backend)
+        return entry.instance
+
+    def preload(self, model_path: str, agg: int = 10, device='cpu', is_half: bool = False, kind: str = 'AudioPre',
+                backend: Optional[str] = None) -> bool:
+        """Lädt ein Modell vorab in den Pool (z.B. beim Serverstart)"""
+        try:
+            self._get_entry(kind, model_path, agg, device, is_half, backend)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ UVR5-Modell konnte nicht vorgeladen werden: {e}")
+            return False
+
+    def clear(self):
+        """Entfernt alle ungenutzten Modelle aus dem Pool"""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.in_use == 0]:
+                del self._entries[key]
+            # ONNX-Modelle könnten inzwischen exportiert sein: Fallbacks neu prüfen
+            self._fallbacks.clear()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Gibt den aktuellen Pool-Status zurück"""
+        with self._lock:
+            return {
+                'models': [
+                    {
+                        'kind': key[0],
+                        'model': os.path.basename(key[1]),
+                        'device': key[2],
+                        'is_half': key[3],
+                        'backend': getattr(entry.instance, 'backend', key[4]),
+                        'size_mb': round(entry.size_bytes / 1024 / 1024, 1),
+                        'in_use': entry.in_use > 0,
+                    }
+                    for key, entry in self._entries.items()
+                ],
+                'total_mb': round(sum(e.size_bytes for e in self._entries.values()) / 1024 / 1024, 1),
+                'budget_mb': round(self.budget_bytes / 1024 / 1024, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Globale Pool-Instanz
+_global_model_pool = None
+_global_model_pool_lock = threading.Lock()
+
+
+def get_uvr5_model_pool() -> UVR5ModelPool:
+    """Gibt den prozessweiten UVR5-Modell-Pool zurück"""
+    global _global_model_pool
+    if _global_model_pool is None:
+        with _global_model_pool_lock:
+            if _global_model_pool is None:
+                _global_model_pool = UVR5ModelPool()
+    return _global_model_pool
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Stem Cache Module
+Inhaltsadressierter Cache für Separations- und Dereverb-Ergebnisse: Schlüssel ist ein
+Hash des dekodierten Eingangs-Audios plus Modell-Konfiguration, damit wiederholte
+Anfragen für denselben Song die UVR5-Inferenz überspringen
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import subprocess
+import logging
+from collections import OrderedDict
+from typing import Optional, Dict, Any
+
+try:
+    from ..constants.paths import cache_path
+except ImportError:
+    from constants.paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+# Standard-Speicherort (überschreibbar per STEM_CACHE_DIR)
+DEFAULT_CACHE_DIR = cache_path('stems')
+# Standard-Größenlimit in GB (überschreibbar per STEM_CACHE_MAX_GB)
+DEFAULT_MAX_GB = 20.0
+
+MODELPARAMS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'uvr5', 'lib_v5', 'modelparams')
+
+ENTRY_INFO_FILE = 'entry.json'
+
+# Fingerprints pro (Pfad, Größe, mtime), damit eine Datei pro Prozess nur einmal dekodiert wird
+# (LRU, höchstens FINGERPRINT_CACHE_SIZE Einträge)
+FINGERPRINT_CACHE_SIZE = 1024
+_fingerprint_cache: 'OrderedDict[tuple, str]' = OrderedDict()
+_fingerprint_lock = threading.Lock()
+
+
+def read_modelparams(name: str) -> Optional[Dict[str, Any]]:
+    """Liest eine UVR5-modelparams-Datei (z.B. '4band_v2') für den Cache-Schlüssel"""
+    try:
+        with open(os.path.join(MODELPARAMS_DIR, f"{name}.json"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"modelparams '{name}' konnten nicht gelesen werden: {e}")
+        return None
+
+
+def uvr5_resample_profile() -> str:
+    """Effektives Resampling-Profil der VR-Inferenz (UVR5_RESAMPLE_PROFILE bzw. Standardprofil)"""
+    try:
+        from .model_pool import _ensure_uvr5_path
+    except ImportError:
+        from modules.model_pool import _ensure_uvr5_path
+    _ensure_uvr5_path()
+    from lib_v5.resampling import DEFAULT_RESAMPLE_PROFILE
+    # Die Pools setzen kein data["resample_profile"], es gilt also wie in get_resampler() die Umgebung
+    return os.getenv('UVR5_RESAMPLE_PROFILE', DEFAULT_RESAMPLE_PROFILE)
+
+
+def uvr5_chunking() -> Dict[str, float]:
+    """Effektive Abschnitts-Einstellungen der VR-Inferenz (UVR5_CHUNK_SECONDS/_OVERLAP/_MIN_DURATION)"""
+    try:
+        from .model_pool import _ensure_uvr5_path
+    except ImportError:
+        from modules.model_pool import _ensure_uvr5_path
+    _ensure_uvr5_path()
+    from vr import chunk_settings
+    chunk_seconds, overlap, min_duration = chunk_settings()
+    return {'seconds': chunk_seconds, 'overlap': overlap, 'min_duration': min_duration}
+
+
+def fingerprint_audio(file_path: str) -> Optional[str]:
+    """
+    Hash des dekodierten Audio-Inhalts (unabhängig von Container, Tags und Dateiname)
+
+    Dekodiert per ffmpeg nach 44.1 kHz Stereo s16le und hasht den PCM-Strom.
+
+    Returns:
+        SHA-256 als Hex-String oder None, wenn die Datei nicht dekodiert werden konnte
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    stat_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime)
+    with _fingerprint_lock:
+        if stat_key in _fingerprint_cache:
+            _fingerprint_cache.move_to_end(stat_key)
+            return _fingerprint_cache[stat_key]
+
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-i', file_path,
+        '-map', '0:a:0',
+        '-ac', '2', '-ar', '44100',
+        '-f', 's16le', 'pipe:1'
+    ]
+    digest = hashlib.sha256()
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        while True:
+            chunk = process.stdout.read(1 << 20)
+            if not chunk:
+                break
+            digest.update(chunk)
+        if process.wait() != 0:
+            logger.warning(f"Audio-Fingerprint fehlgeschlagen (ffmpeg): {file_path}")
+            return None
+    except Exception as e:
+        logger.warning(f"Audio-Fingerprint fehlgeschlagen: {file_path}: {e}")
+        return None
+
+    fingerprint = digest.hexdigest()
+    with _fingerprint_lock:
+        _fingerprint_cache[stat_key] = fingerprint
+        while len(_fingerprint_cache) > FINGERPRINT_CACHE_SIZE:
+            _fingerprint_cache.popitem(last=False)
+    return fingerprint
+
+
+def fingerprint_samples(buffer) -> str:
+    """
+    Hash eines bereits dekodierten Signals (AudioBuffer), ohne erneuten ffmpeg-Lauf
+
+    Für Signale aus dem ffmpeg-Graph der Separation, die ohnehin dekodiert werden.
+
+    Returns:
+        SHA-256 als Hex-String (eigener Namensraum, kollidiert nicht mit fingerprint_audio)
+    """
+    import numpy as np
+    samples = np.ascontiguousarray(buffer.samples, dtype=np.float32)
+    digest = hashlib.sha256(f"pcm:{buffer.sample_rate}:{samples.shape}".encode('utf-8'))
+    digest.update(samples)
+    return digest.hexdigest()
+
+
+class StemCache:
+    """Dateibasierter Stem-Cache mit Größenlimit und LRU-Verdrängung"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Initialisiert den Cache
+
+        Args:
+            cache_dir: Cache-Ordner (None = STEM_CACHE_DIR bzw. Standardpfad)
+            max_bytes: Größenlimit in Bytes (None = STEM_CACHE_MAX_GB bzw. 20 GB)
+        """
+        self.cache_dir = cache_dir or os.getenv('STEM_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            try:
+                max_gb = float(os.getenv('STEM_CACHE_MAX_GB', DEFAULT_MAX_GB))
+            except ValueError:
+                max_gb = DEFAULT_MAX_GB
+            max_bytes = int(max_gb * 1024 ** 3)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(source_key: str, config: Dict[str, Any]) -> str:
+        """Kombiniert Audio-Fingerprint (oder vorgelagerten Schlüssel) und Modell-Konfiguration"""
+        payload = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(f"{source_key}\n{payload}".encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """
+        Liefert die gespeicherten Stems eines Eintrags
+
+        Returns:
+            Dict Stem-Name -> Pfad im Cache oder None bei Miss
+        """
+        entry_dir = self._entry_dir(key)
+        info_path = os.path.join(entry_dir, ENTRY_INFO_FILE)
+        try:
+            with open(info_path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            files = {name: os.path.join(entry_dir, name) for name in info.get('files', [])}
+            if not files or not all(os.path.isfile(p) for p in files.values()):
+                raise FileNotFoundError(entry_dir)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Zuletzt genutzt = mtime der Info-Datei (LRU)
+        try:
+            os.utime(info_path, None)
+        except OSError:
+            pass
+        self.hits += 1
+        return files
+
+    def restore(self, key: str, targets: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Kopiert gespeicherte Stems an ihre Zielpfade
+
+        Args:
+            key: Cache-Schlüssel
+            targets: Stem-Name -> Zielpfad
+
+        Returns:
+            Dict Stem-Name -> Zielpfad der kopierten Stems oder None bei Miss
+        """
+        files = self.get(key)
+        if files is None:
+            return None
+        restored = {}
+        try:
+            for name, target in targets.items():
+                if name in files:
+                    shutil.copyfile(files[name], target)
+                    restored[name] = target
+        except OSError as e:
+            logger.warning(f"⚠️ Stems aus dem Cache konnten nicht kopiert werden: {e}")
+            return None
+        return restored or None
+
+    def put(self, key: str, files: Dict[str, str]) -> bool:
+        """
+        Speichert Stems unter einem Schlüssel (vorhandene Einträge bleiben unverändert)
+
+        Args:
+            key: Cache-Schlüssel
+            files: Stem-Name -> Quelldatei (nicht vorhandene Dateien werden übersprungen)
+
+        Returns:
+            True wenn der Eintrag gespeichert wurde oder bereits existierte
+        """
+        files = {name: path for name, path in files.items() if path and os.path.isfile(path)}
+        if not files:
+            return False
+        entry_dir = self._entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return True
+
+        # In einen temporären Ordner schreiben und atomar umbenennen (parallele Jobs)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.makedirs(tmp_dir, exist_ok=True)
+            for name, path in files.items():
+                shutil.copyfile(path, os.path.join(tmp_dir, name))
+            with open(os.path.join(tmp_dir, ENTRY_INFO_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'files': sorted(files), 'created_at': time.time()}, f)
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if os.path.isdir(entry_dir):
+                return True
+            logger.warning(f"⚠️ Stems konnten nicht im Cache gespeichert werden: {e}")
+            return False
+
+        logger.info(f"💾 Stems im Cache gespeichert: {key[:12]} ({', '.join(sorted(files))})")
+        self.evict()
+        return True
+
+    def _entries(self):
+        """Liefert (letzte Nutzung, Größe, Ordner) für alle vollständigen Einträge"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.is_dir() or '.tmp-' in entry.name:
+                    continue
+                try:
+                    last_used = os.stat(os.path.join(entry.path, ENTRY_INFO_FILE)).st_mtime
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                except OSError:
+                    continue
+                entries.append((last_used, size, entry.path))
+        return entries
+
+    def evict(self):
+        """Entfernt die am längsten nicht genutzten Einträge, bis das Größenlimit eingehalten ist"""
+        with self._lock:
+            try:
+                entries = self._entries()
+            except OSError as e:
+                logger.warning(f"⚠️ Stem-Cache konnte nicht gelesen werden: {e}")
+                return
+            total = sum(size for _, size, _ in entries)
+            for last_used, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                logger.info(f"🗑️ Stem-Cache-Eintrag verdrängt: {os.path.basename(path)[:12]}")
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            try:
+                entries = self._entries()
+            except OSError:
+                entries = []
+        return {
+            'cache_dir': self.cache_dir,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# Globale Cache-Instanz
+_global_stem_cache = None
+_global_stem_cache_lock = threading.Lock()
+
+
+def get_stem_cache() -> Optional[StemCache]:
+    """Gibt den prozessweiten Stem-Cache zurück (None wenn per STEM_CACHE=0 deaktiviert)"""
+    global _global_stem_cache
+    if os.getenv('STEM_CACHE', '1').lower() in ('0', 'false', 'no'):
+        return None
+    if _global_stem_cache is None:
+        with _global_stem_cache_lock:
+            if _global_stem_cache is None:
+                try:
+                    _global_stem_cache = StemCache()
+                except OSError as e:
+                    logger.warning(f"⚠️ Stem-Cache nicht verfügbar: {e}")
+                    return None
+    return _global_stem_cache
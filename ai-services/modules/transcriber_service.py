@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Transcriber Service Module
+Prozessweit geteilter Whisper-Transkribierer: Vorladen beim Serverstart,
+Ladezustand für /health und optionales Entladen nach Leerlauf
+"""
+
+import os
+import gc
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Optional, Dict, Any
+
+from .transcription import AudioTranscriber
+
+logger = logging.getLogger(__name__)
+
+# Prüfintervall für das Entladen nach Leerlauf in Sekunden
+IDLE_CHECK_INTERVAL = 30
+
+
+class TranscriberService:
+    """Verwaltet genau eine AudioTranscriber-Instanz samt geladenem Whisper-Modell"""
+
+    STATE_UNLOADED = 'unloaded'
+    STATE_LOADING = 'loading'
+    STATE_READY = 'ready'
+    STATE_ERROR = 'error'
+
+    def __init__(self, model_name: Optional[str] = None, idle_unload_seconds: Optional[float] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        """
+        Initialisiert den Service
+
+        Args:
+            model_name: Whisper-Modell (None = WHISPER_MODEL bzw. Modell des Transkriptions-Profils)
+            idle_unload_seconds: Modell nach so vielen Sekunden ohne Nutzung entladen
+                                 (None = WHISPER_IDLE_UNLOAD_SECONDS, 0 = nie)
+            config: Weitere Konfiguration für AudioTranscriber (z.B. 'profile')
+        """
+        config = dict(config or {})
+        model_name = model_name or os.getenv('WHISPER_MODEL')
+        if model_name:
+            config['model'] = model_name
+        if idle_unload_seconds is None:
+            try:
+                idle_unload_seconds = float(os.getenv('WHISPER_IDLE_UNLOAD_SECONDS', 0))
+            except ValueError:
+                idle_unload_seconds = 0
+        self.idle_unload_seconds = idle_unload_seconds
+
+        self.transcriber = AudioTranscriber(config)
+        self.transcriber.whisper_guard = self._whisper_session
+        self.settings = self.transcriber.resolve_settings()
+        self.model_name = self.settings['model']
+        self.state = self.STATE_UNLOADED
+        self.error = None
+        self.load_seconds = None
+        self.last_used = None
+        self.in_use = 0
+
+        # Exklusive Nutzung: ein Whisper-Modell transkribiert nicht parallel
+        self._use_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._reaper_thread = None
+        self._stop_event = threading.Event()
+
+    def _set_state(self, state: str, error: Optional[str] = None):
+        with self._state_lock:
+            self.state = state
+            self.error = error
+
+    def ensure_loaded(self):
+        """Lädt das Modell, falls es noch nicht geladen ist (blockierend)"""
+        with self._load_lock:
+            if (self.transcriber.model is not None and self.transcriber.model_name == self.model_name
+                    and self.transcriber.compute_type == self.settings['compute_type']):
+                return
+            self._set_state(self.STATE_LOADING)
+            start = time.time()
+            try:
+                self.transcriber._load_model(self.model_name)
+            except Exception as e:
+                self._set_state(self.STATE_ERROR, str(e))
+                raise
+            self.load_seconds = round(time.time() - start, 1)
+            self.last_used = time.time()
+            self._set_state(self.STATE_READY)
+            logger.info(f"✅ Whisper-Modell '{self.model_name}' bereit ({self.load_seconds}s)")
+        self._start_reaper()
+
+    def preload(self, background: bool = True) -> bool:
+        """
+        Lädt das Modell vorab (z.B. beim Serverstart)
+
+        Args:
+            background: In einem Hintergrund-Thread laden statt blockierend
+
+        Returns:
+            True wenn geladen bzw. Laden gestartet, False bei Fehler
+        """
+        def _load():
+            try:
+                self.ensure_loaded()
+            except Exception as e:
+                logger.warning(f"⚠️ Whisper-Modell konnte nicht vorgeladen werden: {e}")
+
+        if background:
+            logger.info(f"🔄 Lade Whisper-Modell '{self.model_name}' im Hintergrund vor")
+            threading.Thread(target=_load, daemon=True, name='whisper-preload').start()
+            return True
+        _load()
+        return self.state == self.STATE_READY
+
+    @contextmanager
+    def _whisper_session(self):
+        """Exklusiver Zugriff auf das (bei Bedarf geladene) Modell für einen Whisper-Lauf"""
+        with self._state_lock:
+            self.in_use += 1
+        try:
+            with self._use_lock:
+                self.ensure_loaded()
+                try:
+                    yield
+                finally:
+                    self.last_used = time.time()
+        finally:
+            with self._state_lock:
+                self.in_use -= 1
+
+    @contextmanager
+    def acquire(self):
+        """Liefert den geladenen Transkribierer für die exklusive Dauer des with-Blocks"""
+        with self._whisper_session():
+            yield self.transcriber
+
+    def process_meta(self, meta) -> bool:
+        """
+        Transkribiert ein Meta-Objekt mit dem geteilten Modell
+
+        Der Transkript-Cache wird ohne Lock und ohne geladenes Modell geprüft; nur der
+        eigentliche Whisper-Lauf wartet auf das Modell (whisper_guard).
+        """
+        return self.transcriber.process_meta(meta)
+
+    def unload(self) -> bool:
+        """Entlädt das Modell, sofern es gerade nicht genutzt wird"""
+        if not self._use_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._load_lock:
+                if self.transcriber.model is None:
+                    return False
+                logger.info(f"♻️ Entlade Whisper-Modell '{self.model_name}' nach Leerlauf")
+                self.transcriber.model = None
+                self.transcriber.model_name = None
+                gc.collect()
+                try:
+                    import torch
+                    if torch.cuda.is_available():
+                        torch.cuda.empty_cache()
+                except Exception:
+                    pass
+                self._set_state(self.STATE_UNLOADED)
+                return True
+        finally:
+            self._use_lock.release()
+
+    def _start_reaper(self):
+        """Startet den Leerlauf-Überwachungs-Thread (nur wenn idle_unload_seconds > 0)"""
+        if self.idle_unload_seconds <= 0:
+            return
+        if self._reaper_thread is not None and self._reaper_thread.is_alive():
+            return
+        self._reaper_thread = threading.Thread(target=self._reaper_loop, daemon=True, name='whisper-idle-unload')
+        self._reaper_thread.start()
+
+    def _reaper_loop(self):
+        interval = min(IDLE_CHECK_INTERVAL, self.idle_unload_seconds)
+        while not self._stop_event.wait(interval):
+            if self.state != self.STATE_READY or self.in_use > 0 or self.last_used is None:
+                continue
+            if time.time() - self.last_used >= self.idle_unload_seconds:
+                self.unload()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Gibt den Ladezustand für /health zurück"""
+        with self._state_lock:
+            return {
+                'model': self.model_name,
+                'profile': self.settings['profile'],
+                'device': self.settings['device'],
+                'compute_type': self.settings['compute_type'],
+                'state': self.state,
+                'error': self.error,
+                'load_seconds': self.load_seconds,
+                'in_use': self.in_use > 0,
+                'idle_seconds': round(time.time() - self.last_used, 1) if self.last_used else None,
+                'idle_unload_seconds': self.idle_unload_seconds,
+            }
+
+
+# Globale Service-Instanz, um das Modell im Speicher zu halten
+# Das verhindert, dass das Modell beim Garbage Collection gelöscht wird und Abstürze verursacht
+_global_transcriber_service = None
+_global_transcriber_service_lock = threading.Lock()
+
+
+def get_transcriber_service() -> TranscriberService:
+    """Gibt den prozessweiten Transcriber-Service zurück"""
+    global _global_transcriber_service
+    if _global_transcriber_service is None:
+        with _global_transcriber_service_lock:
+            if _global_transcriber_service is None:
+                _global_transcriber_service = TranscriberService()
+    return _global_transcriber_service
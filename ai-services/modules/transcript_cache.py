@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Transcript Cache Module
+Speichert rohe Whisper-Ergebnisse (Segmente + Wort-Zeitstempel) pro Vocals-Fingerprint und
+Modell-Konfiguration, damit UltraStar-Dateien ohne erneute Transkription neu erzeugt werden können
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Optional, Dict, Any
+
+from .stem_cache import StemCache, fingerprint_audio
+
+try:
+    from ..constants.paths import cache_path
+except ImportError:
+    from constants.paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+# Standard-Speicherort (überschreibbar per TRANSCRIPT_CACHE_DIR)
+DEFAULT_CACHE_DIR = cache_path('transcripts')
+# Standard-Größenlimit in MB (überschreibbar per TRANSCRIPT_CACHE_MAX_MB)
+DEFAULT_MAX_MB = 512.0
+
+# Zuordnung Song-Ordner -> zuletzt gespeicherter Eintrag (für das Re-Render ohne Vocals-Datei)
+SONG_INDEX_FILE = 'songs.json'
+
+# Auflösung der gespeicherten Lautstärke-Hüllkurve in Sekunden
+VOLUME_ENVELOPE_STEP = 0.01
+
+
+def compute_volume_envelope(audio_buffer) -> Dict[str, Any]:
+    """
+    Signalenergie pro 10-ms-Block als kompakte Grundlage für die Lautstärke-Filterung
+
+    Returns:
+        Dict mit sample_rate, channels, samples_per_step und energy (Summe der
+        quadrierten Samples aller Kanäle pro Block)
+    """
+    import numpy as np
+    samples = audio_buffer.samples.astype(np.float64)
+    step = max(1, int(round(audio_buffer.sample_rate * VOLUME_ENVELOPE_STEP)))
+    energy = np.sum(samples * samples, axis=0)
+    pad = (-len(energy)) % step
+    if pad:
+        energy = np.concatenate((energy, np.zeros(pad)))
+    blocks = energy.reshape(-1, step).sum(axis=1)
+    return {
+        'sample_rate': audio_buffer.sample_rate,
+        'channels': samples.shape[0],
+        'samples_per_step': step,
+        'energy': [float(f"{value:.6g}") for value in blocks],
+    }
+
+
+class TranscriptCache:
+    """Dateibasierter Cache für rohe Transkriptions-Ergebnisse"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Initialisiert den Cache
+
+        Args:
+            cache_dir: Cache-Ordner (None = TRANSCRIPT_CACHE_DIR bzw. Standardpfad)
+            max_bytes: Größenlimit in Bytes (None = TRANSCRIPT_CACHE_MAX_MB bzw. 512 MB)
+        """
+        self.cache_dir = cache_dir or os.getenv('TRANSCRIPT_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            try:
+                max_mb = float(os.getenv('TRANSCRIPT_CACHE_MAX_MB', DEFAULT_MAX_MB))
+            except ValueError:
+                max_mb = DEFAULT_MAX_MB
+            max_bytes = int(max_mb * 1024 ** 2)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, vocals_path: str, settings: Dict[str, Any]) -> Optional[str]:
+        """
+        Schlüssel aus dem Fingerprint der Vocals und den Transkriptions-Einstellungen
+
+        Returns:
+            Schlüssel oder None, wenn die Vocals nicht dekodiert werden konnten
+        """
+        fingerprint = fingerprint_audio(vocals_path)
+        if fingerprint is None:
+            return None
+        return StemCache.make_key(fingerprint, {'stage': 'transcription', **settings})
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write_json(self, path: str, data: Any):
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Lädt einen Eintrag
+
+        Returns:
+            Dict mit 'result' (rohes Whisper-Ergebnis), 'volume_envelope', 'settings',
+            'base_filename' oder None bei Miss
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            # mtime des Eintrags = letzte Nutzung (für die Verdrängung)
+            os.utime(entry_path, None)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, result: Dict[str, Any], settings: Dict[str, Any],
+            volume_envelope: Optional[Dict[str, Any]] = None, folder_path: Optional[str] = None,
+            base_filename: Optional[str] = None) -> bool:
+        """
+        Speichert ein rohes Transkriptions-Ergebnis (vor dem Post-Processing)
+
+        Returns:
+            True wenn erfolgreich, False sonst
+        """
+        entry = {
+            'result': result,
+            'settings': settings,
+            'volume_envelope': volume_envelope,
+            'folder_path': folder_path,
+            'base_filename': base_filename,
+            'created_at': time.time(),
+        }
+        try:
+            self._write_json(self._entry_path(key), entry)
+            if folder_path:
+                with self._lock:
+                    songs = self._load_song_index()
+                    songs[os.path.abspath(folder_path)] = key
+                    self._write_json(os.path.join(self.cache_dir, SONG_INDEX_FILE), songs)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️ Transkript konnte nicht im Cache gespeichert werden: {e}")
+            return False
+        logger.info(f"💾 Transkript im Cache gespeichert: {key[:12]}")
+        self.evict()
+        return True
+
+    def _load_song_index(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.cache_dir, SONG_INDEX_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def find_for_folder(self, folder_path: str) -> Optional[str]:
+        """Schlüssel des zuletzt gespeicherten Transkripts eines Song-Ordners"""
+        with self._lock:
+            songs = self._load_song_index()
+        key = songs.get(os.path.abspath(folder_path))
+        if key is None:
+            # Fallback: gleicher Ordnername (z.B. Bibliothek verschoben), nur bei eindeutigem Treffer,
+            # damit kein gleichnamiger Song aus einer anderen Bibliothek übernommen wird
+            folder_name = os.path.basename(os.path.normpath(folder_path))
+            candidates = {candidate for path, candidate in songs.items() if os.path.basename(path) == folder_name}
+            if len(candidates) == 1:
+                key = candidates.pop()
+            elif candidates:
+                logger.info(f"Transkript-Cache: Ordnername '{folder_name}' mehrdeutig ({len(candidates)} Einträge), kein Fallback")
+        return key if key and os.path.exists(self._entry_path(key)) else None
+
+    def _entries(self):
+        """Liefert (letzte Nutzung, Größe, Pfad) für alle Transkript-Einträge"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if (not entry.is_file() or not entry.name.endswith('.json')
+                        or entry.name == SONG_INDEX_FILE or '.tmp-' in entry.name):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Entfernt die am längsten nicht genutzten Einträge, bis das Größenlimit eingehalten ist"""
+        with self._lock:
+            try:
+                entries = self._entries()
+            except OSError as e:
+                logger.warning(f"⚠️ Transkript-Cache konnte nicht gelesen werden: {e}")
+                return
+            total = sum(size for _, size, _ in entries)
+            removed = set()
+            for last_used, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed.add(os.path.basename(path)[:-len('.json')])
+                logger.info(f"🗑️ Transkript-Cache-Eintrag verdrängt: {os.path.basename(path)[:12]}")
+            if removed:
+                # Verweise auf verdrängte Einträge aus dem Song-Index entfernen
+                songs = self._load_song_index()
+                kept = {path: key for path, key in songs.items() if key not in removed}
+                if len(kept) != len(songs):
+                    try:
+                        self._write_json(os.path.join(self.cache_dir, SONG_INDEX_FILE), kept)
+                    except (OSError, TypeError, ValueError) as e:
+                        logger.warning(f"⚠️ Song-Index des Transkript-Caches nicht aktualisiert: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        with self._lock:
+            songs = len(self._load_song_index())
+            try:
+                entries = self._entries()
+            except OSError:
+                entries = []
+        return {
+            'cache_dir': self.cache_dir,
+            'songs': songs,
+            'entries': len(entries),
+            'size_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# Globale Cache-Instanz
+_global_transcript_cache = None
+_global_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Gibt den prozessweiten Transkript-Cache zurück (None wenn per TRANSCRIPT_CACHE=0 deaktiviert)"""
+    global _global_transcript_cache
+    if os.getenv('TRANSCRIPT_CACHE', '1').lower() in ('0', 'false', 'no'):
+        return None
+    if _global_transcript_cache is None:
+        with _global_transcript_cache_lock:
+            if _global_transcript_cache is None:
+                try:
+                    _global_transcript_cache = TranscriptCache()
+                except OSError as e:
+                    logger.warning(f"⚠️ Transkript-Cache nicht verfügbar: {e}")
+                    return None
+    return _global_transcript_cache
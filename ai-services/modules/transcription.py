@@ -5,7 +5,9 @@ Transkribiert Audio zu Text und konvertiert ins UltraStar-Format
 """
 
 import os
+import copy
 import logging
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import torch
@@ -18,12 +20,46 @@ except ImportError:
 
 from .meta import ProcessingMeta, ProcessingStatus
 from .logger_utils import log_start, send_processing_status
+from .transcript_cache import get_transcript_cache, compute_volume_envelope
 
 logger = logging.getLogger(__name__)
 
-# Globale Instanz des Transcribers, um das Modell im Speicher zu halten
-# Das verhindert, dass das Modell beim Garbage Collection gelöscht wird und Abstürze verursacht
-_global_transcriber = None
+# Transkriptions-Profile (Auswahl per config['profile'] bzw. WHISPER_PROFILE)
+# compute_type: 'default', 'float16', 'int8_float16', 'int8', 'float32' (faster-whisper/CTranslate2)
+# cpu_threads: 0 = CTranslate2-Standard; vad_filter: Stille vor der Dekodierung überspringen
+TRANSCRIPTION_PROFILES = {
+    # Bisheriges Verhalten: Modell-Standard-Precision, Beam-Search 5
+    'default': {
+        'model': 'large-v3', 'compute_type': 'default', 'cpu_threads': 0, 'num_workers': 1,
+        'beam_size': 5, 'vad_filter': False,
+    },
+    'gpu': {
+        'model': 'large-v3', 'compute_type': 'float16', 'cpu_threads': 0, 'num_workers': 1,
+        'beam_size': 5, 'vad_filter': False,
+    },
+    'gpu_int8': {
+        'model': 'large-v3', 'compute_type': 'int8_float16', 'cpu_threads': 0, 'num_workers': 1,
+        'beam_size': 5, 'vad_filter': False,
+    },
+    # CPU: int8-quantisiert, gleiche Modellgröße und Beam-Search
+    'cpu_int8': {
+        'model': 'large-v3', 'compute_type': 'int8', 'cpu_threads': 0, 'num_workers': 1,
+        'beam_size': 5, 'vad_filter': False,
+    },
+    # CPU: Greedy-Dekodierung, für schnelle Magic-Songs
+    'cpu_fast': {
+        'model': 'large-v3', 'compute_type': 'int8', 'cpu_threads': 0, 'num_workers': 1,
+        'beam_size': 1, 'vad_filter': True,
+    },
+    # CPU: destilliertes Modell, annähernd Echtzeit
+    'cpu_realtime': {
+        'model': 'distil-large-v3', 'compute_type': 'int8', 'cpu_threads': 0, 'num_workers': 1,
+        'beam_size': 1, 'vad_filter': True,
+    },
+}
+
+# 'auto' wählt das Profil anhand des Geräts (opt-in; Standard bleibt 'default')
+AUTO_PROFILES = {'cuda': 'gpu', 'cpu': 'cpu_int8'}
 
 class AudioTranscriber:
     """Audio-Transkribierer mit Whisper für UltraStar-Format"""
@@ -37,43 +73,87 @@ class AudioTranscriber:
         """
         self.config = config or {}
         self.default_config = {
-            'model': 'large-v3',
+            'profile': os.getenv('WHISPER_PROFILE', 'default'),  # Name aus TRANSCRIPTION_PROFILES oder 'auto'
             'device': 'auto',  # 'auto', 'cuda', 'cpu'
             'language': None,  # None für automatische Erkennung
             'task': 'transcribe',
             'verbose': False,
             'word_timestamps': True,
-            'fp16': True
+            'fp16': True,
+            'transcript_cache': True  # Rohe Whisper-Ergebnisse cachen (Grundlage für das Re-Render)
+            # Optional überschreiben: 'model', 'compute_type', 'cpu_threads',
+            # 'num_workers', 'beam_size', 'vad_filter'
         }
         
         self.model = None
         self.model_name = None
+        self.compute_type = None
+        # Kontextmanager um jeden Whisper-Lauf (z.B. exklusiver Zugriff im TranscriberService);
+        # Treffer im Transkript-Cache laufen ohne ihn und brauchen kein geladenes Modell
+        self.whisper_guard = None
+    
+    def _resolve_device(self) -> str:
+        config = {**self.default_config, **self.config}
+        device = config['device']
+        if device == 'auto':
+            device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        return device
+    
+    def resolve_settings(self) -> Dict[str, Any]:
+        """
+        Ermittelt die effektiven Transkriptions-Einstellungen
+        
+        Profilwerte werden von explizit gesetzten Konfigurationswerten überschrieben.
+        
+        Returns:
+            Dict mit profile, device, model, compute_type, cpu_threads, num_workers, beam_size, vad_filter
+        """
+        config = {**self.default_config, **self.config}
+        device = self._resolve_device()
+        profile = config.get('profile') or 'default'
+        if profile == 'auto':
+            profile = AUTO_PROFILES.get(device, 'default')
+        if profile not in TRANSCRIPTION_PROFILES:
+            logger.warning(f"Unbekanntes Transkriptions-Profil '{profile}', verwende 'default'")
+            profile = 'default'
+        
+        settings = {'profile': profile, 'device': device, **TRANSCRIPTION_PROFILES[profile]}
+        for key in ('model', 'compute_type', 'cpu_threads', 'num_workers', 'beam_size', 'vad_filter'):
+            if config.get(key) is not None:
+                settings[key] = config[key]
+        return settings
     
-    def _load_model(self, model_name: str):
+    def _load_model(self, model_name: Optional[str] = None):
         """
         Lädt das Whisper-Modell
         
         Args:
-            model_name: Name des Whisper-Modells
+            model_name: Name des Whisper-Modells (None = aus dem Profil)
         """
-        if self.model is None or self.model_name != model_name:
+        settings = self.resolve_settings()
+        model_name = model_name or settings['model']
+        compute_type = settings['compute_type']
+        if self.model is None or self.model_name != model_name or self.compute_type != compute_type:
             try:
-                config = {**self.default_config, **self.config}
+                device = settings['device']
                 
-                # Bestimme Device
-                device = config['device']
-                if device == 'auto':
-                    device = 'cuda' if torch.cuda.is_available() else 'cpu'
-                
-                logger.info(f"Lade Whisper-Modell '{model_name}' auf {device}")
+                logger.info(f"Lade Whisper-Modell '{model_name}' auf {device} "
+                            f"(Profil {settings['profile']}, compute_type={compute_type})")
                 
                 # Verwende faster-whisper falls verfügbar (Windows-kompatibel)
                 if FASTER_WHISPER_AVAILABLE:
-                    self.model = WhisperModel(model_name, device=device)
+                    self.model = WhisperModel(
+                        model_name,
+                        device=device,
+                        compute_type=compute_type,
+                        cpu_threads=settings['cpu_threads'],
+                        num_workers=settings['num_workers']
+                    )
                 else:
                     self.model = whisper.load_model(model_name, device=device)
                 
                 self.model_name = model_name
+                self.compute_type = compute_type
                 
                 logger.info(f"✅ Whisper-Modell '{model_name}' erfolgreich geladen")
                 
@@ -94,36 +174,27 @@ class AudioTranscriber:
         """
         # Priorität: .dereverbed.mp3 > .vocals.mp3 > .hp5.mp3 > andere Audio-Dateien
         audio_extensions = ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.webm']
+        index = meta.folder_index
         
-        # Suche nach dereverbed Vocals-Dateien (höchste Priorität)
-        for file in os.listdir(meta.folder_path):
-            if file.endswith('.dereverbed.mp3'):
-                return meta.get_file_path(file)
-        
-        # Suche nach normalen Vocals-Dateien
-        for file in os.listdir(meta.folder_path):
-            if file.endswith('.vocals.mp3'):
-                return meta.get_file_path(file)
-        
-        # Suche nach HP5-Dateien
-        for file in os.listdir(meta.folder_path):
-            if file.endswith('.hp5.mp3'):
-                return meta.get_file_path(file)
+        # dereverbed > vocals > hp5 (Suffix-Suche im Ordner-Index statt os.listdir pro Stufe)
+        for suffix in ('.dereverbed.mp3', '.vocals.mp3', '.hp5.mp3'):
+            matches = index.with_suffix(suffix)
+            if matches:
+                return matches[0]
         
         # Suche nach anderen Audio-Dateien
-        for file in os.listdir(meta.folder_path):
-            if any(file.lower().endswith(ext) for ext in audio_extensions):
-                return meta.get_file_path(file)
-        
-        return None
+        matches = index.with_extensions(audio_extensions)
+        return matches[0] if matches else None
     
-    def transcribe_audio(self, audio_path: str, model_name: str = 'large-v3') -> Optional[Dict[str, Any]]:
+    def transcribe_audio(self, audio_path: str, model_name: Optional[str] = None, audio_buffer=None) -> Optional[Dict[str, Any]]:
         """
         Transkribiert eine Audio-Datei
         
         Args:
             audio_path: Pfad zur Audio-Datei
-            model_name: Whisper-Modell
+            model_name: Whisper-Modell (None = aus dem Profil)
+            audio_buffer: Bereits dekodiertes Signal (AudioBuffer) zu audio_path;
+                          wird direkt als 16-kHz-Mono-Array übergeben statt die Datei zu dekodieren
             
         Returns:
             Transkriptions-Ergebnis oder None
@@ -133,18 +204,29 @@ class AudioTranscriber:
             self._load_model(model_name)
             
             config = {**self.default_config, **self.config}
+            settings = self.resolve_settings()
             
             logger.info(f"Transkribiere Audio: {audio_path}")
             
+            # Whisper erwartet 16 kHz mono; beide APIs akzeptieren ein float32-Array
+            if audio_buffer is not None:
+                logger.info("Verwende In-Memory-Vocals (kein erneutes Dekodieren)")
+                audio_input = audio_buffer.resampled(16000, mono=True)
+            else:
+                # Gemeinsamer ffmpeg-Decoder statt des Whisper-internen Decoders
+                from .audio_decoder import decode_audio
+                audio_input = decode_audio(audio_path, 16000, 1).samples[0]
+            
             # Transkription mit Whisper (unterstützt beide APIs)
             if FASTER_WHISPER_AVAILABLE:
                 # faster-whisper API
                 segments_generator, info = self.model.transcribe(
-                    audio_path,
+                    audio_input,
                     language=config['language'] if config['language'] else None,
                     task=config['task'],
                     word_timestamps=config['word_timestamps'],
-                    beam_size=5
+                    beam_size=settings['beam_size'],
+                    vad_filter=settings['vad_filter']
                 )
                 
                 # Konvertiere zu openai-whisper Format
@@ -187,7 +269,7 @@ class AudioTranscriber:
             else:
                 # Original openai-whisper API
                 result = self.model.transcribe(
-                    audio_path,
+                    audio_input,
                     language=config['language'],
                     task=config['task'],
                     verbose=config['verbose'],
@@ -358,6 +440,143 @@ class AudioTranscriber:
             logger.error(f"Fehler beim Speichern der UltraStar-Datei: {e}")
             return False
     
+    def _transcript_cache_settings(self, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Einstellungen, die das rohe Whisper-Ergebnis bestimmen (Teil des Cache-Schlüssels)"""
+        config = {**self.default_config, **self.config}
+        return {
+            'model': settings['model'],
+            'compute_type': settings['compute_type'],
+            'beam_size': settings['beam_size'],
+            'vad_filter': settings['vad_filter'],
+            'language': config['language'],
+            'task': config['task'],
+            'word_timestamps': config['word_timestamps'],
+        }
+    
+    def _volume_envelope(self, vocals_path: str, audio_buffer=None) -> Optional[Dict[str, Any]]:
+        """Lautstärke-Hüllkurve der Vocals (dekodiert die Datei nur ohne audio_buffer)"""
+        try:
+            if audio_buffer is None:
+                from .audio_buffer import load_audio_buffer
+                audio_buffer = load_audio_buffer(vocals_path)
+            return compute_volume_envelope(audio_buffer)
+        except Exception as e:
+            logger.warning(f"Vocals konnten für die Lautstärke-Filterung nicht dekodiert werden: {e}")
+            return None
+    
+    def postprocess_result(self, transcription_result: Dict[str, Any],
+                           volume_envelope: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Post-Processing (Halluzinations-Filter, Segment-Splitting, Lautstärke-Filter)
+        
+        Arbeitet auf einer Kopie, das rohe Ergebnis (z.B. aus dem Cache) bleibt unverändert.
+        
+        Args:
+            transcription_result: Rohes Whisper-Ergebnis
+            volume_envelope: Lautstärke-Hüllkurve der Vocals (None = keine Lautstärke-Filterung)
+        """
+        transcription_result = copy.deepcopy(transcription_result)
+        # Übernehme alte Post-Processing-Pipeline (Segment-Splitting & Halluzinations-Filter)
+        try:
+            # 1) Erste Filterung
+            transcription_result = self._filter_hallucinations(dict(transcription_result))
+            # 2) Lange Segmente splitten und optimieren
+            transcription_result = self._split_long_segments(dict(transcription_result))
+            after_cnt = len(transcription_result.get('segments', []) or [])
+            # Diagnose: zähle sehr lange Segmente
+            try:
+                long_before = sum(1 for s in transcription_result.get('segments', []) if (s.get('end',0)-s.get('start',0))>4.0)
+                logger.info(f"Segmente nach Split: {after_cnt} (vorher unbekannt), >4s: {long_before}")
+            except Exception:
+                pass
+            # 2b) Lautstärke-basierte Filterung wie früher (logge Entscheidung pro Segment)
+            if volume_envelope is not None:
+                try:
+                    transcription_result = self._filter_by_volume(transcription_result, volume_envelope)
+                except Exception as ve:
+                    logger.warning(f"Lautstärke-Filterung übersprungen: {ve}")
+            # 3) Zweite Filterung nach dem Split
+            transcription_result = self._filter_hallucinations(dict(transcription_result))
+        except Exception as e:
+            logger.warning(f"Post-Processing übersprungen: {e}")
+        return transcription_result
+    
+    def write_ultrastar(self, transcription_result: Dict[str, Any], meta: ProcessingMeta, save_raw: bool = True) -> bool:
+        """
+        Konvertiert ein nachbearbeitetes Ergebnis ins UltraStar-Format und speichert es
+        
+        Args:
+            transcription_result: Nachbearbeitetes Whisper-Ergebnis
+            meta: ProcessingMeta-Objekt
+            save_raw: Zusätzlich die Roh-Transkription als temporäre Datei speichern
+            
+        Returns:
+            True wenn erfolgreich, False sonst
+        """
+        # Konvertiere zu UltraStar-Format
+        ultrastar_content = self.convert_to_ultrastar(transcription_result, meta)
+        if not ultrastar_content:
+            logger.error("UltraStar-Konvertierung fehlgeschlagen")
+            return False
+        
+        # Speichere UltraStar-Datei (benenne nach stabilem Basisnamen, falls vorhanden)
+        if getattr(meta, 'base_filename', None):
+            filename = f"{meta.base_filename}.txt"
+        else:
+            filename = f"{meta.artist} - {meta.title}.txt"
+        if not self.save_ultrastar_file(ultrastar_content, meta, filename):
+            logger.error("Speichern der UltraStar-Datei fehlgeschlagen")
+            return False
+        
+        # Speichere auch Roh-Transkription (temporär, wird beim Cleanup entfernt)
+        if save_raw:
+            if getattr(meta, 'base_filename', None):
+                raw_filename = f"{meta.base_filename}_raw.txt"
+            else:
+                raw_filename = f"{meta.artist} - {meta.title}_raw.txt"
+            raw_content = transcription_result.get('text', '')
+            if raw_content:
+                raw_path = meta.get_file_path(raw_filename)
+                with open(raw_path, 'w', encoding='utf-8') as f:
+                    f.write(raw_content)
+                meta.add_output_file(raw_path)
+                meta.add_temp_file(raw_filename)  # Als temporär markieren
+        return True
+    
+    def rerender_meta(self, meta: ProcessingMeta) -> bool:
+        """
+        Re-Render: erzeugt die UltraStar-Datei aus dem gecachten Whisper-Ergebnis neu
+        
+        Whisper wird dabei nicht geladen; nur Post-Processing und UltraStar-Konvertierung
+        laufen erneut (z.B. nach Änderungen an den Post-Processing-Regeln).
+        
+        Args:
+            meta: ProcessingMeta-Objekt des Song-Ordners
+            
+        Returns:
+            True wenn erfolgreich, False sonst (z.B. kein gecachtes Transkript)
+        """
+        log_start('transcription.rerender_meta', meta)
+        cache = get_transcript_cache()
+        key = cache.find_for_folder(meta.folder_path) if cache else None
+        entry = cache.get(key) if key else None
+        if not entry:
+            logger.error(f"Kein gecachtes Transkript für Re-Render gefunden: {meta.folder_path}")
+            meta.mark_step_failed('transcription_rerender')
+            return False
+        
+        if not getattr(meta, 'base_filename', None) and entry.get('base_filename'):
+            meta.base_filename = entry['base_filename']
+        
+        transcription_result = self.postprocess_result(entry['result'], entry.get('volume_envelope'))
+        if not self.write_ultrastar(transcription_result, meta, save_raw=False):
+            meta.mark_step_failed('transcription_rerender')
+            return False
+        
+        logger.info(f"✅ UltraStar-Datei aus dem Transkript-Cache neu erzeugt: {meta.artist} - {meta.title}")
+        meta.mark_step_completed('transcription_rerender')
+        return True
+    
     def process_meta(self, meta: ProcessingMeta) -> bool:
         """
         Transkribiert Audio im Meta-Objekt
@@ -379,83 +598,49 @@ class AudioTranscriber:
                 return False
             
             logger.info(f"Verwende Vocals-Datei: {vocals_file}")
-            # Merke Vocals-Pfad für optionale Lautstärke-Filter
-            try:
-                self._last_vocals_path = vocals_file
-            except Exception:
-                pass
             meta.status = ProcessingStatus.IN_PROGRESS
             
-            # Transkribiere Audio
+            # Transkribiere Audio (oder übernimm das rohe Ergebnis aus dem Transkript-Cache)
             config = {**self.default_config, **self.config}
-            model_name = config.get('model', 'large-v3')
+            settings = self.resolve_settings()
+            model_name = settings['model']
+            cache_settings = self._transcript_cache_settings(settings)
+            audio_buffer = meta.get_audio_buffer(vocals_file)
             
-            transcription_result = self.transcribe_audio(vocals_file, model_name)
-            if not transcription_result:
-                logger.error("Transkription fehlgeschlagen")
-                meta.mark_step_failed('transcription')
-                meta.status = ProcessingStatus.FAILED
-                send_processing_status(meta, 'failed')
-                return False
-            
-            # Übernehme alte Post-Processing-Pipeline (Segment-Splitting & Halluzinations-Filter)
-            try:
-                # 1) Erste Filterung
-                transcription_result = self._filter_hallucinations(dict(transcription_result))
-                # 2) Lange Segmente splitten und optimieren
-                before_cnt = len(transcription_result.get('segments', []) or [])
-                transcription_result = self._split_long_segments(dict(transcription_result))
-                after_cnt = len(transcription_result.get('segments', []) or [])
-                # Diagnose: zähle sehr lange Segmente
-                try:
-                    long_before = sum(1 for s in transcription_result.get('segments', []) if (s.get('end',0)-s.get('start',0))>4.0)
-                    logger.info(f"Segmente nach Split: {after_cnt} (vorher unbekannt), >4s: {long_before}")
-                except Exception:
-                    pass
-                # 2b) Lautstärke-basierte Filterung wie früher (logge Entscheidung pro Segment)
-                if hasattr(self, '_last_vocals_path') and getattr(self, '_last_vocals_path'):
-                    try:
-                        transcription_result = self._filter_by_volume(transcription_result, getattr(self, '_last_vocals_path'))
-                    except Exception as ve:
-                        logger.warning(f"Lautstärke-Filterung übersprungen: {ve}")
-                # 3) Zweite Filterung nach dem Split
-                transcription_result = self._filter_hallucinations(dict(transcription_result))
-            except Exception as e:
-                logger.warning(f"Post-Processing übersprungen: {e}")
-
-            # Konvertiere zu UltraStar-Format
-            ultrastar_content = self.convert_to_ultrastar(transcription_result, meta)
-            if not ultrastar_content:
-                logger.error("UltraStar-Konvertierung fehlgeschlagen")
-                meta.mark_step_failed('transcription')
-                meta.status = ProcessingStatus.FAILED
-                send_processing_status(meta, 'failed')
-                return False
+            cache = get_transcript_cache() if config.get('transcript_cache', True) else None
+            cache_key = cache.make_key(vocals_file, cache_settings) if cache else None
+            cached = cache.get(cache_key) if cache_key else None
             
-            # Speichere UltraStar-Datei (benenne nach stabilem Basisnamen, falls vorhanden)
-            if getattr(meta, 'base_filename', None):
-                filename = f"{meta.base_filename}.txt"
+            if cached:
+                logger.info(f"♻️ Whisper-Ergebnis aus dem Transkript-Cache übernommen ({cache_key[:12]})")
+                transcription_result = cached['result']
+                volume_envelope = cached.get('volume_envelope')
+                if cached.get('folder_path') != meta.folder_path:
+                    cache.put(cache_key, transcription_result, cache_settings, volume_envelope,
+                              meta.folder_path, getattr(meta, 'base_filename', None))
             else:
-                filename = f"{meta.artist} - {meta.title}.txt"
-            if not self.save_ultrastar_file(ultrastar_content, meta, filename):
-                logger.error("Speichern der UltraStar-Datei fehlgeschlagen")
+                with self.whisper_guard() if self.whisper_guard else nullcontext():
+                    transcription_result = self.transcribe_audio(vocals_file, model_name, audio_buffer=audio_buffer)
+                if not transcription_result:
+                    logger.error("Transkription fehlgeschlagen")
+                    meta.mark_step_failed('transcription')
+                    meta.status = ProcessingStatus.FAILED
+                    send_processing_status(meta, 'failed')
+                    return False
+                volume_envelope = self._volume_envelope(vocals_file, audio_buffer)
+                if cache_key:
+                    # Roh-Ergebnis vor dem Post-Processing speichern (das Post-Processing verändert Segmente)
+                    cache.put(cache_key, transcription_result, cache_settings, volume_envelope,
+                              meta.folder_path, getattr(meta, 'base_filename', None))
+            
+            transcription_result = self.postprocess_result(transcription_result, volume_envelope)
+            
+            if not self.write_ultrastar(transcription_result, meta):
                 meta.mark_step_failed('transcription')
                 meta.status = ProcessingStatus.FAILED
+                send_processing_status(meta, 'failed')
                 return False
             
-            # Speichere auch Roh-Transkription (temporär, wird beim Cleanup entfernt)
-            if getattr(meta, 'base_filename', None):
-                raw_filename = f"{meta.base_filename}_raw.txt"
-            else:
-                raw_filename = f"{meta.artist} - {meta.title}_raw.txt"
-            raw_content = transcription_result.get('text', '')
-            if raw_content:
-                raw_path = meta.get_file_path(raw_filename)
-                with open(raw_path, 'w', encoding='utf-8') as f:
-                    f.write(raw_content)
-                meta.add_output_file(raw_path)
-                meta.add_temp_file(raw_filename)  # Als temporär markieren
-            
             logger.info("=" * 80)
             logger.info(f"✅ Audio erfolgreich transkribiert für: {meta.artist} - {meta.title}")
             meta.mark_step_completed('transcription')
@@ -728,43 +913,57 @@ class AudioTranscriber:
         except Exception:
             return segments
 
-    def _filter_by_volume(self, result: Dict[str, Any], vocals_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def _segment_mean_volume(energy_cumsum, sample_rate: float, channels: int, start: float, end: float) -> Optional[float]:
+        """
+        Mittlere Lautstärke eines Abschnitts in dB wie ffmpeg volumedetect (mean_volume)
+        
+        mean_volume ist die mittlere Leistung aller Samples aller Kanäle in dBFS,
+        auf 0.1 dB gerundet; digitale Stille meldet volumedetect als -91.0 dB.
+        Für blockweise Energie (Hüllkurve) ist sample_rate die Blockrate und
+        channels = Kanäle * Samples pro Block.
+        
+        Returns:
+            dB-Wert oder None, falls der Abschnitt keine Samples enthält
+        """
+        import math
+        total = len(energy_cumsum) - 1
+        i0 = max(0, int(round(start * sample_rate)))
+        i1 = min(total, int(round(end * sample_rate)))
+        if i1 <= i0:
+            return None
+        power = (energy_cumsum[i1] - energy_cumsum[i0]) / ((i1 - i0) * channels)
+        if power <= 0:
+            return -91.0
+        return round(10 * math.log10(power), 1)
+    
+    def _filter_by_volume(self, result: Dict[str, Any], volume_envelope: Dict[str, Any]) -> Dict[str, Any]:
         """
         Filtert Segmente basierend auf der Lautstärke der Vocals und loggt die Entscheidung pro Segment.
+        
+        Grundlage ist die Lautstärke-Hüllkurve (Energie pro 10-ms-Block, siehe
+        compute_volume_envelope); ihre kumulierte Summe erlaubt die mittlere Lautstärke
+        jedes Segments per Slicing, auch ohne die Vocals-Datei (Re-Render).
         """
         try:
-            import subprocess
+            import numpy as np
             segments = result.get('segments', []) or []
             filtered_segments: List[Dict[str, Any]] = []
             volume_threshold = -45.0  # dB
+            
+            # Blöcke statt Samples: Rate = Blöcke pro Sekunde, Normierung über Samples pro Block
+            step = volume_envelope['samples_per_step']
+            sample_rate = volume_envelope['sample_rate'] / step
+            channels = volume_envelope['channels'] * step
+            energy_cumsum = np.concatenate(([0.0], np.cumsum(np.asarray(volume_envelope['energy'], dtype=np.float64))))
+            
             for segment in segments:
                 start_time = segment.get('start', 0)
                 end_time = segment.get('end', 0)
                 duration = max(0, end_time - start_time)
                 if duration <= 0:
                     continue
-                cmd = [
-                    'ffmpeg', '-hide_banner', '-nostats',
-                    '-ss', str(start_time), '-t', str(duration), '-i', vocals_path,
-                    '-af', 'volumedetect', '-f', 'null', '-'
-                ]
-                mean_volume = None
-                try:
-                    result_run = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-                    for line in (result_run.stderr or '').split('\n'):
-                        if 'mean_volume:' in line:
-                            try:
-                                val = line.split('mean_volume:')[1].strip().split()[0]
-                                mean_volume = float(val.replace('dB', ''))
-                                break
-                            except Exception:
-                                pass
-                except subprocess.TimeoutExpired:
-                    logger.warning(f"FFmpeg-Timeout für Segment: '{segment.get('text', '').strip()}'")
-                    mean_volume = None
-                except Exception as e:
-                    logger.warning(f"FFmpeg-Fehler für Segment: {e}")
-                    mean_volume = None
+                mean_volume = self._segment_mean_volume(energy_cumsum, sample_rate, channels, start_time, end_time)
 
                 keep = (mean_volume is None) or (mean_volume > volume_threshold)
                 if keep:
@@ -791,21 +990,13 @@ def transcribe_audio(meta: ProcessingMeta) -> bool:
     Returns:
         True wenn erfolgreich, False sonst
     """
-    global _global_transcriber
-    
     try:
         log_start('transcribe_audio', meta)
         
-        # Verwende globale Instanz, um das Modell im Speicher zu halten
-        # Das verhindert Abstürze beim Garbage Collection
-        if _global_transcriber is None:
-            _global_transcriber = AudioTranscriber()
-        
-        transcriber = _global_transcriber
-        result = transcriber.process_meta(meta)
-        
-        # Das Modell bleibt in _global_transcriber, um Abstürze zu vermeiden
-        return result
+        # Prozessweit geteilter Transkribierer (vorgeladen beim Serverstart),
+        # das Modell bleibt im Service, um Abstürze beim Garbage Collection zu vermeiden
+        from .transcriber_service import get_transcriber_service
+        return get_transcriber_service().process_meta(meta)
     except Exception as e:
         logger.error("=" * 80)
         logger.error(f"❌ KRITISCHER FEHLER in transcribe_audio(): {e}", exc_info=True)
@@ -815,3 +1006,70 @@ def transcribe_audio(meta: ProcessingMeta) -> bool:
         logger.error("=" * 80)
         raise
 
+def rerender_transcription(meta: ProcessingMeta) -> bool:
+    """
+    Convenience-Funktion für das Re-Render einer UltraStar-Datei aus dem Transkript-Cache
+    
+    Args:
+        meta: ProcessingMeta-Objekt
+        
+    Returns:
+        True wenn erfolgreich, False sonst
+    """
+    log_start('rerender_transcription', meta)
+    # Kein Whisper-Modell nötig, daher eigener Transkribierer statt des Services
+    return AudioTranscriber().rerender_meta(meta)
+
+def benchmark_transcription_profiles(audio_path: str, profiles: Optional[List[str]] = None,
+                                     device: str = 'auto') -> List[Dict[str, Any]]:
+    """
+    Misst Ladezeit und Real-Time-Factor (RTF = Transkriptionszeit / Audiodauer) pro Profil
+    
+    Das Referenz-Audio wird einmal dekodiert und allen Profilen im Speicher übergeben,
+    damit nur die Whisper-Inferenz in den RTF eingeht.
+    
+    Args:
+        audio_path: Referenz-Clip
+        profiles: Zu messende Profile (None = alle aus TRANSCRIPTION_PROFILES)
+        device: 'auto', 'cuda' oder 'cpu'
+        
+    Returns:
+        Liste mit einem Ergebnis-Dict pro Profil
+    """
+    import gc
+    import time
+    from .audio_buffer import load_audio_buffer
+    
+    buffer = load_audio_buffer(audio_path, sample_rate=16000, mono=True)
+    duration = buffer.duration
+    results = []
+    
+    for profile in profiles or list(TRANSCRIPTION_PROFILES.keys()):
+        transcriber = AudioTranscriber({'profile': profile, 'device': device})
+        settings = transcriber.resolve_settings()
+        entry = {'profile': profile, **settings, 'audio_seconds': round(duration, 1)}
+        try:
+            start = time.time()
+            transcriber._load_model()
+            entry['load_seconds'] = round(time.time() - start, 1)
+            
+            start = time.time()
+            result = transcriber.transcribe_audio(audio_path, audio_buffer=buffer)
+            elapsed = time.time() - start
+            
+            entry['transcribe_seconds'] = round(elapsed, 1)
+            entry['rtf'] = round(elapsed / duration, 3) if duration > 0 else None
+            entry['segments'] = len(result['segments']) if result else 0
+            entry['text'] = result['text'] if result else ''
+        except Exception as e:
+            entry['error'] = str(e)
+        
+        logger.info(f"⏱️ Profil {profile}: RTF={entry.get('rtf')} (Laden {entry.get('load_seconds')}s)")
+        results.append(entry)
+        
+        # Modell vor dem nächsten Profil freigeben
+        transcriber.model = None
+        del transcriber
+        gc.collect()
+    
+    return results
@@ -12,6 +12,7 @@ from typing import Optional, Dict, Any, List
 
 from .meta import ProcessingMeta, ProcessingStatus
 from .logger_utils import log_start, send_processing_status
+from .media_probe import probe_media
 
 try:
     from ..constants import VIDEO_EXTENSIONS
@@ -62,12 +63,9 @@ class VideoRemuxer:
                 video_files.append(file_path)
         
         # Suche im Ordner
-        if os.path.exists(meta.folder_path):
-            for file in os.listdir(meta.folder_path):
-                file_path = os.path.join(meta.folder_path, file)
-                if os.path.isfile(file_path) and any(file.lower().endswith(ext) for ext in video_extensions):
-                    if file_path not in video_files:
-                        video_files.append(file_path)
+        for file_path in meta.folder_index.with_extensions(video_extensions):
+            if file_path not in video_files:
+                video_files.append(file_path)
         
         return video_files
     
@@ -291,49 +289,26 @@ class VideoRemuxer:
             Video-Informationen oder None
         """
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            info = probe_media(video_path)
             
-            if result.returncode == 0:
-                import json
-                info = json.loads(result.stdout)
-                
-                # Extrahiere relevante Informationen
-                format_info = info.get('format', {})
-                streams = info.get('streams', [])
-                
-                video_stream = None
-                audio_stream = None
-                
-                for stream in streams:
-                    if stream.get('codec_type') == 'video' and not video_stream:
-                        video_stream = stream
-                    elif stream.get('codec_type') == 'audio' and not audio_stream:
-                        audio_stream = stream
-                
+            if info is not None:
+                video_stream = info.video
+                audio_stream = info.audio
                 return {
-                    'duration': float(format_info.get('duration', 0)),
-                    'size': int(format_info.get('size', 0)),
-                    'bitrate': int(format_info.get('bit_rate', 0)),
-                    'format': format_info.get('format_name', ''),
-                    'video_codec': video_stream.get('codec_name', '') if video_stream else '',
-                    'video_width': int(video_stream.get('width', 0)) if video_stream else 0,
-                    'video_height': int(video_stream.get('height', 0)) if video_stream else 0,
-                    'video_fps': eval(video_stream.get('r_frame_rate', '0/1')) if video_stream else 0,
-                    'audio_codec': audio_stream.get('codec_name', '') if audio_stream else '',
-                    'audio_sample_rate': int(audio_stream.get('sample_rate', 0)) if audio_stream else 0,
-                    'audio_channels': int(audio_stream.get('channels', 0)) if audio_stream else 0
+                    'duration': info.duration,
+                    'size': info.size,
+                    'bitrate': info.bit_rate,
+                    'format': info.format_name,
+                    'video_codec': video_stream.codec_name if video_stream else '',
+                    'video_width': video_stream.width if video_stream else 0,
+                    'video_height': video_stream.height if video_stream else 0,
+                    'video_fps': video_stream.fps if video_stream else 0,
+                    'audio_codec': audio_stream.codec_name if audio_stream else '',
+                    'audio_sample_rate': audio_stream.sample_rate if audio_stream else 0,
+                    'audio_channels': audio_stream.channels if audio_stream else 0
                 }
             else:
-                logger.error(f"Fehler beim Abrufen der Video-Informationen: {result.stderr}")
+                logger.error(f"Fehler beim Abrufen der Video-Informationen: {video_path}")
                 return None
                 
         except Exception as e:
@@ -253,9 +253,10 @@ class YouTubeDownloader:
             with yt_dlp.YoutubeDL(config) as ydl:
                 ydl.download([meta.youtube_url])
             
-            # Finde die heruntergeladene Datei
+            # Finde die heruntergeladene Datei (yt-dlp schreibt am Index vorbei)
+            meta.folder_index.refresh()
             downloaded_files = []
-            for file in os.listdir(meta.folder_path):
+            for file in meta.folder_index.names():
                 if file.startswith(filename) and file.lower().endswith(('.mp4', '.webm', '.mkv')):
                     downloaded_files.append(file)
             
@@ -357,9 +358,10 @@ class YouTubeDownloader:
             with yt_dlp.YoutubeDL(config) as ydl:
                 ydl.download([meta.youtube_url])
             
-            # Finde die heruntergeladene Datei
+            # Finde die heruntergeladene Datei (yt-dlp schreibt am Index vorbei)
+            meta.folder_index.refresh()
             downloaded_files = []
-            for file in os.listdir(meta.folder_path):
+            for file in meta.folder_index.names():
                 if file.startswith(video_id) and file.lower().endswith(('.mp3', '.m4a', '.webm', '.ogg')):
                     downloaded_files.append(file)
             
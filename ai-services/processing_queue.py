@@ -1,105 +1,282 @@
 #!/usr/bin/env python3
 """
 Processing Queue Manager für AI-Services
-Verwaltet eine Queue für die sequenzielle Verarbeitung von Songs
+Verwaltet eine Queue für die Verarbeitung von Songs
+
+Jobs werden in Stufen (Download, FFmpeg, Separation, Transkription) zerlegt.
+Jeder Stufen-Typ hat einen eigenen, begrenzten Worker-Pool, sodass z.B. Song N+1
+bereits herunterlädt, während Song N getrennt wird.
+
+Wartende und laufende Jobs werden samt Meta-Checkpoint nach jeder Stufe in
+einem QueueStore (SQLite) gesichert und nach einem Neustart fortgesetzt.
 """
 
+import os
 import threading
 import time
 import logging
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, List
 from queue import Queue, Empty
 import json
 
 logger = logging.getLogger(__name__)
 
+# Standardgröße der Worker-Pools pro Stufen-Typ (überschreibbar per PIPELINE_WORKERS_<TYP>)
+DEFAULT_STAGE_WORKERS = {
+    'download': 2,
+    'ffmpeg': 2,
+    'separation': 1,
+    'transcription': 1,
+}
+
+# Maximale Anzahl gleichzeitig in der Pipeline befindlicher Jobs (PIPELINE_MAX_IN_FLIGHT)
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+class _JobRun:
+    """Laufzeitstatus eines Jobs im Stufen-Scheduler"""
+    
+    def __init__(self, job: Dict[str, Any], pipeline, stages: List):
+        self.job = job
+        self.pipeline = pipeline
+        self.stages = stages
+        self.index = 0
+        self.started_at = time.time()
+    
+    @property
+    def stage_name(self) -> Optional[str]:
+        if self.index < len(self.stages):
+            return self.stages[self.index][1]
+        return None
+
+
 class ProcessingQueue:
-    """Queue-Manager für die sequenzielle Verarbeitung von Songs"""
+    """Queue-Manager mit stufenweiser, paralleler Verarbeitung von Songs"""
     
-    def __init__(self):
-        self.queue = Queue()
+    def __init__(self, stage_workers: Optional[Dict[str, int]] = None, max_in_flight: Optional[int] = None,
+                 persist: Optional[bool] = None):
+        """
+        Initialisiert die Queue
+        
+        Args:
+            stage_workers: Worker-Anzahl pro Stufen-Typ (None = Standard/Umgebungsvariablen)
+            max_in_flight: Maximale Anzahl gleichzeitig laufender Jobs (None = PIPELINE_MAX_IN_FLIGHT)
+            persist: Jobs in QueueStore sichern (None = PROCESSING_QUEUE_PERSIST, Standard an)
+        """
+        self.queue = Queue()  # Wartende Jobs (noch keine Stufe gestartet)
         self.is_processing = False
         self.current_job = None
         self.status_callback = None
         self.queue_callback = None
-        self.worker_thread = None
+        self.worker_thread = None  # Dispatcher: nimmt Jobs aus self.queue in die Pipeline auf
         self._stop_event = threading.Event()
         self.total_jobs_added = 0  # Verfolge die Gesamtanzahl der hinzugefügten Jobs
         
-        # Starte Worker-Thread
+        self.stage_workers = {
+            stage: _env_int(f"PIPELINE_WORKERS_{stage.upper()}", count)
+            for stage, count in DEFAULT_STAGE_WORKERS.items()
+        }
+        self.stage_workers.update(stage_workers or {})
+        self.max_in_flight = max_in_flight or _env_int('PIPELINE_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)
+        
+        self.stage_queues: Dict[str, Queue] = {stage: Queue() for stage in self.stage_workers}
+        self.stage_threads: Dict[str, List[threading.Thread]] = {}
+        self._active: Dict[str, _JobRun] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._resume_meta: Dict[str, Dict[str, Any]] = {}
+        
+        if persist is None:
+            persist = os.getenv('PROCESSING_QUEUE_PERSIST', '1') != '0'
+        self.store = None
+        if persist:
+            try:
+                from queue_store import QueueStore
+                self.store = QueueStore()
+            except Exception as e:
+                logger.warning(f"⚠️ Queue-Persistenz nicht verfügbar, verwende nur In-Memory-Queue: {e}")
+        
+        # Starte Worker-Threads
         self._start_worker()
     
     def _start_worker(self):
-        """Startet den Worker-Thread für die Queue-Verarbeitung"""
+        """Startet Dispatcher und Stufen-Worker für die Queue-Verarbeitung"""
         if self.worker_thread is None or not self.worker_thread.is_alive():
             self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
             self.worker_thread.start()
-            logger.info("🔄 Processing Queue Worker gestartet")
+        for stage, count in self.stage_workers.items():
+            threads = [t for t in self.stage_threads.get(stage, []) if t.is_alive()]
+            while len(threads) < count:
+                thread = threading.Thread(
+                    target=self._stage_loop, args=(stage,), daemon=True,
+                    name=f"pipeline-{stage}-{len(threads)}"
+                )
+                thread.start()
+                threads.append(thread)
+            self.stage_threads[stage] = threads
+        logger.info(f"🔄 Processing Queue Worker gestartet (Stufen: {self.stage_workers}, max. {self.max_in_flight} Jobs parallel)")
     
     def _worker_loop(self):
-        """Hauptschleife des Worker-Threads"""
+        """Dispatcher: übernimmt wartende Jobs, sobald ein Pipeline-Slot frei ist"""
         while not self._stop_event.is_set():
             try:
+                if not self._slots.acquire(timeout=1.0):
+                    continue
+                
                 # Warte auf Job mit Timeout
                 try:
                     job = self.queue.get(timeout=1.0)
                 except Empty:
+                    self._slots.release()
                     continue
                 
                 if job is None:  # Shutdown-Signal
+                    self._slots.release()
                     break
                 
-                self._process_job(job)
+                self._start_job(job)
                 self.queue.task_done()
                 
             except Exception as e:
                 logger.error(f"❌ Fehler im Worker-Thread: {e}")
                 time.sleep(1)
     
-    def _process_job(self, job: Dict[str, Any]):
-        """Verarbeitet einen einzelnen Job"""
-        try:
-            self.current_job = job
-            self.is_processing = True
-            
-            logger.info(f"🚀 Starte Verarbeitung für Job: {job.get('id', 'unknown')}")
-            
-            # Sende Status-Update
-            if self.status_callback:
-                self.status_callback(job, 'downloading')
-            
-            # Sende Queue-Status-Update
-            if self.queue_callback:
-                self.queue_callback(self.get_status())
-            
-            # Führe die Verarbeitung aus
-            from routes.processing.modular_process import run_modular_pipeline
-            run_modular_pipeline(job)
-            
-            logger.info(f"✅ Job erfolgreich abgeschlossen: {job.get('id', 'unknown')}")
-            
-            # Sende finalen Status
-            if self.status_callback:
-                self.status_callback(job, 'finished')
+    def _stage_loop(self, stage: str):
+        """Hauptschleife eines Stufen-Workers"""
+        stage_queue = self.stage_queues[stage]
+        while not self._stop_event.is_set():
+            try:
+                try:
+                    run = stage_queue.get(timeout=1.0)
+                except Empty:
+                    continue
                 
+                if run is None:  # Shutdown-Signal
+                    break
+                
+                self._run_stage(run)
+                stage_queue.task_done()
+                
+            except Exception as e:
+                logger.error(f"❌ Fehler im {stage}-Worker: {e}")
+                time.sleep(1)
+    
+    def _store_call(self, method: str, *args):
+        """Ruft eine QueueStore-Methode auf; Fehler der Persistenz stoppen die Verarbeitung nicht"""
+        if self.store is None:
+            return None
+        try:
+            return getattr(self.store, method)(*args)
         except Exception as e:
-            logger.error(f"❌ Job fehlgeschlagen: {job.get('id', 'unknown')} - {e}")
-            
-            # Sende Fehlerstatus
+            logger.warning(f"⚠️ Queue-Persistenz fehlgeschlagen ({method}): {e}")
+            return None
+    
+    def _start_job(self, job: Dict[str, Any]):
+        """Nimmt einen Job in die Pipeline auf und reiht seine erste Stufe ein"""
+        job_id = job.get('id', 'unknown')
+        try:
+            from routes.processing.modular_process import ModularPipeline
+            pipeline = ModularPipeline(job, self._resume_meta.pop(job_id, None))
+            run = _JobRun(job, pipeline, pipeline.stages())
+        except Exception as e:
+            logger.error(f"❌ Job konnte nicht gestartet werden: {job_id} - {e}")
+            self._store_call('remove_job', job_id)
             if self.status_callback:
                 self.status_callback(job, 'failed')
-                
-        finally:
+            self._slots.release()
+            return
+        
+        with self._lock:
+            self._active[job_id] = run
+            self._update_processing_state()
+        self._store_call('update_status', job_id, 'running')
+        
+        logger.info(f"🚀 Starte Verarbeitung für Job: {job_id}")
+        
+        # Sende Status-Update
+        if self.status_callback:
+            self.status_callback(job, 'downloading')
+        
+        # Sende Queue-Status-Update
+        if self.queue_callback:
+            self.queue_callback(self.get_status())
+        
+        self._enqueue_stage(run)
+    
+    def _enqueue_stage(self, run: _JobRun):
+        stage = run.stages[run.index][0]
+        self.stage_queues.get(stage, self.stage_queues['ffmpeg']).put(run)
+    
+    def _run_stage(self, run: _JobRun):
+        """Führt die aktuelle Stufe eines Jobs aus und reiht die nächste ein"""
+        stage, name, func = run.stages[run.index]
+        job_id = run.job.get('id', 'unknown')
+        logger.info(f"▶️ Job {job_id}: Stufe '{name}' ({stage})")
+        
+        try:
+            result = run.pipeline.run_stage(name, func)
+        except Exception as e:
+            logger.error(f"❌ Job fehlgeschlagen: {job_id} - {e}")
+            run.pipeline.fail(e)
+            self._finish_job(run, success=False)
+            return
+        
+        if result is False:
+            logger.error(f"❌ Job abgebrochen in Stufe '{name}': {job_id}")
+            run.pipeline.fail()
+            self._finish_job(run, success=False)
+            return
+        
+        run.index += 1
+        meta = run.pipeline.meta
+        self._store_call('save_checkpoint', job_id, meta.to_dict() if meta is not None else None)
+        if run.index >= len(run.stages):
+            self._finish_job(run, success=True)
+        else:
+            self._enqueue_stage(run)
+    
+    def _finish_job(self, run: _JobRun, success: bool):
+        """Schließt einen Job ab und gibt seinen Pipeline-Slot frei"""
+        job = run.job
+        job_id = job.get('id', 'unknown')
+        
+        if success:
+            logger.info(f"✅ Job erfolgreich abgeschlossen: {job_id} ({time.time() - run.started_at:.1f}s)")
+        
+        # Sende finalen Status
+        if self.status_callback:
+            self.status_callback(job, 'finished' if success else 'failed')
+        
+        self._store_call('remove_job', job_id)
+        with self._lock:
+            self._active.pop(job_id, None)
+            self._update_processing_state()
+            idle = not self._active and self.queue.qsize() == 0
+        self._slots.release()
+        
+        # Sende Queue-Status-Update nach Job-Ende
+        if self.queue_callback:
+            self.queue_callback(self.get_status())
+        
+        # Wenn Queue leer ist, setze sie zurück
+        if idle:
+            self.reset_queue()
+    
+    def _update_processing_state(self):
+        """Aktualisiert is_processing/current_job (Aufruf unter self._lock)"""
+        self.is_processing = bool(self._active)
+        if self._active:
+            oldest = min(self._active.values(), key=lambda r: r.started_at)
+            self.current_job = oldest.job
+        else:
             self.current_job = None
-            self.is_processing = False
-            
-            # Sende Queue-Status-Update nach Job-Ende
-            if self.queue_callback:
-                self.queue_callback(self.get_status())
-            
-            # Wenn Queue leer ist, setze sie zurück
-            if self.queue.qsize() == 0:
-                self.reset_queue()
     
     def add_job(self, job: Dict[str, Any]) -> str:
         """
@@ -116,6 +293,7 @@ class ProcessingQueue:
         job['status'] = 'pending'
         job['added_at'] = time.time()
         
+        self._store_call('add_job', job)
         self.queue.put(job)
         self.total_jobs_added += 1  # Erhöhe die Gesamtanzahl
         
@@ -131,6 +309,33 @@ class ProcessingQueue:
         
         return job_id
     
+    def resume_pending_jobs(self) -> int:
+        """
+        Reiht nach einem Neustart alle nicht abgeschlossenen Jobs aus dem QueueStore wieder ein
+        
+        Jobs mit Meta-Checkpoint überspringen bereits erledigte Stufen, deren Ausgaben noch existieren.
+        
+        Returns:
+            Anzahl der wieder aufgenommenen Jobs
+        """
+        unfinished = self._store_call('load_unfinished') or []
+        for job, meta_dict in unfinished:
+            job_id = job.get('id')
+            if not job_id:
+                continue
+            if meta_dict:
+                self._resume_meta[job_id] = meta_dict
+            job['status'] = 'pending'
+            self._store_call('update_status', job_id, 'pending')
+            self.queue.put(job)
+            self.total_jobs_added += 1
+            logger.info(f"♻️ Job {job_id} aus persistenter Queue wieder aufgenommen"
+                        f"{' (mit Checkpoint)' if meta_dict else ''}")
+        
+        if unfinished and self.queue_callback:
+            self.queue_callback(self.get_status())
+        return len(unfinished)
+    
     def set_status_callback(self, callback: Callable):
         """Setzt die Callback-Funktion für Status-Updates"""
         self.status_callback = callback
@@ -141,9 +346,11 @@ class ProcessingQueue:
     
     def get_status(self) -> Dict[str, Any]:
         """Gibt den aktuellen Queue-Status zurück"""
+        with self._lock:
+            active = sorted(self._active.values(), key=lambda r: r.started_at)
         queue_length = self.queue.qsize()
-        is_processing = self.is_processing
-        current_job = self.current_job.get('id') if self.current_job else None
+        is_processing = bool(active)
+        current_job = active[0].job.get('id') if active else None
         
         # Verwende die Gesamtanzahl der hinzugefügten Jobs
         total_jobs = self.total_jobs_added
@@ -152,7 +359,11 @@ class ProcessingQueue:
             'queue_length': queue_length,
             'is_processing': is_processing,
             'current_job': current_job,
-            'finished_jobs': total_jobs - queue_length - (1 if is_processing else 0),
+            'active_jobs': [
+                {'id': run.job.get('id'), 'stage': run.stage_name}
+                for run in active
+            ],
+            'finished_jobs': max(0, total_jobs - queue_length - len(active)),
             'total_jobs': total_jobs
         }
     
@@ -160,8 +371,13 @@ class ProcessingQueue:
         """Beendet die Queue-Verarbeitung"""
         self._stop_event.set()
         self.queue.put(None)  # Shutdown-Signal
-        if self.worker_thread and self.worker_thread.is_alive():
-            self.worker_thread.join(timeout=5)
+        for stage, threads in self.stage_threads.items():
+            for _ in threads:
+                self.stage_queues[stage].put(None)
+        threads = [self.worker_thread] + [t for ts in self.stage_threads.values() for t in ts]
+        for thread in threads:
+            if thread and thread.is_alive():
+                thread.join(timeout=5)
         logger.info("🛑 Processing Queue heruntergefahren")
     
     def reset_queue(self):
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Persistenter Speicher für die Processing Queue
+Hält wartende/laufende Jobs und deren ProcessingMeta-Checkpoints in SQLite,
+damit die Verarbeitung nach einem Neustart fortgesetzt werden kann
+"""
+
+import os
+import json
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+from constants.paths import cache_path
+
+logger = logging.getLogger(__name__)
+
+# Standard-Speicherort der Queue-Datenbank (überschreibbar per PROCESSING_QUEUE_DB)
+DEFAULT_DB_PATH = cache_path('processing_queue.db')
+
+
+class QueueStore:
+    """SQLite-Speicher für Queue-Jobs und Meta-Checkpoints"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialisiert den Speicher
+
+        Args:
+            db_path: Pfad zur SQLite-Datei (None = PROCESSING_QUEUE_DB bzw. Standardpfad)
+        """
+        self.db_path = db_path or os.getenv('PROCESSING_QUEUE_DB', DEFAULT_DB_PATH)
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                '''CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    meta TEXT,
+                    added_at REAL,
+                    updated_at REAL
+                )'''
+            )
+
+    def add_job(self, job: Dict[str, Any]):
+        """Speichert einen neuen (wartenden) Job"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO jobs (id, job, status, meta, added_at, updated_at) '
+                'VALUES (?, ?, ?, NULL, ?, ?)',
+                (job['id'], json.dumps(job, default=str), 'pending', job.get('added_at', now), now)
+            )
+
+    def update_status(self, job_id: str, status: str):
+        """Aktualisiert den Status eines Jobs ('pending', 'running')"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?',
+                (status, time.time(), job_id)
+            )
+
+    def save_checkpoint(self, job_id: str, meta_dict: Optional[Dict[str, Any]]):
+        """
+        Speichert den Meta-Zustand nach einer abgeschlossenen Stufe
+
+        Der Fortsetzungspunkt ergibt sich allein aus steps_completed im Meta-Zustand.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE jobs SET meta = ?, updated_at = ? WHERE id = ?',
+                (json.dumps(meta_dict, default=str) if meta_dict is not None else None,
+                 time.time(), job_id)
+            )
+
+    def remove_job(self, job_id: str):
+        """Entfernt einen abgeschlossenen oder fehlgeschlagenen Job"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    def load_unfinished(self) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """
+        Lädt alle nicht abgeschlossenen Jobs in Einfüge-Reihenfolge
+
+        Returns:
+            Liste von (job, meta_dict) – meta_dict ist None, wenn noch keine Stufe abgeschlossen wurde
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job, meta FROM jobs WHERE status IN ('pending', 'running') ORDER BY added_at"
+            ).fetchall()
+
+        jobs = []
+        for job_json, meta_json in rows:
+            try:
+                jobs.append((json.loads(job_json), json.loads(meta_json) if meta_json else None))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"⚠️ Ungültiger Queue-Eintrag übersprungen: {e}")
+        return jobs
@@ -99,7 +99,9 @@ def process_custom_pipeline():
                     # 2. Audio Normalization (if selected)
                     if 'audio_normalization' in selected_steps:
                         logger.info("🔄 Starting audio normalization...")
-                        if not normalize_audio_files(meta, simple=True):
+                        if not normalize_audio_files(
+                            meta, simple=True, emit_pcm='audio_separation' in selected_steps
+                        ):
                             raise Exception("Audio normalization failed")
                         logger.info("✅ Audio normalization completed")
                     
@@ -6,4 +6,10 @@ health_bp = Blueprint('health', __name__)
 @health_bp.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'service': 'ai-services'})
+    response = {'status': 'healthy', 'service': 'ai-services'}
+    try:
+        from modules.transcriber_service import get_transcriber_service
+        response['transcriber'] = get_transcriber_service().get_status()
+    except Exception as e:
+        response['transcriber'] = {'state': 'unavailable', 'error': str(e)}
+    return jsonify(response)
@@ -84,7 +84,7 @@ def process_magic_song(folder_name):
         success = True
         try:
             # 1. Audio normalization
-            if not normalize_audio_files(meta, simple=True):
+            if not normalize_audio_files(meta, simple=True, emit_pcm=True):
                 raise Exception("Audio normalization failed")
             
             # 2. Audio separation
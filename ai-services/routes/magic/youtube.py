@@ -192,7 +192,7 @@ def process_magic_youtube_from_url(folder_name):
         success = True
         try:
             # 1. Audio extraction/normalization
-            if not normalize_audio_files(meta, simple=True):
+            if not normalize_audio_files(meta, simple=True, emit_pcm=True):
                 raise Exception("Audio extraction/normalization failed")
             
             # 2. Audio separation
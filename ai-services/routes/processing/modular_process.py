@@ -75,169 +75,216 @@ def modular_process(folder_name):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-def run_modular_pipeline(job_data):
-    """Führt die modulare Pipeline für einen Job aus"""
-    try:
-        from modules import (
-            ProcessingMode,
-            create_meta_from_file_path,
-            ensure_source_files,
-            separate_audio,
-            dereverb_audio,
-            transcribe_audio,
-            cleanup_files
-        )
-        from modules.logger_utils import send_processing_status, meta_to_short_dict, log_start
-
-        folder_name = job_data['folder_name']
-        folder_path = job_data['folder_path']
-        base_dir = job_data['base_dir']
-        song_type = job_data['song_type']
-        artist = job_data['artist']
-        title = job_data['title']
+# Stufen-Typen für den ProcessingQueue-Scheduler (je Typ ein eigener Worker-Pool)
+STAGE_DOWNLOAD = 'download'
+STAGE_FFMPEG = 'ffmpeg'
+STAGE_SEPARATION = 'separation'
+STAGE_TRANSCRIPTION = 'transcription'
+
+
+class ModularPipeline:
+    """
+    Modulare Pipeline eines Jobs, zerlegt in einzelne Stufen
+
+    Jede Stufe ist ein Tupel (stage_type, name, callable). Die Callables teilen sich
+    das Meta-Objekt und geben False zurück, wenn die Pipeline abgebrochen werden soll.
+    Der ProcessingQueue-Scheduler führt die Stufen verschiedener Jobs parallel aus,
+    run() führt sie sequenziell aus.
+
+    Wird ein Meta-Checkpoint (meta_dict) übergeben, überspringt run_stage() alle
+    Stufen, die laut steps_completed erledigt sind und deren Ausgaben noch existieren.
+    """
+
+    def __init__(self, job_data, meta_dict=None):
+        self.job_data = job_data
+        self.meta = None
+        if meta_dict:
+            from modules.meta import ProcessingMeta
+            self.meta = ProcessingMeta.from_dict(meta_dict)
+
+    def _send_status(self, status):
+        from modules.logger_utils import send_processing_status
+        try:
+            send_processing_status(self.meta, status)
+        except Exception:
+            pass
+
+    def stages(self):
+        """Liefert die Stufen der Pipeline abhängig vom Song-Typ"""
+        song_type = self.job_data['song_type']
+        stages = [(STAGE_DOWNLOAD, 'ensure_source_files', self._ensure_source_files)]
+
+        if song_type == 'magic-videos':
+            # Magic-Videos-Pipeline: ensure_source_files → audio_separation → dereverb → transcription → cleanup
+            stages += [
+                (STAGE_SEPARATION, 'audio_separation', self._separate_audio),
+                (STAGE_SEPARATION, 'audio_dereverb', self._dereverb_audio),
+                (STAGE_TRANSCRIPTION, 'transcription', self._transcribe_audio),
+            ]
+        elif song_type == 'magic-songs':
+            # Magic-Songs-Pipeline: ensure_source_files → audio_separation → dereverb → transcription → remux_videos → cleanup
+            stages += [
+                (STAGE_SEPARATION, 'audio_separation', self._separate_audio),
+                (STAGE_SEPARATION, 'audio_dereverb', self._dereverb_audio),
+                (STAGE_TRANSCRIPTION, 'transcription', self._transcribe_audio),
+                (STAGE_FFMPEG, 'video_remuxing', self._remux_videos),
+            ]
+        else:
+            # Ultrastar-Pipeline: ensure_source_files → separate_audio → remux_videos (nur wenn Video zu Beginn fehlte) → cleanup
+            stages += [
+                (STAGE_SEPARATION, 'audio_separation', self._separate_audio),
+                (STAGE_FFMPEG, 'video_remuxing', self._remux_videos_if_downloaded),
+            ]
+
+        # Cleanup und Finish (für alle Song-Typen)
+        stages.append((STAGE_FFMPEG, 'finish', self._cleanup_and_finish))
+        return stages
+
+    def is_stage_done(self, name):
+        """Prüft, ob eine Stufe laut Checkpoint erledigt ist und ihre Ausgaben noch vorhanden sind"""
+        if self.meta is None or name not in self.meta.steps_completed:
+            return False
+        outputs = self.meta.metadata.get('step_outputs', {}).get(name, [])
+        return all(os.path.exists(path) for path in outputs)
+
+    def run_stage(self, name, stage):
+        """Führt eine Stufe aus (oder überspringt sie) und merkt sich deren Ausgabedateien"""
+        if self.is_stage_done(name):
+            logger.info(f"⏭️ Überspringe Stufe '{name}' (bereits abgeschlossen, Ausgaben vorhanden)")
+            return True
+
+        outputs_before = set(self.meta.output_files) if self.meta else set()
+        result = stage()
+        if self.meta is not None:
+            new_outputs = [path for path in self.meta.output_files if path not in outputs_before]
+            self.meta.metadata.setdefault('step_outputs', {})[name] = new_outputs
+        return result
+
+    def _ensure_source_files(self):
+        from modules import ProcessingMode, create_meta_from_file_path, ensure_source_files
+        from modules.logger_utils import log_start
+
+        if self.meta is not None:
+            # Fortsetzung nach Neustart: Meta aus dem Checkpoint weiterverwenden
+            log_start('ensure_source_files.process_meta', self.meta)
+            self._send_status('downloading')
+            return bool(ensure_source_files(self.meta))
+
+        folder_name = self.job_data['folder_name']
+        folder_path = self.job_data['folder_path']
+        base_dir = self.job_data['base_dir']
 
         # Meta initialisieren - verwende den korrekten Ordner-Pfad
         meta = create_meta_from_file_path(folder_path, base_dir, ProcessingMode.ULTRASTAR)
-        
+
         # Korrigiere die Meta-Daten für den spezifischen Song-Ordner
         meta.folder_name = folder_name
         meta.folder_path = folder_path
-        meta.artist = artist
-        meta.title = title
-        
+        meta.artist = self.job_data['artist']
+        meta.title = self.job_data['title']
+        self.meta = meta
+
         logger.info(f"📁 Korrigierte Meta-Daten: artist='{meta.artist}', title='{meta.title}', folder_path='{meta.folder_path}'")
-        
+
         # 1) Ensure Source Files (neues Modul)
         log_start('ensure_source_files.process_meta', meta)
-        try:
-            send_processing_status(meta, 'downloading')
-        except Exception:
-            pass
-        
+        self._send_status('downloading')
+
         if not ensure_source_files(meta):
             logger.error("❌ Ensure source files failed, pipeline aborted")
-            try: 
-                send_processing_status(meta, 'failed')
-            except Exception: pass
-            return
-        
-        # Pipeline je nach Song-Typ
-        if song_type == 'magic-videos':
-            # Magic-Videos-Pipeline: ensure_source_files → audio_separation → transcription → cleanup
-            
-            # 2) Audio Separation
-            logger.info("🔄 Starting audio separation...")
-            try:
-                send_processing_status(meta, 'separating')
-            except Exception:
-                pass
-            separate_audio(meta)
-            logger.info("✅ Audio separation completed")
-            
-            # 3) Dereverb (vor Transcription)
-            logger.info("🔄 Starting dereverb...")
-            try:
-                send_processing_status(meta, 'dereverbing')
-            except Exception:
-                pass
-            dereverb_audio(meta)
-            logger.info("✅ Dereverb completed")
-            
-            # 4) Transcription
-            logger.info("🔄 Starting transcription...")
-            try:
-                send_processing_status(meta, 'transcribing')
-            except Exception:
-                pass
-            transcribe_audio(meta)
-            logger.info("✅ Transcription completed")
-            
-        elif song_type == 'magic-songs':
-            # Magic-Songs-Pipeline: ensure_source_files → audio_separation → transcription → remux_videos → cleanup
-            from modules import remux_videos
-            
-            # 2) Audio Separation
-            logger.info("🔄 Starting audio separation...")
-            try:
-                send_processing_status(meta, 'separating')
-            except Exception:
-                pass
-            separate_audio(meta)
-            logger.info("✅ Audio separation completed")
-            
-            # 3) Dereverb (vor Transcription)
-            logger.info("🔄 Starting dereverb...")
-            try:
-                send_processing_status(meta, 'dereverbing')
-            except Exception:
-                pass
-            dereverb_audio(meta)
-            logger.info("✅ Dereverb completed")
-            
-            # 4) Transcription
-            logger.info("🔄 Starting transcription...")
-            try:
-                send_processing_status(meta, 'transcribing')
-            except Exception:
-                pass
-            transcribe_audio(meta)
-            logger.info("✅ Transcription completed")
-            
-            # 4) Video Remuxing (Audio entfernen)
-            logger.info("🔄 Starting video remuxing...")
-            remux_videos(meta, remove_audio=True)
-            logger.info("✅ Video remuxing completed")
-            
-        else:
-            # Ultrastar-Pipeline: ensure_source_files → separate_audio → remux_videos (nur wenn Video zu Beginn fehlte) → cleanup
-            from modules import remux_videos
-            
-            # 2) Audio Separation
-            logger.info("🔄 Starting audio separation...")
-            try:
-                send_processing_status(meta, 'separating')
-            except Exception:
-                pass
-            separate_audio(meta)
-            logger.info("✅ Audio separation completed")
-            
-            # 3) Video Remuxing (nur wenn Video zu Beginn fehlte)
-            # Prüfe ob Video zu Beginn vorhanden war
-            initial_files = meta.metadata.get('initial_files', {})
-            had_video_at_start = initial_files.get('video', False)
-            
-            if not had_video_at_start:
-                logger.info("🔄 Starting video remuxing (Video wurde heruntergeladen)...")
-                remux_videos(meta, remove_audio=True)
-                logger.info("✅ Video remuxing completed")
-            else:
-                logger.info("⏭️ Skipping video remuxing (Video war bereits vorhanden)")
-        
-        # 4) Cleanup (für alle Song-Typen)
+            return False
+        return True
+
+    def _separate_audio(self):
+        from modules import separate_audio
+        logger.info("🔄 Starting audio separation...")
+        self._send_status('separating')
+        separate_audio(self.meta)
+        logger.info("✅ Audio separation completed")
+        return True
+
+    def _dereverb_audio(self):
+        from modules import dereverb_audio
+        logger.info("🔄 Starting dereverb...")
+        self._send_status('dereverbing')
+        dereverb_audio(self.meta)
+        logger.info("✅ Dereverb completed")
+        return True
+
+    def _transcribe_audio(self):
+        from modules import transcribe_audio
+        logger.info("🔄 Starting transcription...")
+        self._send_status('transcribing')
+        transcribe_audio(self.meta)
+        logger.info("✅ Transcription completed")
+        return True
+
+    def _remux_videos(self):
+        from modules import remux_videos
+        # Video Remuxing (Audio entfernen)
+        logger.info("🔄 Starting video remuxing...")
+        remux_videos(self.meta, remove_audio=True)
+        logger.info("✅ Video remuxing completed")
+        return True
+
+    def _remux_videos_if_downloaded(self):
+        # Prüfe ob Video zu Beginn vorhanden war
+        initial_files = self.meta.metadata.get('initial_files', {})
+        had_video_at_start = initial_files.get('video', False)
+
+        if not had_video_at_start:
+            logger.info("🔄 Video wurde heruntergeladen, Remuxing erforderlich")
+            return self._remux_videos()
+        logger.info("⏭️ Skipping video remuxing (Video war bereits vorhanden)")
+        return True
+
+    def _cleanup_and_finish(self):
+        from modules import cleanup_files
+        from modules.finish import finish_processing
+
+        # Cleanup
         logger.info("🔄 Starting cleanup...")
         try:
-            cleanup_files(meta)
+            cleanup_files(self.meta)
             logger.info("✅ Cleanup completed")
         except Exception as cleanup_error:
             logger.error(f"❌ Cleanup fehlgeschlagen, aber Pipeline wird fortgesetzt: {cleanup_error}", exc_info=True)
             # Pipeline wird trotzdem fortgesetzt, da Cleanup nicht kritisch ist
-        
-        # 5) Finish - setze korrekte API-URL
+
+        # Finish - setze korrekte API-URL
         logger.info("🔄 Starting finish...")
-        from modules.finish import finish_processing
-        finish_processing(meta)
+        finish_processing(self.meta)
         logger.info("✅ Finish completed")
 
         logger.info("🎉 Modular pipeline completed successfully, sending finished status...")
         try:
-            send_processing_status(meta, 'finished')
+            from modules.logger_utils import send_processing_status
+            send_processing_status(self.meta, 'finished')
             logger.info("✅ Finished status sent successfully")
         except Exception as e:
             logger.error(f"❌ Failed to send finished status: {e}")
-            
-    except Exception as e:
-        logger.error(f"Error in modular pipeline: {e}")
+        return True
+
+    def fail(self, error=None):
+        """Meldet den Abbruch der Pipeline"""
+        if error is not None:
+            logger.error(f"Error in modular pipeline: {error}")
+        if self.meta is not None:
+            self._send_status('failed')
+
+    def run(self):
+        """Führt alle Stufen sequenziell aus; gibt True zurück, wenn die Pipeline vollständig durchlief"""
         try:
-            send_processing_status(meta, 'failed')
-        except Exception:
-            pass
+            for _, name, stage in self.stages():
+                if self.run_stage(name, stage) is False:
+                    self.fail()
+                    return False
+            return True
+        except Exception as e:
+            self.fail(e)
+            return False
+
+
+def run_modular_pipeline(job_data):
+    """Führt die modulare Pipeline für einen Job aus"""
+    return ModularPipeline(job_data).run()
@@ -62,6 +62,14 @@ def recreate(folder_name):
             meta.artist = 'Unknown Artist'
             meta.title = folder_name
         
+        # Re-Render: only regenerate the UltraStar file from the cached transcript (no separation, no Whisper)
+        if data.get('rerender'):
+            from modules import rerender_transcription
+            logger.info(f"🔄 Re-render request: {folder_name} ({song_type})")
+            if rerender_transcription(meta):
+                return jsonify({'success': True, 'message': 'UltraStar file re-rendered from cached transcript'})
+            return jsonify({'success': False, 'error': 'No cached transcript for this song'}), 404
+        
         logger.info(f"🔄 Recreate request: {folder_name} ({song_type})")
         
         # Start processing in background thread
@@ -186,7 +186,7 @@ def process_usdb_pipeline(folder_name):
 
                 # 3) Audio Normalization
                 logger.info("🔄 Starting audio normalization...")
-                normalize_audio_files(meta, simple=True)
+                normalize_audio_files(meta, simple=True, emit_pcm=True)
                 logger.info("✅ Audio normalization completed")
                 
                 # 4) Audio Separation
@@ -22,17 +22,34 @@ def get_video_info(folder_name):
         if not os.path.exists(folder_path):
             return jsonify({'error': 'Folder not found'}), 404
         
-        # Find video files
+        from modules.media_probe import get_media_probe
+        
+        # Find video files (probed in one batch, cached per path/size/mtime)
+        video_extensions = ('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.mpg', '.mpeg')
+        probed = get_media_probe().probe_folder(folder_path, video_extensions)
         video_files = []
         for file in os.listdir(folder_path):
-            if file.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.mpg', '.mpeg')):
+            if file.lower().endswith(video_extensions):
                 file_path = os.path.join(folder_path, file)
                 file_size = os.path.getsize(file_path)
-                video_files.append({
+                entry = {
                     'filename': file,
                     'extension': os.path.splitext(file)[1].lower(),
                     'size': file_size
-                })
+                }
+                info = probed.get(file)
+                if info is not None:
+                    video_stream = info.video
+                    entry.update({
+                        'duration': info.duration,
+                        'format': info.format_name,
+                        'video_codec': video_stream.codec_name if video_stream else '',
+                        'width': video_stream.width if video_stream else 0,
+                        'height': video_stream.height if video_stream else 0,
+                        'fps': video_stream.fps if video_stream else 0,
+                        'has_audio': info.has_audio
+                    })
+                video_files.append(entry)
         
         return jsonify({
             'folder_name': folder_name,
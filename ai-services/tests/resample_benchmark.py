@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark der Resampling-Profile für die UVR5-Multi-Band-Pipeline
+
+Misst pro Profil die Laufzeit von Frontend (Resampling + Multi-Band-STFT) und
+Rekonstruktion (ISTFT + Resampling-Kette) sowie das SNR gegenüber dem Profil
+'modelparams' (bisheriges Verhalten). Mit --model wird zusätzlich eine echte
+VR-Separation pro Profil ausgeführt und das SNR der Vocals verglichen.
+
+Beispielaufruf (PowerShell):
+  python ai-services/tests/resample_benchmark.py "D:\\Arbeit\\Karaoke\\songs\\magic-songs\\Artist - Title\\song.mp3"
+  python ai-services/tests/resample_benchmark.py clip.mp3 --profiles soxr_hq poly --model ai-services/assets/uvr5_weights/HP5_only_main_vocal.pth
+
+Optionale Umgebungsvariablen:
+  BENCH_DEVICE=cpu            # Gerät für --model (Standard: cpu)
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger("resample_benchmark")
+
+REFERENCE_PROFILE = "modelparams"
+
+
+def snr_db(reference, candidate):
+    """SNR von candidate gegenüber reference in dB (Länge auf das Minimum gekürzt)"""
+    reference = np.asarray(reference)
+    candidate = np.asarray(candidate)
+    n = min(reference.shape[-1], candidate.shape[-1])
+    reference = reference[..., :n].astype(np.complex128 if np.iscomplexobj(reference) else np.float64)
+    noise = reference - candidate[..., :n]
+    noise_power = float(np.sum(np.abs(noise) ** 2))
+    if noise_power == 0:
+        return float('inf')
+    return 10 * np.log10(max(float(np.sum(np.abs(reference) ** 2)), 1e-30) / noise_power)
+
+
+def run_profile(spec_utils, mp, resampler, wave, wave_sr):
+    """Frontend und Rekonstruktion mit synthetischer Maske; liefert Ergebnisse und Zeiten"""
+    bands_n = len(mp.param["band"])
+    bp = mp.param["band"][bands_n]
+
+    start = time.perf_counter()
+    audio = resampler.resample(wave, wave_sr, bp["sr"], res_type=bp["res_type"])
+    X_spec_s = spec_utils.multiband_spectrograms(audio, mp, resampler=resampler)
+    X_spec_m = spec_utils.combine_spectrograms(X_spec_s, mp)
+    front_seconds = time.perf_counter() - start
+
+    X_mag = np.abs(X_spec_m)
+    y_spec_m = (X_mag / (X_mag + X_mag.mean()) * X_mag) * np.exp(np.complex64(1j) * np.angle(X_spec_m))
+
+    start = time.perf_counter()
+    y_wave = spec_utils.cmb_spectrogram_to_wave(y_spec_m, mp, resampler=resampler).T
+    back_seconds = time.perf_counter() - start
+    return X_spec_m, y_wave, front_seconds, back_seconds
+
+
+def run_separation(model_path, profile, audio_path, device):
+    """Echte VR-Separation mit einem Resampling-Profil (ohne Abschnitte)"""
+    from vr import AudioPre, path_audio_multi
+
+    pre = AudioPre(agg=10, model_path=model_path, device=device, is_half=False)
+    pre.data["resample_profile"] = profile
+    start = time.perf_counter()
+    result = path_audio_multi([{"model": pre, "keep": ("vocals",)}], audio_path, chunk_seconds=0)[0]
+    return np.asarray(result["vocals"]).T, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resampling-Profile der UVR5-Pipeline vergleichen")
+    parser.add_argument("audio", help="Referenz-Audiodatei")
+    parser.add_argument("--profiles", nargs="*", help="Profile (Standard: alle)")
+    parser.add_argument("--modelparams", default="4band_v2", help="modelparams-Name (Standard: 4band_v2)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Länge des Ausschnitts in Sekunden")
+    parser.add_argument("--model", help="Optional: VR-Modell (.pth) für echtes Separations-SNR")
+    args = parser.parse_args()
+
+    audio_path = Path(args.audio).resolve()
+    if not audio_path.exists():
+        print(f"File not found: {audio_path}")
+        sys.exit(2)
+
+    # uvr5 in den Pfad, damit lib_v5 und vr wie im Service importiert werden
+    uvr5_dir = Path(__file__).resolve().parent.parent / "uvr5"
+    if str(uvr5_dir) not in sys.path:
+        sys.path.insert(0, str(uvr5_dir))
+
+    import librosa
+    from lib_v5 import spec_utils
+    from lib_v5.model_param_init import ModelParameters
+    from lib_v5.resampling import RESAMPLE_PROFILES, Resampler
+
+    profiles = args.profiles or list(RESAMPLE_PROFILES)
+    if REFERENCE_PROFILE not in profiles:
+        profiles.insert(0, REFERENCE_PROFILE)
+    else:
+        profiles.remove(REFERENCE_PROFILE)
+        profiles.insert(0, REFERENCE_PROFILE)
+
+    mp = ModelParameters(str(uvr5_dir / "lib_v5" / "modelparams" / f"{args.modelparams}.json"))
+    wave, wave_sr = librosa.load(str(audio_path), sr=None, mono=False, duration=args.seconds)
+    if wave.ndim == 1:
+        wave = np.stack((wave, wave))
+    logger.info(f"Input: {audio_path} ({wave.shape[1] / wave_sr:.1f}s @ {wave_sr} Hz, {args.modelparams})")
+
+    # Separation braucht eine Datei; Ausschnitt als WAV ablegen
+    clip_path = None
+    if args.model:
+        import soundfile as sf
+        clip_path = str(audio_path.with_suffix('.resample-bench.wav'))
+        sf.write(clip_path, wave.T, wave_sr)
+
+    results = []
+    reference = None
+    for profile in profiles:
+        resampler = Resampler(profile)
+        try:
+            X_spec_m, y_wave, front_seconds, back_seconds = run_profile(spec_utils, mp, resampler, wave, wave_sr)
+        except Exception as e:
+            results.append({'profile': profile, 'error': str(e)})
+            continue
+        entry = {
+            'profile': profile,
+            'front_seconds': round(front_seconds, 3),
+            'back_seconds': round(back_seconds, 3),
+        }
+        if args.model:
+            vocals, separation_seconds = run_separation(args.model, profile, clip_path, os.getenv('BENCH_DEVICE', 'cpu'))
+            entry['separation_seconds'] = round(separation_seconds, 2)
+        else:
+            vocals = None
+        if reference is None:
+            reference = (X_spec_m, y_wave, vocals)
+        else:
+            entry['front_snr_db'] = round(snr_db(reference[0], X_spec_m), 1)
+            entry['wave_snr_db'] = round(snr_db(reference[1], y_wave), 1)
+            if vocals is not None:
+                entry['vocals_snr_db'] = round(snr_db(reference[2], vocals), 1)
+        results.append(entry)
+
+    if clip_path:
+        os.remove(clip_path)
+
+    print()
+    print(f"{'Profil':<12} {'Frontend':>9} {'Rekonstr.':>10} {'SNR Spek.':>10} {'SNR Welle':>10} {'SNR Vocals':>11}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['profile']:<12} FEHLER: {r['error']}")
+            continue
+        print(f"{r['profile']:<12} {r['front_seconds']:>8}s {r['back_seconds']:>9}s "
+              f"{r.get('front_snr_db', '-'):>10} {r.get('wave_snr_db', '-'):>10} {r.get('vocals_snr_db', '-'):>11}")
+
+    out_path = audio_path.with_suffix('.resample-benchmark.json')
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"Ergebnisse gespeichert: {out_path}")
+
+
+if __name__ == '__main__':
+    main()
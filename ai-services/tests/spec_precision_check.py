@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Numerischer Äquivalenz-Check für die UVR5-Spektrogramm-Pipeline (float32 gegen float64)
+
+Führt multiband_spectrograms -> combine_spectrograms -> Maske -> mirroring ->
+cmb_spectrogram_to_wave einmal in doppelter Präzision (Referenz) und einmal im
+float32/complex64-Pfad aus und gibt pro Stufe das SNR sowie den Speicherbedarf aus.
+Statt eines Netzes wird eine feste, glatte Maske verwendet, damit der Check ohne
+Modell-Dateien und GPU läuft.
+
+Beispielaufruf (PowerShell):
+  python ai-services/tests/spec_precision_check.py "D:\\Arbeit\\Karaoke\\songs\\magic-songs\\Artist - Title\\song.mp3"
+  python ai-services/tests/spec_precision_check.py clip.mp3 --modelparams 4band_v3 --seconds 60 --min-snr 70
+
+Exit-Code 1, wenn das SNR der rekonstruierten Wellenform unter --min-snr liegt.
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger("spec_precision_check")
+
+
+def snr_db(reference, candidate):
+    """SNR von candidate gegenüber reference in dB"""
+    reference = np.asarray(reference, dtype=np.complex128 if np.iscomplexobj(reference) else np.float64)
+    n = min(reference.shape[-1], np.asarray(candidate).shape[-1])
+    reference = reference[..., :n]
+    noise = reference - np.asarray(candidate)[..., :n]
+    signal_power = float(np.sum(np.abs(reference) ** 2))
+    noise_power = float(np.sum(np.abs(noise) ** 2))
+    if noise_power == 0:
+        return float('inf')
+    return 10 * np.log10(max(signal_power, 1e-30) / noise_power)
+
+
+def run_pipeline(spec_utils, mp, wave):
+    """Multi-Band-Pipeline mit synthetischer Maske; Präzision folgt dem dtype von wave"""
+    stages = {}
+    start = time.perf_counter()
+    bands_n = len(mp.param["band"])
+    X_spec_s = spec_utils.multiband_spectrograms(wave, mp)
+    for d in range(bands_n, 0, -1):
+        stages[f"band{d}"] = X_spec_s[d]
+
+    bp = mp.param["band"][bands_n]
+    input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (mp.param["pre_filter_stop"] - mp.param["pre_filter_start"])
+    input_high_end = X_spec_s[bands_n][:, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :]
+
+    X_spec_m = spec_utils.combine_spectrograms(X_spec_s, mp)
+    stages["combined"] = X_spec_m
+
+    # Glatte Maske wie eine Netz-Vorhersage: Magnitude * Maske, Phase der Eingabe
+    X_mag = np.abs(X_spec_m)
+    mask = X_mag / (X_mag + X_mag.mean())
+    X_phase = np.exp(np.complex64(1j) * np.angle(X_spec_m))
+    y_spec_m = (mask * X_mag) * X_phase
+    stages["masked"] = y_spec_m
+
+    high_end = spec_utils.mirroring("mirroring", y_spec_m, input_high_end, mp)
+    stages["mirroring"] = high_end
+    stages["wave"] = spec_utils.cmb_spectrogram_to_wave(y_spec_m, mp, input_high_end_h, high_end).T
+    elapsed = time.perf_counter() - start
+    peak_bytes = sum(spec.nbytes for spec in X_spec_s.values()) + X_spec_m.nbytes + y_spec_m.nbytes + X_phase.nbytes
+    return stages, elapsed, peak_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="float32-Äquivalenz der UVR5-Spektrogramm-Pipeline")
+    parser.add_argument("audio", help="Referenz-Audiodatei")
+    parser.add_argument("--modelparams", default="4band_v2", help="modelparams-Name (Standard: 4band_v2)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="Länge des Ausschnitts in Sekunden")
+    parser.add_argument("--offset", type=float, default=0.0, help="Startposition in Sekunden")
+    parser.add_argument("--min-snr", type=float, default=60.0, help="Mindest-SNR der Wellenform in dB")
+    args = parser.parse_args()
+
+    audio_path = Path(args.audio).resolve()
+    if not audio_path.exists():
+        print(f"File not found: {audio_path}")
+        sys.exit(2)
+
+    # uvr5 in den Pfad, damit lib_v5 wie in vr.py importiert wird
+    uvr5_dir = Path(__file__).resolve().parent.parent / "uvr5"
+    if str(uvr5_dir) not in sys.path:
+        sys.path.insert(0, str(uvr5_dir))
+
+    import librosa
+    from lib_v5 import spec_utils
+    from lib_v5.model_param_init import ModelParameters
+
+    mp = ModelParameters(str(uvr5_dir / "lib_v5" / "modelparams" / f"{args.modelparams}.json"))
+    bp = mp.param["band"][len(mp.param["band"])]
+    wave, _ = librosa.load(
+        str(audio_path), sr=bp["sr"], mono=False, offset=args.offset, duration=args.seconds,
+        dtype=np.float64, res_type=bp["res_type"],
+    )
+    if wave.ndim == 1:
+        wave = np.stack((wave, wave))
+    logger.info(f"Input: {audio_path} ({wave.shape[1] / bp['sr']:.1f}s, {args.modelparams})")
+
+    reference, ref_seconds, ref_bytes = run_pipeline(spec_utils, mp, wave)
+    single, single_seconds, single_bytes = run_pipeline(spec_utils, mp, wave.astype(np.float32))
+
+    print()
+    print(f"{'Stufe':<12} {'dtype':<10} {'SNR (dB)':>10}")
+    for name, ref_value in reference.items():
+        value = single[name]
+        print(f"{name:<12} {str(value.dtype):<10} {snr_db(ref_value, value):>10.1f}")
+    print()
+    print(f"Laufzeit:  float64 {ref_seconds:.2f}s, float32 {single_seconds:.2f}s")
+    print(f"Speicher:  float64 {ref_bytes / 1024 ** 2:.0f} MB, float32 {single_bytes / 1024 ** 2:.0f} MB (Spektrogramme)")
+
+    wave_snr = snr_db(reference["wave"], single["wave"])
+    if wave_snr < args.min_snr:
+        logger.error(f"SNR der Wellenform {wave_snr:.1f} dB liegt unter {args.min_snr} dB")
+        sys.exit(1)
+    logger.info(f"SNR der Wellenform {wave_snr:.1f} dB (Mindestwert {args.min_snr} dB)")
+
+
+if __name__ == '__main__':
+    main()
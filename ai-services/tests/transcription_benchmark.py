@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark für Transkriptions-Profile (faster-whisper)
+
+Misst pro Profil Ladezeit und Real-Time-Factor (RTF) auf einem Referenz-Clip.
+RTF < 1 bedeutet schneller als Echtzeit.
+
+Beispielaufruf (PowerShell):
+  python ai-services/tests/transcription_benchmark.py "D:\\Arbeit\\Karaoke\\songs\\magic-songs\\Artist - Title\\song.vocals.mp3"
+  python ai-services/tests/transcription_benchmark.py clip.mp3 cpu_int8 cpu_fast cpu_realtime
+
+Optionale Umgebungsvariablen:
+  BENCH_DEVICE=cpu            # erzwingt CPU (Standard: auto)
+"""
+
+import os
+import sys
+import json
+import logging
+from pathlib import Path
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger("transcription_benchmark")
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python ai-services/tests/transcription_benchmark.py <path-to-audio> [profile ...]")
+        sys.exit(1)
+
+    audio_path = Path(sys.argv[1]).resolve()
+    if not audio_path.exists():
+        print(f"File not found: {audio_path}")
+        sys.exit(2)
+
+    # Für modulare Imports sicherstellen, dass ai-services im Pfad liegt
+    ai_services_dir = Path(__file__).resolve().parent.parent
+    if str(ai_services_dir) not in sys.path:
+        sys.path.insert(0, str(ai_services_dir))
+
+    from modules.transcription import benchmark_transcription_profiles
+
+    profiles = sys.argv[2:] or None
+    results = benchmark_transcription_profiles(str(audio_path), profiles, device=os.getenv('BENCH_DEVICE', 'auto'))
+
+    print()
+    print(f"{'Profil':<14} {'Modell':<16} {'compute_type':<13} {'Beam':>4} {'VAD':>4} {'Laden':>7} {'RTF':>7} {'Segm.':>6}")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['profile']:<14} FEHLER: {r['error']}")
+            continue
+        print(f"{r['profile']:<14} {r['model']:<16} {r['compute_type']:<13} {r['beam_size']:>4} "
+              f"{'ja' if r['vad_filter'] else 'nein':>4} {r['load_seconds']:>6}s {r['rtf']:>7} {r['segments']:>6}")
+
+    out_path = audio_path.with_suffix('.benchmark.json')
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    logger.info(f"Ergebnisse gespeichert: {out_path}")
+
+if __name__ == '__main__':
+    main()
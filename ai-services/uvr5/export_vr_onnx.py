@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Exportiert die VR-Modelle (.pth) nach ONNX für das ONNX-Runtime-Backend von AudioPre
+
+Pro Checkpoint entstehen neben der .pth eine .onnx (Maske mit dynamischer Batch-
+und Zeitachse) und eine .onnx.json (Modelltyp, modelparams, Offset, Quell-Signatur).
+Aktiviert wird das Backend per UVR5_VR_BACKEND=onnx; ohne passenden Export wird
+automatisch PyTorch verwendet.
+
+Beispielaufruf (PowerShell):
+  python ai-services/uvr5/export_vr_onnx.py
+  python ai-services/uvr5/export_vr_onnx.py ai-services/assets/uvr5_weights/HP5_only_main_vocal.pth --verify
+
+Optionale Umgebungsvariablen (Laufzeit):
+  UVR5_VR_BACKEND=onnx        # VR-Modelle über ONNX Runtime (CPU) ausführen
+  UVR5_VR_BACKEND=onnx_int8   # INT8-Variante (siehe quantize_vr_onnx.py)
+  UVR5_ORT_THREADS=8          # Intra-Op-Threads von ONNX Runtime (Standard: automatisch)
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+import torch
+from torch import nn
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from onnx_vr import OnnxVRModel, onnx_paths, source_signature
+from vr import AudioPre, AudioPreDeEcho
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger("export_vr_onnx")
+
+DEFAULT_WEIGHTS_DIR = os.path.join(os.path.dirname(current_dir), "assets", "uvr5_weights")
+
+
+class _MaskNet(nn.Module):
+    """Exportiert nur die Maske (CascadedASPPNet.forward_mask bzw. CascadedNet.forward)"""
+
+    def __init__(self, net):
+        super().__init__()
+        self.net = net
+
+    def forward(self, x):
+        if hasattr(self.net, "forward_mask"):
+            return self.net.forward_mask(x)
+        return self.net.forward(x)
+
+
+def model_kind(model_path):
+    """AudioPreDeEcho für DeEcho/DeReverb-Modelle, sonst AudioPre (wie in RVC)"""
+    name = os.path.basename(model_path)
+    return "AudioPreDeEcho" if ("DeEcho" in name or "DeReverb" in name) else "AudioPre"
+
+
+def export_model(model_path, opset=17, verify=False):
+    """Exportiert einen Checkpoint; liefert den Pfad der .onnx-Datei"""
+    kind = model_kind(model_path)
+    cls = AudioPreDeEcho if kind == "AudioPreDeEcho" else AudioPre
+    pre = cls(agg=10, model_path=model_path, device="cpu", is_half=False, backend="torch")
+    net = pre.model.float().eval()
+    onnx_path, info_path = onnx_paths(model_path)
+
+    dummy = torch.rand(1, 2, pre.mp.param["bins"] + 1, pre.data["window_size"])
+    start = time.time()
+    with torch.no_grad():
+        torch.onnx.export(
+            _MaskNet(net),
+            (dummy,),
+            onnx_path,
+            input_names=["input"],
+            output_names=["mask"],
+            dynamic_axes={"input": {0: "batch", 3: "frames"}, "mask": {0: "batch", 3: "frames"}},
+            opset_version=opset,
+            do_constant_folding=True,
+            dynamo=False,
+        )
+    info = {
+        "kind": kind,
+        "modelparams": cls.modelparams,
+        "offset": net.offset,
+        "apply_aggressiveness": kind == "AudioPre",
+        "bins": pre.mp.param["bins"] + 1,
+        "window_size": pre.data["window_size"],
+        "opset": opset,
+        "source": source_signature(model_path),
+        "torch_version": torch.__version__,
+        "exported_at": time.time(),
+    }
+    with open(info_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    logger.info(f"✅ {os.path.basename(onnx_path)} exportiert ({time.time() - start:.1f}s, {kind}, {cls.modelparams})")
+
+    if verify:
+        verify_model(net, OnnxVRModel(onnx_path, info), info)
+    return onnx_path
+
+
+def verify_model(net, onnx_model, info):
+    """Vergleicht PyTorch und ONNX Runtime auf Zufallseingaben (inkl. Aggressivität und Zeitachse)"""
+    aggressiveness = {"value": 0.1, "split_bin": 85}
+    for frames in (info["window_size"], info["window_size"] * 2):
+        x = torch.rand(2, 2, info["bins"], frames)
+        with torch.no_grad():
+            start = time.perf_counter()
+            expected = net.predict(x, aggressiveness).numpy()
+            torch_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = onnx_model.predict(x, aggressiveness).numpy()
+        onnx_seconds = time.perf_counter() - start
+        max_diff = float(abs(expected - actual).max())
+        logger.info(
+            f"   {frames} Frames: max. Abweichung {max_diff:.2e}, "
+            f"PyTorch {torch_seconds:.2f}s, ONNX Runtime {onnx_seconds:.2f}s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VR-Modelle (.pth) nach ONNX exportieren")
+    parser.add_argument("models", nargs="*", help=f"Checkpoints (Standard: alle .pth in {DEFAULT_WEIGHTS_DIR})")
+    parser.add_argument("--opset", type=int, default=17, help="ONNX-Opset (Standard: 17)")
+    parser.add_argument("--verify", action="store_true", help="PyTorch und ONNX Runtime vergleichen")
+    args = parser.parse_args()
+
+    models = args.models or sorted(
+        os.path.join(DEFAULT_WEIGHTS_DIR, name)
+        for name in os.listdir(DEFAULT_WEIGHTS_DIR)
+        if name.endswith(".pth")
+    )
+    if not models:
+        print(f"Keine .pth-Dateien gefunden in {DEFAULT_WEIGHTS_DIR}")
+        sys.exit(1)
+
+    failed = 0
+    for model_path in models:
+        try:
+            export_model(os.path.abspath(model_path), opset=args.opset, verify=args.verify)
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ Export fehlgeschlagen für {model_path}: {e}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
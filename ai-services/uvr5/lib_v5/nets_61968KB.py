@@ -57,10 +57,7 @@ class CascadedASPPNet(nn.Module):
 
         self.offset = 128
 
-    def forward(self, x, aggressiveness=None):
-        mix = x.detach()
-        x = x.clone()
-
+    def _forward_stages(self, x):
         x = x[:, :, : self.max_bin]
 
         bandw = x.size()[2] // 2
@@ -85,6 +82,18 @@ class CascadedASPPNet(nn.Module):
             mode="replicate",
         )
 
+        return mask, aux1, aux2
+
+    def forward_mask(self, x):
+        # Maske ohne Aggressivität (Grundlage für den ONNX-Export)
+        return self._forward_stages(x)[0]
+
+    def forward(self, x, aggressiveness=None):
+        mix = x.detach()
+        x = x.clone()
+
+        mask, aux1, aux2 = self._forward_stages(x)
+
         if self.training:
             aux1 = torch.sigmoid(self.aux1_out(aux1))
             aux1 = F.pad(
@@ -0,0 +1,120 @@
+"""
+Austauschbare Resampler für die UVR5-Multi-Band-Pipeline
+
+Profile (UVR5_RESAMPLE_PROFILE bzw. AudioPre.data["resample_profile"]):
+  modelparams  bisherige librosa-Modi (res_type der modelparams, sinc_fastest/scipy
+               bei der Rekonstruktion) – Standard, Referenz für Vergleiche
+  soxr_vhq     soxr Very High Quality
+  soxr_hq      soxr High Quality
+  soxr_mq      soxr Medium Quality
+  soxr_lq      soxr Low Quality
+  poly         scipy.signal.resample_poly (polyphasig, ganzzahliges Verhältnis)
+"""
+
+import os
+import math
+import threading
+
+import numpy as np
+
+RESAMPLE_PROFILES = {
+    "modelparams": {"backend": "librosa"},
+    "soxr_vhq": {"backend": "soxr", "quality": "VHQ"},
+    "soxr_hq": {"backend": "soxr", "quality": "HQ"},
+    "soxr_mq": {"backend": "soxr", "quality": "MQ"},
+    "soxr_lq": {"backend": "soxr", "quality": "LQ"},
+    "poly": {"backend": "poly"},
+}
+
+DEFAULT_RESAMPLE_PROFILE = "modelparams"
+
+
+class Resampler:
+    """Resampelt entlang der letzten Achse mit dem Backend eines Profils"""
+
+    def __init__(self, profile=None):
+        profile = profile or os.getenv("UVR5_RESAMPLE_PROFILE", DEFAULT_RESAMPLE_PROFILE)
+        if profile not in RESAMPLE_PROFILES:
+            raise ValueError(
+                "Unbekanntes Resampling-Profil '%s' (verfügbar: %s)"
+                % (profile, ", ".join(RESAMPLE_PROFILES))
+            )
+        self.profile = profile
+        self.backend = RESAMPLE_PROFILES[profile]["backend"]
+        self.quality = RESAMPLE_PROFILES[profile].get("quality")
+
+    def method_key(self, res_type=None):
+        """Kennung der tatsächlich verwendeten Methode (für Caches)"""
+        if self.backend == "librosa":
+            return "librosa:%s" % res_type
+        return self.profile
+
+    def resample(self, y, orig_sr, target_sr, res_type="soxr_hq"):
+        """
+        Resampelt y (Samples bzw. (Kanäle, Samples)); res_type gilt nur für das
+        librosa-Backend. Der dtype der Eingabe bleibt erhalten.
+        """
+        if orig_sr == target_sr:
+            return y
+        if self.backend == "soxr":
+            import soxr
+
+            # soxr erwartet (Samples, Kanäle)
+            out = soxr.resample(np.ascontiguousarray(y.T), orig_sr, target_sr, quality=self.quality)
+            return np.ascontiguousarray(out.T).astype(y.dtype, copy=False)
+        if self.backend == "poly":
+            from scipy.signal import resample_poly
+
+            g = math.gcd(int(orig_sr), int(target_sr))
+            out = resample_poly(y, int(target_sr) // g, int(orig_sr) // g, axis=-1)
+            return out.astype(y.dtype, copy=False)
+
+        import librosa
+
+        return librosa.resample(y, orig_sr=orig_sr, target_sr=target_sr, res_type=res_type)
+
+
+class ResampleCache:
+    """
+    Merkt sich resampelte Signale pro Quellsignal, damit die Kette
+    44.1k -> 14.7k -> 7.35k für mehrere Frontends nur einmal berechnet wird
+
+    Schlüssel ist die Identität des Quell-Arrays; der Eintrag hält eine Referenz
+    darauf, damit die id nicht neu vergeben werden kann. Lebensdauer = ein Aufruf
+    von path_audio_multi bzw. ein Abschnitt.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def get_or_compute(self, key, source, compute):
+        key = (id(source),) + tuple(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is source:
+                self.hits += 1
+                return entry[1]
+        result = compute()
+        with self._lock:
+            self._entries[key] = (source, result)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Globale Resampler pro Profil
+_resamplers = {}
+_resamplers_lock = threading.Lock()
+
+
+def get_resampler(profile=None):
+    """Gibt den Resampler eines Profils zurück (None = UVR5_RESAMPLE_PROFILE bzw. modelparams)"""
+    profile = profile or os.getenv("UVR5_RESAMPLE_PROFILE", DEFAULT_RESAMPLE_PROFILE)
+    with _resamplers_lock:
+        if profile not in _resamplers:
+            _resamplers[profile] = Resampler(profile)
+        return _resamplers[profile]
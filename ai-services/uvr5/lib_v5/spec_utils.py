@@ -2,12 +2,42 @@ import hashlib
 import json
 import math
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import librosa
 import numpy as np
 import soundfile as sf
 from tqdm import tqdm
 
+try:
+    from .resampling import get_resampler
+except ImportError:
+    from resampling import get_resampler
+
+
+# Prozessweiter Pool für STFT/ISTFT/Resampling der Bänder und Kanäle (UVR5_SPEC_THREADS)
+_spec_executor = None
+_spec_executor_lock = threading.Lock()
+
+
+def get_spec_executor():
+    # Aufgaben im Pool warten nie auf andere Pool-Aufgaben; nur der Aufrufer blockiert,
+    # daher können beliebig viele Jobs den Pool gleichzeitig nutzen
+    global _spec_executor
+    if _spec_executor is None:
+        with _spec_executor_lock:
+            if _spec_executor is None:
+                try:
+                    workers = int(os.getenv("UVR5_SPEC_THREADS", "0") or 0)
+                except ValueError:
+                    workers = 0
+                workers = workers or min(32, os.cpu_count() or 1)
+                _spec_executor = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="uvr5-spec"
+                )
+    return _spec_executor
+
 
 def crop_center(h1, h2):
     h1_shape = h1.size()
@@ -27,26 +57,47 @@ def crop_center(h1, h2):
     return h1
 
 
-def wave_to_spectrogram(
-    wave, hop_length, n_fft, mid_side=False, mid_side_b2=False, reverse=False
-):
+def _split_channels(wave, mid_side=False, mid_side_b2=False, reverse=False):
+    # float64 bleibt als Referenzpfad erhalten, alles andere läuft in float32
+    wave = np.asarray(wave)
+    if wave.dtype != np.float64:
+        wave = wave.astype(np.float32, copy=False)
     if reverse:
-        wave_left = np.flip(np.asfortranarray(wave[0]))
-        wave_right = np.flip(np.asfortranarray(wave[1]))
+        wave_left = np.ascontiguousarray(np.flip(wave[0]))
+        wave_right = np.ascontiguousarray(np.flip(wave[1]))
     elif mid_side:
-        wave_left = np.asfortranarray(np.add(wave[0], wave[1]) / 2)
-        wave_right = np.asfortranarray(np.subtract(wave[0], wave[1]))
+        wave_left = np.add(wave[0], wave[1]) / 2
+        wave_right = np.subtract(wave[0], wave[1])
     elif mid_side_b2:
-        wave_left = np.asfortranarray(np.add(wave[1], wave[0] * 0.5))
-        wave_right = np.asfortranarray(np.subtract(wave[0], wave[1] * 0.5))
+        wave_left = np.add(wave[1], wave[0] * 0.5)
+        wave_right = np.subtract(wave[0], wave[1] * 0.5)
     else:
-        wave_left = np.asfortranarray(wave[0])
-        wave_right = np.asfortranarray(wave[1])
+        wave_left = wave[0]
+        wave_right = wave[1]
 
-    spec_left = librosa.stft(wave_left, n_fft=n_fft, hop_length=hop_length)
-    spec_right = librosa.stft(wave_right, n_fft=n_fft, hop_length=hop_length)
+    return wave_left, wave_right
 
-    spec = np.asfortranarray([spec_left, spec_right])
+
+def _empty_spectrogram(wave, n_fft, hop_length):
+    # Stereo-Spektrogramm, in das librosa.stft direkt schreibt (kein Stapeln/Kopieren)
+    dtype = np.complex128 if wave.dtype == np.float64 else np.complex64
+    # Frame-Anzahl von librosa.stft mit center=True
+    n_frames = 1 + (len(wave) + 2 * (n_fft // 2) - n_fft) // hop_length
+    return np.empty((2, n_fft // 2 + 1, n_frames), dtype=dtype)
+
+
+def _stft_into(spec, channel, wave, n_fft, hop_length):
+    librosa.stft(wave, n_fft=n_fft, hop_length=hop_length, dtype=spec.dtype, out=spec[channel])
+
+
+def wave_to_spectrogram(
+    wave, hop_length, n_fft, mid_side=False, mid_side_b2=False, reverse=False
+):
+    wave_left, wave_right = _split_channels(wave, mid_side, mid_side_b2, reverse)
+
+    spec = _empty_spectrogram(wave_left, n_fft, hop_length)
+    _stft_into(spec, 0, wave_left, n_fft, hop_length)
+    _stft_into(spec, 1, wave_right, n_fft, hop_length)
 
     return spec
 
@@ -54,41 +105,73 @@ def wave_to_spectrogram(
 def wave_to_spectrogram_mt(
     wave, hop_length, n_fft, mid_side=False, mid_side_b2=False, reverse=False
 ):
-    import threading
+    wave_left, wave_right = _split_channels(wave, mid_side, mid_side_b2, reverse)
 
-    if reverse:
-        wave_left = np.flip(np.asfortranarray(wave[0]))
-        wave_right = np.flip(np.asfortranarray(wave[1]))
-    elif mid_side:
-        wave_left = np.asfortranarray(np.add(wave[0], wave[1]) / 2)
-        wave_right = np.asfortranarray(np.subtract(wave[0], wave[1]))
-    elif mid_side_b2:
-        wave_left = np.asfortranarray(np.add(wave[1], wave[0] * 0.5))
-        wave_right = np.asfortranarray(np.subtract(wave[0], wave[1] * 0.5))
-    else:
-        wave_left = np.asfortranarray(wave[0])
-        wave_right = np.asfortranarray(wave[1])
+    spec = _empty_spectrogram(wave_left, n_fft, hop_length)
+    left = get_spec_executor().submit(_stft_into, spec, 0, wave_left, n_fft, hop_length)
+    _stft_into(spec, 1, wave_right, n_fft, hop_length)
+    left.result()
 
-    def run_thread(**kwargs):
-        global spec_left
-        spec_left = librosa.stft(**kwargs)
+    return spec
 
-    thread = threading.Thread(
-        target=run_thread,
-        kwargs={"y": wave_left, "n_fft": n_fft, "hop_length": hop_length},
-    )
-    thread.start()
-    spec_right = librosa.stft(wave_right, n_fft=n_fft, hop_length=hop_length)
-    thread.join()
 
-    spec = np.asfortranarray([spec_left, spec_right])
+def _resample_channels(resampler, wave, orig_sr, target_sr, res_type):
+    # Kanäle parallel resamplen (alle Backends rechnen pro Kanal unabhängig)
+    if orig_sr == target_sr:
+        return wave
+    executor = get_spec_executor()
+    futures = [
+        executor.submit(resampler.resample, wave[c], orig_sr, target_sr, res_type)
+        for c in range(len(wave))
+    ]
+    return np.stack([future.result() for future in futures])
+
+
+def multiband_spectrograms(wave, mp, resampler=None, cache=None):
+    """
+    STFT aller Bänder und beider Kanäle im Thread-Pool
+
+    Das Resampling der Bänder ist eine Kette (jedes Band aus dem darüberliegenden);
+    sobald ein Band vorliegt, laufen seine STFTs parallel zum Resampling des nächsten.
+    wave: (2, Samples) in der Samplerate des obersten Bands
+    resampler: Resampler (None = Profil aus UVR5_RESAMPLE_PROFILE)
+    cache: optionaler ResampleCache, geteilt zwischen Frontends desselben Signals
+    """
+    executor = get_spec_executor()
+    resampler = resampler or get_resampler()
+    bands_n = len(mp.param["band"])
+    specs, futures = {}, []
+    audio = wave
+    for d in range(bands_n, 0, -1):
+        bp = mp.param["band"][d]
+        if d != bands_n:
+            args = (resampler, audio, mp.param["band"][d + 1]["sr"], bp["sr"], bp["res_type"])
+            if cache is None:
+                audio = _resample_channels(*args)
+            else:
+                audio = cache.get_or_compute(
+                    (args[2], args[3], resampler.method_key(bp["res_type"])),
+                    audio,
+                    lambda args=args: _resample_channels(*args),
+                )
+        wave_left, wave_right = _split_channels(
+            audio, mp.param["mid_side"], mp.param["mid_side_b2"], mp.param["reverse"]
+        )
+        specs[d] = _empty_spectrogram(wave_left, bp["n_fft"], bp["hl"])
+        for c, channel in enumerate((wave_left, wave_right)):
+            futures.append(
+                executor.submit(_stft_into, specs[d], c, channel, bp["n_fft"], bp["hl"])
+            )
+    for future in futures:
+        future.result()
 
-    return spec
+    return specs
 
 
 def combine_spectrograms(specs, mp):
     l = min([specs[i].shape[2] for i in specs])
-    spec_c = np.zeros(shape=(2, mp.param["bins"] + 1, l), dtype=np.complex64)
+    dtype = np.result_type(np.complex64, *[specs[i].dtype for i in specs])
+    spec_c = np.zeros(shape=(2, mp.param["bins"] + 1, l), dtype=dtype)
     offset = 0
     bands_n = len(mp.param["band"])
 
@@ -121,7 +204,7 @@ def combine_spectrograms(specs, mp):
                 gp = g
                 spec_c[:, b, :] *= g
 
-    return np.asfortranarray(spec_c)
+    return spec_c
 
 
 def spectrogram_to_image(spec, mode="magnitude"):
@@ -178,13 +261,13 @@ def mask_silence(mag, ref, thres=0.2, min_range=64, fade_size=32):
                 s = old_e - fade_size * 2
 
             if s != 0:
-                weight = np.linspace(0, 1, fade_size)
+                weight = np.linspace(0, 1, fade_size, dtype=mag.dtype)
                 mag[:, :, s : s + fade_size] += weight * ref[:, :, s : s + fade_size]
             else:
                 s -= fade_size
 
             if e != mag.shape[2]:
-                weight = np.linspace(1, 0, fade_size)
+                weight = np.linspace(1, 0, fade_size, dtype=mag.dtype)
                 mag[:, :, e - fade_size : e] += weight * ref[:, :, e - fade_size : e]
             else:
                 e += fade_size
@@ -292,13 +375,7 @@ def cache_or_load(mix_path, inst_path, mp):
     return X_spec_m, y_spec_m
 
 
-def spectrogram_to_wave(spec, hop_length, mid_side, mid_side_b2, reverse):
-    spec_left = np.asfortranarray(spec[0])
-    spec_right = np.asfortranarray(spec[1])
-
-    wave_left = librosa.istft(spec_left, hop_length=hop_length)
-    wave_right = librosa.istft(spec_right, hop_length=hop_length)
-
+def _join_channels(wave_left, wave_right, mid_side, mid_side_b2, reverse):
     if reverse:
         return np.asfortranarray([np.flip(wave_left), np.flip(wave_right)])
     elif mid_side:
@@ -316,114 +393,102 @@ def spectrogram_to_wave(spec, hop_length, mid_side, mid_side_b2, reverse):
         return np.asfortranarray([wave_left, wave_right])
 
 
+def spectrogram_to_wave(spec, hop_length, mid_side, mid_side_b2, reverse):
+    # istft liest die Kanäle direkt (ohne Fortran-Kopie); complex64 ergibt float32
+    wave_left = librosa.istft(spec[0], hop_length=hop_length)
+    wave_right = librosa.istft(spec[1], hop_length=hop_length)
+
+    return _join_channels(wave_left, wave_right, mid_side, mid_side_b2, reverse)
+
+
 def spectrogram_to_wave_mt(spec, hop_length, mid_side, reverse, mid_side_b2):
-    import threading
+    left = get_spec_executor().submit(librosa.istft, spec[0], hop_length=hop_length)
+    wave_right = librosa.istft(spec[1], hop_length=hop_length)
 
-    spec_left = np.asfortranarray(spec[0])
-    spec_right = np.asfortranarray(spec[1])
+    return _join_channels(left.result(), wave_right, mid_side, mid_side_b2, reverse)
 
-    def run_thread(**kwargs):
-        global wave_left
-        wave_left = librosa.istft(**kwargs)
 
-    thread = threading.Thread(
-        target=run_thread, kwargs={"stft_matrix": spec_left, "hop_length": hop_length}
+def _band_spectrogram(spec_m, mp, d, offset, extra_bins_h=None, extra_bins=None):
+    # Ausschnitt eines Bands aus dem kombinierten Spektrogramm inkl. Band-Filter
+    bands_n = len(mp.param["band"])
+    bp = mp.param["band"][d]
+    spec_s = np.zeros(
+        shape=(2, bp["n_fft"] // 2 + 1, spec_m.shape[2]), dtype=spec_m.dtype
     )
-    thread.start()
-    wave_right = librosa.istft(spec_right, hop_length=hop_length)
-    thread.join()
-
-    if reverse:
-        return np.asfortranarray([np.flip(wave_left), np.flip(wave_right)])
-    elif mid_side:
-        return np.asfortranarray(
-            [np.add(wave_left, wave_right / 2), np.subtract(wave_left, wave_right / 2)]
-        )
-    elif mid_side_b2:
-        return np.asfortranarray(
-            [
-                np.add(wave_right / 1.25, 0.4 * wave_left),
-                np.subtract(wave_left / 1.25, 0.4 * wave_right),
+    h = bp["crop_stop"] - bp["crop_start"]
+    spec_s[:, bp["crop_start"] : bp["crop_stop"], :] = spec_m[
+        :, offset : offset + h, :
+    ]
+
+    if d == bands_n:  # higher
+        if extra_bins_h:  # if --high_end_process bypass
+            max_bin = bp["n_fft"] // 2
+            spec_s[:, max_bin - extra_bins_h : max_bin, :] = extra_bins[
+                :, :extra_bins_h, :
             ]
-        )
-    else:
-        return np.asfortranarray([wave_left, wave_right])
+        if bp["hpf_start"] > 0:
+            spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
+    elif d == 1:  # lower
+        spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
+    else:  # mid
+        spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
+        spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
 
+    return spec_s
 
-def cmb_spectrogram_to_wave(spec_m, mp, extra_bins_h=None, extra_bins=None):
-    wave_band = {}
-    bands_n = len(mp.param["band"])
-    offset = 0
 
+def _sum_bands(band_waves, mp, channel, resampler):
+    # Bänder eines Kanals von unten nach oben resamplen und aufsummieren
+    bands_n = len(mp.param["band"])
+    wave = None
     for d in range(1, bands_n + 1):
         bp = mp.param["band"][d]
-        spec_s = np.ndarray(
-            shape=(2, bp["n_fft"] // 2 + 1, spec_m.shape[2]), dtype=complex
-        )
-        h = bp["crop_stop"] - bp["crop_start"]
-        spec_s[:, bp["crop_start"] : bp["crop_stop"], :] = spec_m[
-            :, offset : offset + h, :
-        ]
-
-        offset += h
+        band_wave = band_waves[d][channel]
         if d == bands_n:  # higher
-            if extra_bins_h:  # if --high_end_process bypass
-                max_bin = bp["n_fft"] // 2
-                spec_s[:, max_bin - extra_bins_h : max_bin, :] = extra_bins[
-                    :, :extra_bins_h, :
-                ]
-            if bp["hpf_start"] > 0:
-                spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
-            if bands_n == 1:
-                wave = spectrogram_to_wave(
-                    spec_s,
-                    bp["hl"],
-                    mp.param["mid_side"],
-                    mp.param["mid_side_b2"],
-                    mp.param["reverse"],
-                )
-            else:
-                wave = np.add(
-                    wave,
-                    spectrogram_to_wave(
-                        spec_s,
-                        bp["hl"],
-                        mp.param["mid_side"],
-                        mp.param["mid_side_b2"],
-                        mp.param["reverse"],
-                    ),
-                )
+            wave = band_wave if bands_n == 1 else np.add(wave, band_wave)
         else:
             sr = mp.param["band"][d + 1]["sr"]
             if d == 1:  # lower
-                spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
-                wave = librosa.resample(
-                    spectrogram_to_wave(
-                        spec_s,
-                        bp["hl"],
-                        mp.param["mid_side"],
-                        mp.param["mid_side_b2"],
-                        mp.param["reverse"],
-                    ),
-                    orig_sr=bp["sr"],
-                    target_sr=sr,
-                    res_type="sinc_fastest",
-                )
+                wave = resampler.resample(band_wave, bp["sr"], sr, res_type="sinc_fastest")
             else:  # mid
-                spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
-                spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
-                wave2 = np.add(
-                    wave,
-                    spectrogram_to_wave(
-                        spec_s,
-                        bp["hl"],
-                        mp.param["mid_side"],
-                        mp.param["mid_side_b2"],
-                        mp.param["reverse"],
-                    ),
-                )
+                wave2 = np.add(wave, band_wave)
                 # wave = librosa.core.resample(wave2, bp['sr'], sr, res_type="sinc_fastest")
-                wave = librosa.resample(wave2, orig_sr=bp["sr"], target_sr=sr, res_type="scipy")
+                wave = resampler.resample(wave2, bp["sr"], sr, res_type="scipy")
+
+    return wave
+
+
+def cmb_spectrogram_to_wave(spec_m, mp, extra_bins_h=None, extra_bins=None, resampler=None):
+    executor = get_spec_executor()
+    resampler = resampler or get_resampler()
+    bands_n = len(mp.param["band"])
+    offset = 0
+
+    # ISTFT aller Bänder und Kanäle gleichzeitig
+    istft_futures = {}
+    for d in range(1, bands_n + 1):
+        bp = mp.param["band"][d]
+        spec_s = _band_spectrogram(spec_m, mp, d, offset, extra_bins_h, extra_bins)
+        offset += bp["crop_stop"] - bp["crop_start"]
+        istft_futures[d] = [
+            executor.submit(librosa.istft, spec_s[c], hop_length=bp["hl"]) for c in (0, 1)
+        ]
+
+    band_waves = {
+        d: _join_channels(
+            left.result(),
+            right.result(),
+            mp.param["mid_side"],
+            mp.param["mid_side_b2"],
+            mp.param["reverse"],
+        )
+        for d, (left, right) in istft_futures.items()
+    }
+    del istft_futures
+
+    # Resampling-Kette pro Kanal parallel
+    channel_futures = [executor.submit(_sum_bands, band_waves, mp, c, resampler) for c in (0, 1)]
+    wave = np.asfortranarray([future.result() for future in channel_futures])
 
     return wave.T
 
@@ -465,7 +530,7 @@ def mirroring(a, spec_m, input_high_end, mp):
             ),
             1,
         )
-        mirror = mirror * np.exp(1.0j * np.angle(input_high_end))
+        mirror = mirror * np.exp(np.complex64(1j) * np.angle(input_high_end))
 
         return np.where(
             np.abs(input_high_end) <= np.abs(mirror), input_high_end, mirror
@@ -8,9 +8,26 @@ import numpy as np
 import soundfile as sf
 import torch
 from tqdm import tqdm
+try:
+    # Gemeinsamer ffmpeg-Decoder des Service (ai-services/modules)
+    from modules.audio_decoder import decode_audio
+except ImportError:
+    decode_audio = None
 
 cpu = torch.device("cpu")
 
+# Fenster pro session.run (bei denoise doppelt: -spek und spek im selben Batch)
+DEFAULT_BATCH_SIZE = 4  # UVR5_MDX_BATCH_SIZE
+
+
+def _batch_size(value=None):
+    if value is None:
+        try:
+            value = int(os.getenv("UVR5_MDX_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+        except ValueError:
+            value = DEFAULT_BATCH_SIZE
+    return max(1, int(value))
+
 
 class ConvTDFNetTrim:
     def __init__(
@@ -176,90 +193,98 @@ class Predictor:
         """
         return sources
 
-    def demix_base(self, mixes, margin_size):
-        chunked_sources = []
-        progress_bar = tqdm(total=len(mixes))
-        progress_bar.set_description("Processing")
+    def _run_session(self, spec):
+        """session.run mit einmaligem Fallback auf CPUExecutionProvider (z.B. CUDA PTX JIT Fehler)"""
+        try:
+            return self.model.run(None, {"input": spec})[0]
+        except Exception as e:
+            if os.getenv("UVR5_STRICT_CUDA", "0") == "1" or getattr(self, "chosen_provider", None) == "CPUExecutionProvider":
+                raise
+            logger.warning(f"ONNX inference failed on provider {getattr(self, 'chosen_provider', 'unknown')}: {e}. Falling back to CPUExecutionProvider...")
         import onnxruntime as ort
-        for mix in mixes:
-            cmix = mixes[mix]
-            sources = []
-            n_sample = cmix.shape[1]
-            model = self.model_
-            trim = model.n_fft // 2
-            gen_size = model.chunk_size - 2 * trim
-            pad = gen_size - n_sample % gen_size
-            mix_p = np.concatenate(
-                (np.zeros((2, trim)), cmix, np.zeros((2, pad)), np.zeros((2, trim))), 1
+
+        try:
+            self.model = ort.InferenceSession(
+                os.path.join(self.args.onnx, self.model_.target_name + ".onnx"),
+                providers=["CPUExecutionProvider"],
             )
-            mix_waves = []
-            i = 0
-            while i < n_sample + pad:
-                waves = np.array(mix_p[:, i : i + model.chunk_size])
-                mix_waves.append(waves)
-                i += gen_size
-            mix_waves = torch.tensor(mix_waves, dtype=torch.float32).to(cpu)
-            with torch.no_grad():
-                _ort = self.model
-                spek = model.stft(mix_waves)
-                def _run_inference(session, spec_np):
-                    return session.run(None, {"input": spec_np})[0]
+            self.chosen_provider = "CPUExecutionProvider"
+            return self.model.run(None, {"input": spec})[0]
+        except Exception as e2:
+            logger.error(f"ONNX CPU fallback also failed: {e2}")
+            raise
 
-                try:
-                    if self.args.denoise:
-                        spec_pred = (
-                            -_run_inference(_ort, -spek.cpu().numpy()) * 0.5
-                            + _run_inference(_ort, spek.cpu().numpy()) * 0.5
-                        )
-                        tar_waves = model.istft(torch.tensor(spec_pred))
-                    else:
-                        tar_waves = model.istft(
-                            torch.tensor(_run_inference(_ort, spek.cpu().numpy()))
-                        )
-                except Exception as e:
-                    # Fallback auf CPU bei Runtime-Fehlern (z.B. CUDA PTX JIT Fehler)
-                    if not (os.getenv("UVR5_STRICT_CUDA", "0") == "1") and getattr(self, "chosen_provider", None) != "CPUExecutionProvider":
-                        logger.warning(f"ONNX inference failed on provider {getattr(self, 'chosen_provider', 'unknown')}: {e}. Falling back to CPUExecutionProvider...")
-                        try:
-                            self.model = ort.InferenceSession(
-                                os.path.join(self.args.onnx, self.model_.target_name + ".onnx"),
-                                providers=["CPUExecutionProvider"],
-                            )
-                            self.chosen_provider = "CPUExecutionProvider"
-                            _ort = self.model
-                            if self.args.denoise:
-                                spec_pred = (
-                                    -_run_inference(_ort, -spek.cpu().numpy()) * 0.5
-                                    + _run_inference(_ort, spek.cpu().numpy()) * 0.5
-                                )
-                                tar_waves = model.istft(torch.tensor(spec_pred))
-                            else:
-                                tar_waves = model.istft(
-                                    torch.tensor(_run_inference(_ort, spek.cpu().numpy()))
-                                )
-                        except Exception as e2:
-                            logger.error(f"ONNX CPU fallback also failed: {e2}")
-                            raise
-                    else:
-                        raise
-                tar_signal = (
-                    tar_waves[:, :, trim:-trim]
-                    .transpose(0, 1)
-                    .reshape(2, -1)
-                    .numpy()[:, :-pad]
-                )
-
-                start = 0 if mix == 0 else margin_size
-                end = None if mix == list(mixes.keys())[::-1][0] else -margin_size
-                if margin_size == 0:
-                    end = None
-                sources.append(tar_signal[:, start:end])
-
-                progress_bar.update(1)
-
-            chunked_sources.append(sources)
-        _sources = np.concatenate(chunked_sources, axis=-1)
-        # del self.model
+    def demix_base(self, mixes, margin_size):
+        """
+        Demix aller Abschnitte in Batches fester Größe
+
+        Die Fenster aller Abschnitte werden gemeinsam in Batches von
+        args.batch_size (UVR5_MDX_BATCH_SIZE) an die Session übergeben; mit
+        denoise laufen -spek und spek im selben session.run. Ergebnisse werden
+        direkt in vorallokierte Arrays geschrieben.
+        """
+        model = self.model_
+        trim = model.n_fft // 2
+        gen_size = model.chunk_size - 2 * trim
+        batch_size = _batch_size(getattr(self.args, "batch_size", None))
+        denoise = self.args.denoise
+        offsets = list(mixes.keys())
+        last_offset = offsets[-1]
+
+        # Gepolsterte Abschnitte und Fenster-Index (Abschnitt, Fenster) vorab anlegen
+        padded = []
+        targets = []
+        windows = []
+        for index, offset in enumerate(offsets):
+            cmix = mixes[offset]
+            n_sample = cmix.shape[1]
+            pad = gen_size - n_sample % gen_size
+            mix_p = np.zeros((2, trim + n_sample + pad + trim), dtype=np.float32)
+            mix_p[:, trim : trim + n_sample] = cmix
+            n_window = (n_sample + pad) // gen_size
+            padded.append(mix_p)
+            targets.append(np.empty((2, n_window * gen_size), dtype=np.float32))
+            windows.extend((index, w) for w in range(n_window))
+
+        progress_bar = tqdm(total=len(windows))
+        progress_bar.set_description("Processing")
+        batch = np.empty((batch_size, 2, model.chunk_size), dtype=np.float32)
+        spec_in = None
+        with torch.no_grad():
+            for b_start in range(0, len(windows), batch_size):
+                b_windows = windows[b_start : b_start + batch_size]
+                n = len(b_windows)
+                for j, (index, w) in enumerate(b_windows):
+                    batch[j] = padded[index][:, w * gen_size : w * gen_size + model.chunk_size]
+                spek = model.stft(torch.from_numpy(batch[:n])).numpy()
+                if denoise:
+                    # -spek und spek in einem Aufruf: pred = (f(spek) - f(-spek)) / 2
+                    if spec_in is None or spec_in.shape[1:] != spek.shape[1:]:
+                        spec_in = np.empty((2 * batch_size,) + spek.shape[1:], dtype=np.float32)
+                    np.negative(spek, out=spec_in[:n])
+                    spec_in[n : 2 * n] = spek
+                    out = self._run_session(spec_in[: 2 * n])
+                    spec_pred = (out[n : 2 * n] - out[:n]) * 0.5
+                else:
+                    spec_pred = self._run_session(spek)
+                tar_waves = model.istft(torch.from_numpy(np.ascontiguousarray(spec_pred, dtype=np.float32)))
+                tar_waves = tar_waves[:, :, trim:-trim].numpy()
+                for j, (index, w) in enumerate(b_windows):
+                    targets[index][:, w * gen_size : (w + 1) * gen_size] = tar_waves[j]
+                progress_bar.update(n)
+
+        # Ränder abschneiden und in das Gesamtsignal schreiben
+        pieces = []
+        for index, offset in enumerate(offsets):
+            n_sample = mixes[offset].shape[1]
+            start = 0 if offset == 0 else margin_size
+            end = n_sample if offset == last_offset or margin_size == 0 else n_sample - margin_size
+            pieces.append((index, start, end))
+        _sources = np.empty((1, 2, sum(end - start for _, start, end in pieces)), dtype=np.float32)
+        position = 0
+        for index, start, end in pieces:
+            _sources[0, :, position : position + end - start] = targets[index][:, start:end]
+            position += end - start
         progress_bar.close()
         return _sources
 
@@ -267,7 +292,11 @@ class Predictor:
         os.makedirs(vocal_root, exist_ok=True)
         os.makedirs(others_root, exist_ok=True)
         basename = os.path.basename(m)
-        mix, rate = librosa.load(m, mono=False, sr=44100)
+        if decode_audio is not None:
+            buffer = decode_audio(m, sample_rate=44100, channels=2)
+            mix, rate = buffer.samples, buffer.sample_rate
+        else:
+            mix, rate = librosa.load(m, mono=False, sr=44100)
         if mix.ndim == 1:
             mix = np.asfortranarray([mix, mix])
         mix = mix.T
@@ -313,7 +342,7 @@ class Predictor:
 
 
 class MDXNetDereverb:
-    def __init__(self, chunks, device):
+    def __init__(self, chunks, device, batch_size=None):
         self.onnx = "assets/uvr5_weights/onnx_dereverb_By_FoxJoy"
         self.shifts = 10  # 'Predict with randomised equivariant stabilisation'
         self.mixing = "min_mag"  # ['default','min_mag','max_mag']
@@ -323,6 +352,7 @@ class MDXNetDereverb:
         self.dim_f = 3072
         self.n_fft = 6144
         self.denoise = True
+        self.batch_size = _batch_size(batch_size)
         self.pred = Predictor(self)
         self.device = device
 
@@ -11,6 +11,12 @@ from configs.config import Config
 from infer.modules.uvr5.mdxnet import MDXNetDereverb
 from infer.modules.uvr5.vr import AudioPre, AudioPreDeEcho
 
+try:
+    # Gecachtes ffprobe des Service (ai-services/modules)
+    from modules.media_probe import probe_media
+except ImportError:
+    probe_media = None
+
 config = Config()
 
 
@@ -46,11 +52,16 @@ def uvr(model_name, inp_root, save_root_vocal, paths, save_root_ins, agg, format
             need_reformat = 1
             done = 0
             try:
-                info = ffmpeg.probe(inp_path, cmd="ffprobe")
-                if (
-                    info["streams"][0]["channels"] == 2
-                    and info["streams"][0]["sample_rate"] == "44100"
-                ):
+                if probe_media is not None:
+                    audio = probe_media(inp_path).audio
+                    is_stereo_44k = audio.channels == 2 and audio.sample_rate == 44100
+                else:
+                    info = ffmpeg.probe(inp_path, cmd="ffprobe")
+                    is_stereo_44k = (
+                        info["streams"][0]["channels"] == 2
+                        and info["streams"][0]["sample_rate"] == "44100"
+                    )
+                if is_stereo_44k:
                     need_reformat = 0
                     pre_fun._path_audio_(
                         inp_path, save_root_ins, save_root_vocal, format0, is_hp3=is_hp3
@@ -0,0 +1,131 @@
+import os
+import json
+import logging
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def onnx_paths(model_path, variant=None):
+    """Pfade des exportierten Modells und seiner Info-Datei neben der .pth (variant z.B. 'int8')"""
+    base = os.path.splitext(model_path)[0]
+    if variant:
+        base = "%s.%s" % (base, variant)
+    return base + ".onnx", base + ".onnx.json"
+
+
+def source_signature(model_path):
+    """Größe und mtime der .pth, um veraltete Exporte zu erkennen"""
+    stat = os.stat(model_path)
+    return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def _ort_threads():
+    try:
+        return int(os.getenv("UVR5_ORT_THREADS", "0") or 0)
+    except ValueError:
+        return 0
+
+
+class OnnxVRModel:
+    """
+    ONNX-Runtime-Ersatz für CascadedASPPNet/CascadedNet in utils.inference
+
+    Der exportierte Graph liefert nur die Maske; Aggressivität, Multiplikation mit
+    der Magnitude und Offset-Zuschnitt passieren wie in predict() der Netze, aber in
+    numpy, damit der Graph frei von Python-Verzweigungen bleibt.
+    """
+
+    is_half = False
+
+    def __init__(self, onnx_path, info, intra_op_threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        threads = _ort_threads() if intra_op_threads is None else intra_op_threads
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.onnx_path = onnx_path
+        self.offset = info["offset"]
+        self.apply_aggressiveness = info["apply_aggressiveness"]
+        self.size_bytes = os.path.getsize(onnx_path)
+
+    def eval(self):
+        return self
+
+    def to(self, device):
+        return self
+
+    def predict(self, x_mag, aggressiveness=None):
+        if torch.is_tensor(x_mag):
+            x_mag = x_mag.detach().cpu().numpy()
+        x = np.ascontiguousarray(x_mag, dtype=np.float32)
+        mask = self.session.run(None, {self.input_name: x})[0]
+
+        if self.apply_aggressiveness and aggressiveness:
+            split_bin = aggressiveness["split_bin"]
+            mask[:, :, :split_bin] = np.power(
+                mask[:, :, :split_bin], 1 + aggressiveness["value"] / 3
+            )
+            mask[:, :, split_bin:] = np.power(
+                mask[:, :, split_bin:], 1 + aggressiveness["value"]
+            )
+
+        pred = x * mask
+        if self.offset > 0:
+            pred = pred[:, :, :, self.offset : -self.offset]
+            assert pred.shape[3] > 0
+
+        return torch.from_numpy(np.ascontiguousarray(pred))
+
+
+def load_onnx_model(model_path, modelparams, kind, variant=None):
+    """
+    Lädt den ONNX-Export zu model_path (siehe export_vr_onnx.py bzw. quantize_vr_onnx.py
+    für variant='int8')
+
+    Returns:
+        OnnxVRModel oder None, wenn kein passender, aktueller Export existiert
+    """
+    onnx_path, info_path = onnx_paths(model_path, variant)
+    if not os.path.exists(onnx_path) or not os.path.exists(info_path):
+        logger.warning(
+            "Kein ONNX-Export (%s) für %s gefunden, nutze PyTorch (%s ausführen)"
+            % (
+                variant or "fp32",
+                os.path.basename(model_path),
+                "quantize_vr_onnx.py" if variant else "export_vr_onnx.py",
+            )
+        )
+        return None
+    try:
+        with open(info_path, "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("ONNX-Info %s nicht lesbar: %s" % (info_path, e))
+        return None
+    if info.get("source") != source_signature(model_path):
+        logger.warning("ONNX-Export von %s ist veraltet, nutze PyTorch" % os.path.basename(model_path))
+        return None
+    if info.get("modelparams") != modelparams or info.get("kind") != kind:
+        logger.warning(
+            "ONNX-Export von %s passt nicht (%s/%s statt %s/%s), nutze PyTorch"
+            % (os.path.basename(model_path), info.get("kind"), info.get("modelparams"), kind, modelparams)
+        )
+        return None
+    try:
+        model = OnnxVRModel(onnx_path, info)
+    except Exception as e:
+        logger.warning("ONNX-Session für %s fehlgeschlagen, nutze PyTorch: %s" % (os.path.basename(model_path), e))
+        return None
+    logger.info("VR-Modell %s läuft über ONNX Runtime (CPU%s)" % (os.path.basename(onnx_path), ", " + variant if variant else ""))
+    return model
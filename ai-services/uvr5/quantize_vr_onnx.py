@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+INT8-Quantisierung der VR-Modelle für CPU-Knoten (ONNX Runtime) inkl. Qualitätsbericht
+
+Ablauf pro Checkpoint:
+  1. fp32-Export sicherstellen (export_vr_onnx.py)
+  2. Kalibrierung: normalisierte Magnitude-Fenster aus den übergebenen Clips, genau
+     wie utils.inference sie dem Netz zuführt
+  3. Statische QDQ-Quantisierung (Gewichte per Kanal INT8, Aktivierungen UINT8) bzw.
+     --mode dynamic ohne Kalibrierung -> <name>.int8.onnx + .int8.onnx.json
+  4. Qualitätsbericht: Separation jedes Clips mit fp32 (PyTorch) und INT8, SDR der
+     Stems gegenüber fp32 sowie Laufzeiten
+
+Beispielaufruf (PowerShell):
+  python ai-services/uvr5/quantize_vr_onnx.py clip1.mp3 clip2.mp3 clip3.mp3
+  python ai-services/uvr5/quantize_vr_onnx.py clips\\*.mp3 --models ai-services/assets/uvr5_weights/HP5_only_main_vocal.pth --eval-clips live1.mp3
+
+Aktivieren: UVR5_VR_BACKEND=onnx_int8 bzw. AudioSeparator-Konfiguration 'uvr5_backend'.
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import logging
+import argparse
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from onnx_vr import onnx_paths, source_signature
+from export_vr_onnx import DEFAULT_WEIGHTS_DIR, export_model, model_kind
+from utils import make_padding
+from vr import AudioPre, AudioPreDeEcho, _compute_input_spectrogram, path_audio_multi
+
+# Logging konfigurieren
+logging.basicConfig(level=logging.INFO, format='%(levelname)s:%(name)s:%(message)s')
+logger = logging.getLogger("quantize_vr_onnx")
+
+
+def calibration_windows(pre, clips, windows_per_clip, seconds):
+    """Normalisierte Magnitude-Fenster (1, 2, Bins, window_size) wie in utils.inference"""
+    import librosa
+
+    bp = pre.mp.param["band"][len(pre.mp.param["band"])]
+    window_size = pre.data["window_size"]
+    windows = []
+    for clip in clips:
+        wave, wave_sr = librosa.load(clip, sr=None, mono=False, duration=seconds)
+        X_spec_m, _, _ = _compute_input_spectrogram(
+            pre.mp, clip, pre.data["high_end_process"], wave=wave, wave_sr=wave_sr
+        )
+        X_mag = np.abs(X_spec_m)
+        X_mag_pre = X_mag / X_mag.max()
+        n_frame = X_mag_pre.shape[2]
+        pad_l, pad_r, roi_size = make_padding(n_frame, window_size, pre.model.offset)
+        n_window = int(np.ceil(n_frame / roi_size))
+        X_mag_pad = np.pad(X_mag_pre, ((0, 0), (0, 0), (pad_l, pad_r)), mode="constant")
+        for i in np.unique(np.linspace(0, n_window - 1, min(windows_per_clip, n_window)).astype(int)):
+            windows.append(
+                np.ascontiguousarray(X_mag_pad[None, :, :, i * roi_size : i * roi_size + window_size], dtype=np.float32)
+            )
+        logger.info(f"   Kalibrierung: {os.path.basename(clip)} ({wave.shape[-1] / wave_sr:.0f}s @ {bp['sr']} Hz)")
+    return windows
+
+
+def quantize_model(model_path, clips, mode="static", windows_per_clip=16, seconds=60.0, calibrate_method="minmax"):
+    """Erzeugt <name>.int8.onnx; liefert (Pfad, Info)"""
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_dynamic, quantize_static,
+    )
+
+    fp32_path, fp32_info_path = onnx_paths(model_path)
+    fp32_info = None
+    if os.path.exists(fp32_info_path):
+        with open(fp32_info_path, "r", encoding="utf-8") as f:
+            fp32_info = json.load(f)
+    if fp32_info is None or fp32_info.get("source") != source_signature(model_path) or not os.path.exists(fp32_path):
+        export_model(model_path)
+        with open(fp32_info_path, "r", encoding="utf-8") as f:
+            fp32_info = json.load(f)
+
+    int8_path, int8_info_path = onnx_paths(model_path, "int8")
+    start = time.time()
+    if mode == "dynamic":
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    else:
+        kind = model_kind(model_path)
+        cls = AudioPreDeEcho if kind == "AudioPreDeEcho" else AudioPre
+        pre = cls(agg=10, model_path=model_path, device="cpu", is_half=False, backend="torch")
+        windows = calibration_windows(pre, clips, windows_per_clip, seconds)
+        del pre
+
+        class _Reader(CalibrationDataReader):
+            def __init__(self):
+                self._iter = iter(windows)
+
+            def get_next(self):
+                window = next(self._iter, None)
+                return None if window is None else {"input": window}
+
+        methods = {
+            "minmax": CalibrationMethod.MinMax,
+            "entropy": CalibrationMethod.Entropy,
+            "percentile": CalibrationMethod.Percentile,
+        }
+        quantize_static(
+            fp32_path,
+            int8_path,
+            _Reader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=methods[calibrate_method],
+        )
+
+    info = dict(fp32_info)
+    info.update({
+        "quantization": {
+            "mode": mode,
+            "calibrate_method": calibrate_method if mode == "static" else None,
+            "calibration_clips": [os.path.basename(c) for c in clips] if mode == "static" else [],
+            "windows_per_clip": windows_per_clip if mode == "static" else None,
+        },
+        "exported_at": time.time(),
+    })
+    with open(int8_info_path, "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    logger.info(
+        f"✅ {os.path.basename(int8_path)} erstellt ({time.time() - start:.1f}s, "
+        f"{os.path.getsize(fp32_path) / 1024 ** 2:.0f} MB -> {os.path.getsize(int8_path) / 1024 ** 2:.0f} MB)"
+    )
+    return int8_path, info
+
+
+def sdr_db(reference, estimate):
+    """Signal-to-Distortion-Ratio von estimate gegenüber reference in dB"""
+    n = min(len(reference), len(estimate))
+    reference = np.asarray(reference[:n], dtype=np.float64)
+    noise = reference - np.asarray(estimate[:n], dtype=np.float64)
+    noise_power = float(np.sum(noise ** 2))
+    if noise_power == 0:
+        return float("inf")
+    return 10 * np.log10(max(float(np.sum(reference ** 2)), 1e-30) / noise_power)
+
+
+def quality_report(model_path, clips, seconds):
+    """Separation pro Clip mit fp32 (PyTorch) und INT8 (ONNX Runtime); SDR der Stems und Laufzeiten"""
+    import librosa
+
+    kind = model_kind(model_path)
+    cls = AudioPreDeEcho if kind == "AudioPreDeEcho" else AudioPre
+    fp32 = cls(agg=10, model_path=model_path, device="cpu", is_half=False, backend="torch")
+    int8 = cls(agg=10, model_path=model_path, device="cpu", is_half=False, backend="onnx_int8")
+    if int8.backend != "onnx_int8":
+        raise RuntimeError("INT8-Modell konnte nicht geladen werden")
+
+    rows = []
+    for clip in clips:
+        wave, wave_sr = librosa.load(clip, sr=None, mono=False, duration=seconds)
+        row = {"clip": os.path.basename(clip)}
+        outputs = {}
+        for label, pre in (("fp32", fp32), ("int8", int8)):
+            start = time.perf_counter()
+            outputs[label] = path_audio_multi(
+                [{"model": pre, "keep": ("instrumental", "vocals")}],
+                clip, wave=wave, wave_sr=wave_sr, chunk_seconds=0,
+            )[0]
+            row[f"{label}_seconds"] = round(time.perf_counter() - start, 2)
+        for stem in ("instrumental", "vocals"):
+            row[f"{stem}_sdr_db"] = round(sdr_db(outputs["fp32"][stem], outputs["int8"][stem]), 1)
+        row["speedup"] = round(row["fp32_seconds"] / max(row["int8_seconds"], 1e-6), 2)
+        rows.append(row)
+        logger.info(
+            f"   {row['clip']}: SDR Instrumental {row['instrumental_sdr_db']} dB, Vocals {row['vocals_sdr_db']} dB, "
+            f"fp32 {row['fp32_seconds']}s, INT8 {row['int8_seconds']}s (x{row['speedup']})"
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VR-Modelle für die CPU nach INT8 quantisieren")
+    parser.add_argument("clips", nargs="+", help="Kalibrier-Clips (Glob-Muster erlaubt)")
+    parser.add_argument("--models", nargs="*", help=f"Checkpoints (Standard: alle .pth in {DEFAULT_WEIGHTS_DIR})")
+    parser.add_argument("--mode", choices=("static", "dynamic"), default="static", help="Quantisierung (Standard: static)")
+    parser.add_argument("--calibrate-method", choices=("minmax", "entropy", "percentile"), default="minmax")
+    parser.add_argument("--windows-per-clip", type=int, default=16, help="Kalibrier-Fenster pro Clip")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Verwendete Länge pro Clip in Sekunden")
+    parser.add_argument("--eval-clips", nargs="*", help="Clips für den Qualitätsbericht (Standard: Kalibrier-Clips)")
+    parser.add_argument("--report", help="Pfad des JSON-Berichts (Standard: quantization_report.json im Gewichtsordner)")
+    args = parser.parse_args()
+
+    clips = [path for pattern in args.clips for path in (sorted(glob.glob(pattern)) or [pattern])]
+    missing = [c for c in clips if not os.path.exists(c)]
+    if missing:
+        print(f"File not found: {', '.join(missing)}")
+        sys.exit(2)
+    eval_clips = args.eval_clips or clips
+
+    models = args.models or sorted(
+        os.path.join(DEFAULT_WEIGHTS_DIR, name)
+        for name in os.listdir(DEFAULT_WEIGHTS_DIR)
+        if name.endswith(".pth")
+    )
+
+    report = {"mode": args.mode, "models": []}
+    failed = 0
+    for model_path in models:
+        model_path = os.path.abspath(model_path)
+        logger.info(f"🔧 {os.path.basename(model_path)}")
+        try:
+            int8_path, info = quantize_model(
+                model_path, clips, args.mode, args.windows_per_clip, args.seconds, args.calibrate_method
+            )
+            rows = quality_report(model_path, eval_clips, args.seconds)
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ Quantisierung fehlgeschlagen für {model_path}: {e}")
+            report["models"].append({"model": os.path.basename(model_path), "error": str(e)})
+            continue
+        report["models"].append({
+            "model": os.path.basename(model_path),
+            "int8_model": os.path.basename(int8_path),
+            "quantization": info["quantization"],
+            "clips": rows,
+            "mean_vocals_sdr_db": round(float(np.mean([r["vocals_sdr_db"] for r in rows])), 1),
+            "mean_instrumental_sdr_db": round(float(np.mean([r["instrumental_sdr_db"] for r in rows])), 1),
+            "mean_speedup": round(float(np.mean([r["speedup"] for r in rows])), 2),
+        })
+
+    print()
+    print(f"{'Modell':<32} {'SDR Vocals':>11} {'SDR Instr.':>11} {'Speedup':>8}")
+    for entry in report["models"]:
+        if "error" in entry:
+            print(f"{entry['model']:<32} FEHLER: {entry['error']}")
+            continue
+        print(f"{entry['model']:<32} {entry['mean_vocals_sdr_db']:>10} {entry['mean_instrumental_sdr_db']:>10} "
+              f"{entry['mean_speedup']:>7}x")
+
+    report_path = args.report or os.path.join(DEFAULT_WEIGHTS_DIR, "quantization_report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"Bericht gespeichert: {report_path}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import json
+import os
 
 import numpy as np
 import torch
-from tqdm import tqdm
 
 
 def load_data(file_name: str = "./infer/lib/uvr5_pack/name_params.json") -> dict:
@@ -22,26 +22,60 @@ def make_padding(width, cropsize, offset):
     return left, right, roi_size
 
 
+# Obergrenze für automatisch bestimmte Batch-Größen
+MAX_AUTO_BATCH_SIZE = 16
+
+
+def auto_batch_size(window_bytes, device, is_half):
+    """
+    Bestimmt die Anzahl Fenster pro Batch anhand des verfügbaren Speichers.
+
+    window_bytes: Größe eines Eingabefensters in Bytes; die Aktivierungen der
+    CascadedASPPNet-Stufen benötigen ein Vielfaches davon.
+    """
+    activation_factor = 48
+    per_window = max(1, window_bytes * activation_factor)
+    free_bytes = None
+    try:
+        if str(device).startswith("cuda") and torch.cuda.is_available():
+            free_bytes, _ = torch.cuda.mem_get_info()
+        elif hasattr(os, "sysconf") and "SC_AVPHYS_PAGES" in os.sysconf_names:
+            free_bytes = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        free_bytes = None
+    if not free_bytes:
+        return 4
+    # Nur einen Teil des freien Speichers verplanen
+    return int(max(1, min(MAX_AUTO_BATCH_SIZE, (free_bytes // 4) // per_window)))
+
+
 def inference(X_spec, device, model, aggressiveness, data):
     """
     data ： dic configs
+    data["batch_size"]: Fenster pro Inferenz-Batch (0/None = automatisch, 1 = fensterweise)
     """
 
     def _execute(
         X_mag_pad, roi_size, n_window, device, model, aggressiveness, is_half=True
     ):
         model.eval()
+        window_size = data["window_size"]
+        batch_size = data.get("batch_size") or int(os.getenv("UVR5_BATCH_SIZE", "0") or 0)
+        if not batch_size:
+            window_bytes = X_mag_pad.shape[0] * X_mag_pad.shape[1] * window_size * (2 if is_half else 4)
+            batch_size = auto_batch_size(window_bytes, device, is_half)
+        batch_size = max(1, min(int(batch_size), n_window))
+
         with torch.no_grad():
             preds = []
-
-            iterations = [n_window]
-
-            total_iterations = sum(iterations)
-            for i in tqdm(range(n_window)):
-                start = i * roi_size
-                X_mag_window = X_mag_pad[
-                    None, :, :, start : start + data["window_size"]
-                ]
+            for batch_start in range(0, n_window, batch_size):
+                batch_end = min(batch_start + batch_size, n_window)
+                X_mag_window = np.stack(
+                    [
+                        X_mag_pad[:, :, i * roi_size : i * roi_size + window_size]
+                        for i in range(batch_start, batch_end)
+                    ]
+                )
                 X_mag_window = torch.from_numpy(X_mag_window)
                 if is_half:
                     X_mag_window = X_mag_window.half()
@@ -49,10 +83,12 @@ def inference(X_spec, device, model, aggressiveness, data):
 
                 pred = model.predict(X_mag_window, aggressiveness)
 
+                # Ein Host-Transfer pro Batch
                 pred = pred.detach().cpu().numpy()
-                preds.append(pred[0])
+                preds.extend(pred)
 
-            pred = np.concatenate(preds, axis=2)
+            # float16-Ausgaben (is_half) wieder in float32 weiterrechnen
+            pred = np.concatenate(preds, axis=2).astype(np.float32, copy=False)
         return pred
 
     def preprocess(X_spec):
@@ -72,10 +108,10 @@ def inference(X_spec, device, model, aggressiveness, data):
 
     X_mag_pad = np.pad(X_mag_pre, ((0, 0), (0, 0), (pad_l, pad_r)), mode="constant")
 
-    if list(model.state_dict().values())[0].dtype == torch.float16:
-        is_half = True
-    else:
-        is_half = False
+    # ONNX-Modelle (onnx_vr.OnnxVRModel) haben kein state_dict und geben is_half vor
+    is_half = getattr(model, "is_half", None)
+    if is_half is None:
+        is_half = list(model.state_dict().values())[0].dtype == torch.float16
     pred = _execute(
         X_mag_pad, roi_size, n_window, device, model, aggressiveness, is_half
     )
@@ -94,9 +130,9 @@ def inference(X_spec, device, model, aggressiveness, data):
         pred_tta = pred_tta[:, :, roi_size // 2 :]
         pred_tta = pred_tta[:, :, :n_frame]
 
-        return (pred + pred_tta) * 0.5 * coef, X_mag, np.exp(1.0j * X_phase)
+        return (pred + pred_tta) * 0.5 * coef, X_mag, np.exp(np.complex64(1j) * X_phase)
     else:
-        return pred * coef, X_mag, np.exp(1.0j * X_phase)
+        return pred * coef, X_mag, np.exp(np.complex64(1j) * X_phase)
 
 
 def _get_name_params(model_path, model_hash):
@@ -1,4 +1,5 @@
 import os
+import json
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,6 +13,12 @@ from lib_v5 import nets_61968KB as Nets
 from lib_v5 import spec_utils
 from lib_v5.model_param_init import ModelParameters
 from lib_v5.nets_new import CascadedNet
+from lib_v5.resampling import ResampleCache, get_resampler
+try:
+    # Gemeinsamer ffmpeg-Decoder des Service (ai-services/modules)
+    from modules.audio_decoder import decode_audio
+except ImportError:
+    decode_audio = None
 try:
     from .utils import inference
 except ImportError:
@@ -33,9 +40,416 @@ except ImportError:
         else:
             raise ImportError("Could not find UVR5 utils module")
 
+# Abschnittsweise Verarbeitung langer Tracks (überschreibbar per Umgebungsvariablen)
+DEFAULT_CHUNK_SECONDS = 120.0  # UVR5_CHUNK_SECONDS, 0 = aus
+DEFAULT_CHUNK_OVERLAP = 4.0  # UVR5_CHUNK_OVERLAP, Überlappung je Seite in Sekunden
+DEFAULT_CHUNK_MIN_DURATION = 480.0  # UVR5_CHUNK_MIN_DURATION, kürzere Tracks am Stück
+
+
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def chunk_settings(chunk_seconds=None):
+    """Liefert (Abschnittslänge, Überlappung, Mindestdauer) in Sekunden"""
+    if chunk_seconds is None:
+        chunk_seconds = _env_float("UVR5_CHUNK_SECONDS", DEFAULT_CHUNK_SECONDS)
+    chunk_seconds = max(0.0, chunk_seconds)
+    # Überlappung höchstens ein Viertel des Abschnitts, damit sich Überblendungen nicht berühren
+    overlap = min(max(0.0, _env_float("UVR5_CHUNK_OVERLAP", DEFAULT_CHUNK_OVERLAP)), chunk_seconds / 4)
+    min_duration = _env_float("UVR5_CHUNK_MIN_DURATION", DEFAULT_CHUNK_MIN_DURATION)
+    return chunk_seconds, overlap, min_duration
+
+
+def _load_input_wave(bp, music_file, wave=None, wave_sr=None, resampler=None):
+    """Lädt bzw. resampled die Eingabe auf die Samplerate des obersten Bands als (2, Samples) float32"""
+    if wave is None:
+        # In Original-Samplerate dekodieren; resampelt wird über das Resampling-Profil
+        if decode_audio is not None:
+            buffer = decode_audio(music_file, channels=2)
+            wave, wave_sr = buffer.samples, buffer.sample_rate
+        else:
+            wave, wave_sr = librosa.load(music_file, sr=None, mono=False)
+    audio = np.asarray(wave, dtype=np.float32)
+    if wave_sr != bp["sr"]:
+        audio = (resampler or get_resampler()).resample(audio, wave_sr, bp["sr"], res_type=bp["res_type"])
+    if audio.ndim == 1:
+        audio = np.stack((audio, audio))
+    return audio
+
+
+def _compute_input_spectrogram(
+    mp, music_file, high_end_process="mirroring", wave=None, wave_sr=None, resampler=None, cache=None
+):
+    """
+    Multi-Band-STFT der Eingabe; hängt nur von modelparams ab und ist daher zwischen Modellen teilbar
+
+    Ist wave gesetzt (Array (Kanäle, Samples) bzw. mono, Samplerate wave_sr), wird
+    statt music_file direkt das In-Memory-Signal verwendet. Mit cache (ResampleCache)
+    werden Dekodierung und Resampling-Kette zwischen Frontends geteilt.
+    """
+    input_high_end_h, input_high_end = None, None
+    bands_n = len(mp.param["band"])
+    bp = mp.param["band"][bands_n]
+    resampler = resampler or get_resampler()
+
+    def load():
+        return _load_input_wave(bp, music_file, wave, wave_sr, resampler)
+
+    if cache is None:
+        audio = load()
+    else:
+        audio = cache.get_or_compute(
+            ("load", bp["sr"], resampler.method_key(bp["res_type"])),
+            music_file if wave is None else wave,
+            load,
+        )
+    # Alle Bänder und Kanäle im Thread-Pool von spec_utils
+    X_spec_s = spec_utils.multiband_spectrograms(audio, mp, resampler=resampler, cache=cache)
+    if high_end_process != "none":
+        input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (
+            mp.param["pre_filter_stop"] - mp.param["pre_filter_start"]
+        )
+        input_high_end = X_spec_s[bands_n][
+            :, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :
+        ]
+
+    X_spec_m = spec_utils.combine_spectrograms(X_spec_s, mp)
+    return X_spec_m, input_high_end_h, input_high_end
+
+
+def _predict_stems(pre, X_spec_m):
+    """Führt die Netz-Inferenz aus und liefert (y_spec_m, v_spec_m)"""
+    aggresive_set = float(pre.data["agg"] / 100)
+    aggressiveness = {
+        "value": aggresive_set,
+        "split_bin": pre.mp.param["band"][1]["crop_stop"],
+    }
+    with torch.no_grad():
+        pred, X_mag, X_phase = inference(
+            X_spec_m, pre.device, pre.model, aggressiveness, pre.data
+        )
+    # Postprocess
+    if pre.data["postprocess"]:
+        pred_inv = np.clip(X_mag - pred, 0, np.inf)
+        pred = spec_utils.mask_silence(pred, pred_inv)
+    y_spec_m = pred * X_phase
+    v_spec_m = X_spec_m - y_spec_m
+    return y_spec_m, v_spec_m
+
+
+def _spectrogram_to_wave(pre, spec_m, input_high_end_h, input_high_end):
+    """Rekonstruiert die Wellenform eines Stems inkl. High-End-Verarbeitung"""
+    if pre.data["high_end_process"].startswith("mirroring"):
+        input_high_end_ = spec_utils.mirroring(
+            pre.data["high_end_process"], spec_m, input_high_end, pre.mp
+        )
+        return spec_utils.cmb_spectrogram_to_wave(
+            spec_m, pre.mp, input_high_end_h, input_high_end_, resampler=_resampler(pre)
+        )
+    return spec_utils.cmb_spectrogram_to_wave(spec_m, pre.mp, resampler=_resampler(pre))
+
+
+def _write_wave(wave, root, stem, format, sr):
+    """Schreibt einen Stem als int16 (wav/flac) bzw. über ffmpeg in das Zielformat"""
+    if format in ["wav", "flac"]:
+        sf.write(
+            os.path.join(root, "{}.{}".format(stem, format)),
+            (np.array(wave) * 32768).astype("int16"),
+            sr,
+        )
+        return
+    path = os.path.join(root, "{}.wav".format(stem))
+    sf.write(
+        path,
+        (np.array(wave) * 32768).astype("int16"),
+        sr,
+    )
+    if os.path.exists(path):
+        opt_format_path = path[:-4] + ".%s" % format
+        import subprocess
+        try:
+            subprocess.run([
+                'ffmpeg', '-i', path, '-vn', opt_format_path, '-q:a', '2', '-y'
+            ], check=True, capture_output=True)
+            if os.path.exists(opt_format_path):
+                try:
+                    os.remove(path)
+                except:
+                    pass
+        except subprocess.CalledProcessError as e:
+            logger.warning(f"FFmpeg conversion failed: {e}")
+
+
+def _write_stems(pre, name, y_spec_m, v_spec_m, front, ins_root, vocal_root, format, ins_head, vocal_head, keep=()):
+    """
+    Rekonstruiert die Stems und schreibt sie nach ins_root/vocal_root
+
+    Stems, die in keep ('instrumental'/'vocals') stehen, werden zusätzlich als
+    Array (Samples, Kanäle) zurückgegeben; ohne Zielordner wird nichts geschrieben.
+    """
+    input_high_end_h, input_high_end = front
+    waves = {}
+    if ins_root is not None or "instrumental" in keep:
+        wav_instrument = _spectrogram_to_wave(pre, y_spec_m, input_high_end_h, input_high_end)
+        logger.info("%s instruments done" % name)
+        if ins_root is not None:
+            _write_wave(
+                wav_instrument,
+                ins_root,
+                ins_head + "{}_{}".format(name, pre.data["agg"]),
+                format,
+                pre.mp.param["sr"],
+            )
+        if "instrumental" in keep:
+            waves["instrumental"] = wav_instrument
+    if vocal_root is not None or "vocals" in keep:
+        wav_vocals = _spectrogram_to_wave(pre, v_spec_m, input_high_end_h, input_high_end)
+        logger.info("%s vocals done" % name)
+        if vocal_root is not None:
+            _write_wave(
+                wav_vocals,
+                vocal_root,
+                vocal_head + "{}_{}".format(name, pre.data["agg"]),
+                format,
+                pre.mp.param["sr"],
+            )
+        if "vocals" in keep:
+            waves["vocals"] = wav_vocals
+    return waves
+
+
+def _resampler(pre):
+    """Resampler des Modells (data["resample_profile"], None = UVR5_RESAMPLE_PROFILE)"""
+    return get_resampler(pre.data.get("resample_profile"))
+
+
+def _front_key(pre):
+    """Schlüssel für das gemeinsam nutzbare STFT-Frontend (modelparams + High-End-Verarbeitung + Resampling)"""
+    return (
+        json.dumps(pre.mp.param, sort_keys=True, default=str),
+        pre.data["high_end_process"] != "none",
+        _resampler(pre).profile,
+    )
+
+
+def _fit_length(wave, length):
+    """Schneidet bzw. füllt eine Wellenform (Samples, Kanäle) auf length Samples"""
+    if wave.shape[0] >= length:
+        return wave[:length]
+    return np.pad(wave, ((0, length - wave.shape[0]), (0, 0)))
+
+
+def _crossfade_weights(length, start, fade_in_at, fade_out_at, ramp):
+    """
+    Gewichte eines Abschnitts: 1 im Kern, komplementäre Hann-Rampen um die Grenzen,
+    0 in den äußeren Rändern (dort liegen die STFT-Randartefakte des Abschnitts)
+    """
+    weight = np.ones(length, dtype=np.float32)
+    if fade_in_at is not None:
+        offset = fade_in_at - start
+        weight[:offset] = 0
+        weight[offset : offset + len(ramp)] = ramp
+    if fade_out_at is not None:
+        offset = fade_out_at - start
+        weight[offset : offset + len(ramp)] = ramp[::-1]
+        weight[offset + len(ramp) :] = 0
+    return weight
+
+
+def _path_audio_chunked(active, name, wave, sr, chunk_samples, overlap_samples, format):
+    """
+    Trennt ein langes Signal in überlappenden Abschnitten (STFT -> Inferenz -> ISTFT)
+
+    Spektrogramme, Masken und Phasen existieren nur für einen Abschnitt gleichzeitig;
+    die Stems werden mit komplementären Rampen in volle Länge zusammengesetzt.
+
+    active: Liste von (job, result) der Jobs mit Ausgaben
+    wave: Eingabe (2, Samples) in der Samplerate sr aller Modelle
+    """
+    n_samples = wave.shape[1]
+    n_chunks = max(1, int(round(n_samples / chunk_samples)))
+    bounds = np.linspace(0, n_samples, n_chunks + 1).astype(np.int64)
+    half = overlap_samples // 2
+    ramp = (0.5 - 0.5 * np.cos(np.pi * (np.arange(2 * half) + 0.5) / max(1, 2 * half))).astype(np.float32)
+
+    outputs = []
+    for job, result in active:
+        keep = tuple(job.get("keep") or ())
+        stems = {}
+        if job.get("ins_root") is not None or "instrumental" in keep:
+            stems["instrumental"] = np.zeros((n_samples, 2), dtype=np.float32)
+        if job.get("vocal_root") is not None or "vocals" in keep:
+            stems["vocals"] = np.zeros((n_samples, 2), dtype=np.float32)
+        outputs.append(stems)
+
+    logger.info(
+        "%s: %d Abschnitte à ~%.0fs (Überlappung %.1fs)"
+        % (name, n_chunks, n_samples / n_chunks / sr, overlap_samples / sr)
+    )
+    for i in range(n_chunks):
+        start = max(0, int(bounds[i]) - overlap_samples)
+        stop = min(n_samples, int(bounds[i + 1]) + overlap_samples)
+        weight = _crossfade_weights(
+            stop - start,
+            start,
+            int(bounds[i]) - half if i > 0 else None,
+            int(bounds[i + 1]) - half if i < n_chunks - 1 else None,
+            ramp,
+        )[:, None]
+        segment = np.ascontiguousarray(wave[:, start:stop])
+
+        fronts = {}
+        cache = ResampleCache()
+        for (job, result), stems in zip(active, outputs):
+            pre = job["model"]
+            key = _front_key(pre)
+            if key not in fronts:
+                fronts[key] = _compute_input_spectrogram(
+                    pre.mp, None, pre.data["high_end_process"], wave=segment, wave_sr=sr,
+                    resampler=_resampler(pre), cache=cache,
+                )
+            X_spec_m, input_high_end_h, input_high_end = fronts[key]
+            y_spec_m, v_spec_m = _predict_stems(pre, X_spec_m)
+            for stem, spec_m in (("instrumental", y_spec_m), ("vocals", v_spec_m)):
+                if stem in stems:
+                    part = _spectrogram_to_wave(pre, spec_m, input_high_end_h, input_high_end)
+                    stems[stem][start:stop] += _fit_length(np.asarray(part, dtype=np.float32), stop - start) * weight
+            del y_spec_m, v_spec_m
+        del fronts, cache
+        logger.info("%s: Abschnitt %d/%d fertig (%.1fs-%.1fs)" % (name, i + 1, n_chunks, start / sr, stop / sr))
+
+    for (job, result), stems in zip(active, outputs):
+        pre = job["model"]
+        keep = tuple(job.get("keep") or ())
+        ins_head, vocal_head = pre._stem_heads(job.get("is_hp3", False))
+        for stem, root, head in (
+            ("instrumental", job.get("ins_root"), ins_head),
+            ("vocals", job.get("vocal_root"), vocal_head),
+        ):
+            if stem not in stems:
+                continue
+            logger.info("%s %s done" % (name, "instruments" if stem == "instrumental" else stem))
+            if root is not None:
+                _write_wave(stems[stem], root, head + "{}_{}".format(name, pre.data["agg"]), format, pre.mp.param["sr"])
+            if stem in keep:
+                result[stem] = stems[stem]
+
+
+def path_audio_multi(jobs, music_file, format="flac", wave=None, wave_sr=None, chunk_seconds=None):
+    """
+    Trennt eine Datei mit mehreren Modellen in einem Durchgang.
+
+    Die Multi-Band-Spektrogramme werden pro modelparams-Konfiguration nur einmal
+    berechnet und für alle Modelle mit identischen Parametern wiederverwendet.
+    Tracks über UVR5_CHUNK_MIN_DURATION werden in überlappenden Abschnitten
+    verarbeitet, damit der Speicherbedarf nicht mit der Songlänge wächst.
+
+    jobs: Liste von Dicts mit 'model' (AudioPre/AudioPreDeEcho), 'ins_root',
+          'vocal_root' und optional 'is_hp3' sowie 'keep' (Stems, die
+          in-memory zurückgegeben werden sollen: 'instrumental'/'vocals')
+    wave/wave_sr: optionales In-Memory-Eingangssignal statt music_file
+    chunk_seconds: Abschnittslänge (None = UVR5_CHUNK_SECONDS, 0 = am Stück)
+
+    Returns:
+        Liste (parallel zu jobs) mit Dicts {'instrumental', 'vocals', 'sample_rate'};
+        nicht angeforderte Stems sind None
+    """
+    name = os.path.basename(music_file) if music_file else "buffer"
+    results = []
+    active = []
+    for job in jobs:
+        pre = job["model"]
+        ins_root = job.get("ins_root")
+        vocal_root = job.get("vocal_root")
+        keep = tuple(job.get("keep") or ())
+        result = {"instrumental": None, "vocals": None, "sample_rate": pre.mp.param["sr"]}
+        results.append(result)
+        if ins_root is None and vocal_root is None and not keep:
+            continue
+        if ins_root is not None:
+            os.makedirs(ins_root, exist_ok=True)
+        if vocal_root is not None:
+            os.makedirs(vocal_root, exist_ok=True)
+        active.append((job, result))
+    if not active:
+        return results
+
+    chunk_seconds, overlap_seconds, min_duration = chunk_settings(chunk_seconds)
+    if chunk_seconds > 0:
+        # Abschnitte setzen voraus, dass alle Modelle im obersten Band mit der Ausgabe-Samplerate arbeiten
+        high_bands = [job["model"].mp.param["band"][len(job["model"].mp.param["band"])] for job, _ in active]
+        sr = active[0][0]["model"].mp.param["sr"]
+        if all(bp["sr"] == sr and job["model"].mp.param["sr"] == sr for bp, (job, _) in zip(high_bands, active)):
+            # Eingabe einmal dekodieren; auch der Pfad am Stück nutzt dieses Signal
+            wave = _load_input_wave(high_bands[0], music_file, wave, wave_sr, _resampler(active[0][0]["model"]))
+            wave_sr = sr
+            n_samples = wave.shape[1]
+            if n_samples > min_duration * sr and n_samples > chunk_seconds * sr:
+                _path_audio_chunked(
+                    active, name, wave, sr, int(chunk_seconds * sr), int(overlap_seconds * sr), format
+                )
+                return results
+
+    fronts = {}
+    cache = ResampleCache()
+    for job, result in active:
+        pre = job["model"]
+        key = _front_key(pre)
+        if key not in fronts:
+            fronts[key] = _compute_input_spectrogram(
+                pre.mp, music_file, pre.data["high_end_process"], wave=wave, wave_sr=wave_sr,
+                resampler=_resampler(pre), cache=cache,
+            )
+        else:
+            logger.info("%s: STFT-Frontend wiederverwendet" % name)
+        X_spec_m, input_high_end_h, input_high_end = fronts[key]
+
+        y_spec_m, v_spec_m = _predict_stems(pre, X_spec_m)
+        ins_head, vocal_head = pre._stem_heads(job.get("is_hp3", False))
+        result.update(_write_stems(
+            pre, name, y_spec_m, v_spec_m, (input_high_end_h, input_high_end),
+            job.get("ins_root"), job.get("vocal_root"), format, ins_head, vocal_head,
+            keep=tuple(job.get("keep") or ()),
+        ))
+        del y_spec_m, v_spec_m
+    return results
+
+
+# Backends der VR-Modelle; onnx_int8 ist das schnellere, leicht verlustbehaftete CPU-Profil
+VR_BACKENDS = ("torch", "onnx", "onnx_int8")
+
+
+def _vr_backend(backend=None):
+    """Inferenz-Backend der VR-Modelle aus VR_BACKENDS (None = UVR5_VR_BACKEND bzw. 'torch')"""
+    backend = (backend or os.getenv("UVR5_VR_BACKEND", "torch")).lower()
+    if backend not in VR_BACKENDS:
+        logger.warning("Unbekanntes VR-Backend '%s', nutze PyTorch" % backend)
+        return "torch"
+    return backend
+
+
+def _load_onnx_backend(model_path, modelparams, kind, device, backend="onnx"):
+    """ONNX-Runtime-Modell zum Checkpoint oder None (dann PyTorch)"""
+    if str(device).startswith("cuda"):
+        logger.warning("ONNX-Backend läuft nur auf der CPU, nutze PyTorch auf %s" % device)
+        return None
+    try:
+        from .onnx_vr import load_onnx_model
+    except ImportError:
+        from onnx_vr import load_onnx_model
+    return load_onnx_model(
+        model_path, modelparams, kind, variant="int8" if backend == "onnx_int8" else None
+    )
+
 
 class AudioPre:
-    def __init__(self, agg, model_path, device, is_half, tta=False):
+    modelparams = "4band_v2"
+
+    def __init__(self, agg, model_path, device, is_half, tta=False, backend=None):
         self.model_path = model_path
         self.device = device
         self.data = {
@@ -44,10 +458,20 @@ class AudioPre:
             "tta": tta,
             # Constants
             "window_size": 512,
+            "batch_size": 0,  # Fenster pro Inferenz-Batch, 0 = automatisch
             "agg": agg,
             "high_end_process": "mirroring",
+            "resample_profile": None,  # None = UVR5_RESAMPLE_PROFILE
         }
-        mp = ModelParameters(os.path.join(os.path.dirname(__file__), "lib_v5", "modelparams", "4band_v2.json"))
+        mp = ModelParameters(os.path.join(os.path.dirname(__file__), "lib_v5", "modelparams", "%s.json" % self.modelparams))
+        self.mp = mp
+        self.backend = "torch"
+        backend = _vr_backend(backend)
+        if backend != "torch":
+            self.model = _load_onnx_backend(model_path, self.modelparams, "AudioPre", device, backend)
+            if self.model is not None:
+                self.backend = backend
+                return
         model = Nets.CascadedASPPNet(mp.param["bins"] * 2)
         cpk = torch.load(model_path, map_location="cpu")
         model.load_state_dict(cpk)
@@ -57,173 +481,29 @@ class AudioPre:
         else:
             model = model.to(device)
 
-        self.mp = mp
         self.model = model
 
+    def _stem_heads(self, is_hp3=False):
+        if is_hp3 == True:
+            return "vocal_", "instrument_"
+        return "instrument_", "vocal_"
+
     def _path_audio_(
         self, music_file, ins_root=None, vocal_root=None, format="flac", is_hp3=False
     ):
         if ins_root is None and vocal_root is None:
             return "No save root."
-        name = os.path.basename(music_file)
-        if ins_root is not None:
-            os.makedirs(ins_root, exist_ok=True)
-        if vocal_root is not None:
-            os.makedirs(vocal_root, exist_ok=True)
-        X_wave, y_wave, X_spec_s, y_spec_s = {}, {}, {}, {}
-        bands_n = len(self.mp.param["band"])
-        # print(bands_n)
-        for d in range(bands_n, 0, -1):
-            bp = self.mp.param["band"][d]
-            if d == bands_n:  # high-end band
-                audio = librosa.load(
-                    music_file,
-                    sr=bp["sr"],
-                    mono=False,
-                    res_type=bp["res_type"],
-                )[0].astype(np.float32)
-                if audio.ndim == 1:
-                    audio = np.asfortranarray([audio, audio])
-            else:  # lower bands
-                audio = librosa.resample(
-                    audio,
-                    orig_sr=self.mp.param["band"][d + 1]["sr"],
-                    target_sr=bp["sr"],
-                    res_type=bp["res_type"],
-                )
-            # Stft of wave source
-            X_spec_s[d] = spec_utils.wave_to_spectrogram_mt(
-                audio,
-                bp["hl"],
-                bp["n_fft"],
-                self.mp.param["mid_side"],
-                self.mp.param["mid_side_b2"],
-                self.mp.param["reverse"],
-            )
-            # pdb.set_trace()
-            if d == bands_n and self.data["high_end_process"] != "none":
-                input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (
-                    self.mp.param["pre_filter_stop"] - self.mp.param["pre_filter_start"]
-                )
-                input_high_end = X_spec_s[d][
-                    :, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :
-                ]
-
-        X_spec_m = spec_utils.combine_spectrograms(X_spec_s, self.mp)
-        aggresive_set = float(self.data["agg"] / 100)
-        aggressiveness = {
-            "value": aggresive_set,
-            "split_bin": self.mp.param["band"][1]["crop_stop"],
-        }
-        with torch.no_grad():
-            pred, X_mag, X_phase = inference(
-                X_spec_m, self.device, self.model, aggressiveness, self.data
-            )
-        # Postprocess
-        if self.data["postprocess"]:
-            pred_inv = np.clip(X_mag - pred, 0, np.inf)
-            pred = spec_utils.mask_silence(pred, pred_inv)
-        y_spec_m = pred * X_phase
-        v_spec_m = X_spec_m - y_spec_m
-
-        if ins_root is not None:
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], y_spec_m, input_high_end, self.mp
-                )
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(
-                    y_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(y_spec_m, self.mp)
-            logger.info("%s instruments done" % name)
-            if is_hp3 == True:
-                head = "vocal_"
-            else:
-                head = "instrument_"
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        ins_root,
-                        head + "{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )  #
-            else:
-                path = os.path.join(
-                    ins_root, head + "{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    opt_format_path = path[:-4] + ".%s" % format
-                    import subprocess
-                    try:
-                        subprocess.run([
-                            'ffmpeg', '-i', path, '-vn', opt_format_path, '-q:a', '2', '-y'
-                        ], check=True, capture_output=True)
-                        if os.path.exists(opt_format_path):
-                            try:
-                                os.remove(path)
-                            except:
-                                pass
-                    except subprocess.CalledProcessError as e:
-                        logger.warning(f"FFmpeg conversion failed: {e}")
-        if vocal_root is not None:
-            if is_hp3 == True:
-                head = "instrument_"
-            else:
-                head = "vocal_"
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], v_spec_m, input_high_end, self.mp
-                )
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(
-                    v_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(v_spec_m, self.mp)
-            logger.info("%s vocals done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        vocal_root,
-                        head + "{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-            else:
-                path = os.path.join(
-                    vocal_root, head + "{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    opt_format_path = path[:-4] + ".%s" % format
-                    import subprocess
-                    try:
-                        subprocess.run([
-                            'ffmpeg', '-i', path, '-vn', opt_format_path, '-q:a', '2', '-y'
-                        ], check=True, capture_output=True)
-                        if os.path.exists(opt_format_path):
-                            try:
-                                os.remove(path)
-                            except:
-                                pass
-                    except subprocess.CalledProcessError as e:
-                        logger.warning(f"FFmpeg conversion failed: {e}")
+        path_audio_multi(
+            [{"model": self, "ins_root": ins_root, "vocal_root": vocal_root, "is_hp3": is_hp3}],
+            music_file,
+            format=format,
+        )
 
 
 class AudioPreDeEcho:
-    def __init__(self, agg, model_path, device, is_half, tta=False):
+    modelparams = "4band_v3"
+
+    def __init__(self, agg, model_path, device, is_half, tta=False, backend=None):
         self.model_path = model_path
         self.device = device
         self.data = {
@@ -232,10 +512,20 @@ class AudioPreDeEcho:
             "tta": tta,
             # Constants
             "window_size": 512,
+            "batch_size": 0,  # Fenster pro Inferenz-Batch, 0 = automatisch
             "agg": agg,
             "high_end_process": "mirroring",
+            "resample_profile": None,  # None = UVR5_RESAMPLE_PROFILE
         }
-        mp = ModelParameters(os.path.join(os.path.dirname(__file__), "lib_v5", "modelparams", "4band_v3.json"))
+        mp = ModelParameters(os.path.join(os.path.dirname(__file__), "lib_v5", "modelparams", "%s.json" % self.modelparams))
+        self.mp = mp
+        self.backend = "torch"
+        backend = _vr_backend(backend)
+        if backend != "torch":
+            self.model = _load_onnx_backend(model_path, self.modelparams, "AudioPreDeEcho", device, backend)
+            if self.model is not None:
+                self.backend = backend
+                return
         nout = 64 if "DeReverb" in model_path else 48
         model = CascadedNet(mp.param["bins"] * 2, nout)
         cpk = torch.load(model_path, map_location="cpu")
@@ -246,158 +536,18 @@ class AudioPreDeEcho:
         else:
             model = model.to(device)
 
-        self.mp = mp
         self.model = model
 
+    def _stem_heads(self, is_hp3=False):
+        return "instrument_", "vocal_"
+
     def _path_audio_(
         self, music_file, vocal_root=None, ins_root=None, format="flac", is_hp3=False
     ):  # 3个VR模型vocal和ins是反的
         if ins_root is None and vocal_root is None:
             return "No save root."
-        name = os.path.basename(music_file)
-        if ins_root is not None:
-            os.makedirs(ins_root, exist_ok=True)
-        if vocal_root is not None:
-            os.makedirs(vocal_root, exist_ok=True)
-        X_wave, y_wave, X_spec_s, y_spec_s = {}, {}, {}, {}
-        bands_n = len(self.mp.param["band"])
-        # print(bands_n)
-        for d in range(bands_n, 0, -1):
-            bp = self.mp.param["band"][d]
-            if d == bands_n:  # high-end band
-                audio = librosa.load(
-                    music_file,
-                    sr=bp["sr"],
-                    mono=False,
-                    res_type=bp["res_type"],
-                )[0].astype(np.float32)
-                if audio.ndim == 1:
-                    audio = np.asfortranarray([audio, audio])
-            else:  # lower bands
-                audio = librosa.resample(
-                    audio,
-                    orig_sr=self.mp.param["band"][d + 1]["sr"],
-                    target_sr=bp["sr"],
-                    res_type=bp["res_type"],
-                )
-            # Stft of wave source
-            X_spec_s[d] = spec_utils.wave_to_spectrogram_mt(
-                audio,
-                bp["hl"],
-                bp["n_fft"],
-                self.mp.param["mid_side"],
-                self.mp.param["mid_side_b2"],
-                self.mp.param["reverse"],
-            )
-            # pdb.set_trace()
-            if d == bands_n and self.data["high_end_process"] != "none":
-                input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (
-                    self.mp.param["pre_filter_stop"] - self.mp.param["pre_filter_start"]
-                )
-                input_high_end = X_spec_s[d][
-                    :, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :
-                ]
-
-        X_spec_m = spec_utils.combine_spectrograms(X_spec_s, self.mp)
-        aggresive_set = float(self.data["agg"] / 100)
-        aggressiveness = {
-            "value": aggresive_set,
-            "split_bin": self.mp.param["band"][1]["crop_stop"],
-        }
-        with torch.no_grad():
-            pred, X_mag, X_phase = inference(
-                X_spec_m, self.device, self.model, aggressiveness, self.data
-            )
-        # Postprocess
-        if self.data["postprocess"]:
-            pred_inv = np.clip(X_mag - pred, 0, np.inf)
-            pred = spec_utils.mask_silence(pred, pred_inv)
-        y_spec_m = pred * X_phase
-        v_spec_m = X_spec_m - y_spec_m
-
-        if ins_root is not None:
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], y_spec_m, input_high_end, self.mp
-                )
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(
-                    y_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(y_spec_m, self.mp)
-            logger.info("%s instruments done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        ins_root,
-                        "instrument_{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )  #
-            else:
-                path = os.path.join(
-                    ins_root, "instrument_{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    opt_format_path = path[:-4] + ".%s" % format
-                    import subprocess
-                    try:
-                        subprocess.run([
-                            'ffmpeg', '-i', path, '-vn', opt_format_path, '-q:a', '2', '-y'
-                        ], check=True, capture_output=True)
-                        if os.path.exists(opt_format_path):
-                            try:
-                                os.remove(path)
-                            except:
-                                pass
-                    except subprocess.CalledProcessError as e:
-                        logger.warning(f"FFmpeg conversion failed: {e}")
-        if vocal_root is not None:
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], v_spec_m, input_high_end, self.mp
-                )
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(
-                    v_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(v_spec_m, self.mp)
-            logger.info("%s vocals done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        vocal_root,
-                        "vocal_{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-            else:
-                path = os.path.join(
-                    vocal_root, "vocal_{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    opt_format_path = path[:-4] + ".%s" % format
-                    import subprocess
-                    try:
-                        subprocess.run([
-                            'ffmpeg', '-i', path, '-vn', opt_format_path, '-q:a', '2', '-y'
-                        ], check=True, capture_output=True)
-                        if os.path.exists(opt_format_path):
-                            try:
-                                os.remove(path)
-                            except:
-                                pass
-                    except subprocess.CalledProcessError as e:
-                        logger.warning(f"FFmpeg conversion failed: {e}")
+        path_audio_multi(
+            [{"model": self, "ins_root": ins_root, "vocal_root": vocal_root, "is_hp3": is_hp3}],
+            music_file,
+            format=format,
+        )
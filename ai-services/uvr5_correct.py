@@ -33,8 +33,11 @@ if os.path.isdir(uvr5_weights_folder):
 class UVR5Wrapper:
     """Eine Wrapper-Klasse für die UVR5-Funktionalität, die die verschiedenen Modelle vereinheitlicht."""
     
-    def __init__(self, model_choice="HP2"):
+    def __init__(self, model_choice="HP2", backend=None):
         self.model_choice = model_choice
+        # Inferenz-Backend ('torch', 'onnx', 'onnx_int8'; None = UVR5_VR_BACKEND),
+        # ONNX-Backends greifen nur auf der CPU
+        self.backend = backend
         
         # Verbesserte CUDA-Erkennung und Debugging-Ausgaben
         logger.info(f"PyTorch CUDA verfügbar: {torch.cuda.is_available()}")
@@ -70,70 +73,52 @@ class UVR5Wrapper:
         if torch.cuda.is_available():
             torch.backends.cudnn.benchmark = True
         
-        # Importiere UVR5-Module
+        # Modelle kommen aus dem prozessweiten Pool, damit der Checkpoint nur einmal geladen wird
         try:
-            # Füge lib_v5 zum Pfad hinzu
-            lib_v5_path = os.path.join(uvr5_folder, 'lib_v5')
-            if lib_v5_path not in sys.path:
-                sys.path.insert(0, lib_v5_path)
-            
-            from vr import AudioPre, AudioPreDeEcho
-            logger.info("UVR5-Module erfolgreich importiert.")
+            from modules.model_pool import get_uvr5_model_pool
         except ImportError as e:
-            logger.error(f"Fehler beim Import der UVR5-Module: {e}")
+            logger.error(f"Fehler beim Import des UVR5-Modell-Pools: {e}")
             raise
         
-        # Je nach Modellwahl das entsprechende Modell initialisieren
-        self.model = AudioPre(
-            agg=10,
-            model_path=model_path,
+        self.model_path = model_path
+        self.agg = 10
+        self.pool = get_uvr5_model_pool()
+        # Nur vorab laden, keine Referenz halten: sonst bliebe ein verdrängtes Modell im Speicher.
+        # Die Instanz wird pro Aufruf über pool.acquire() aufgelöst.
+        model = self.pool.get(
+            model_path,
+            agg=self.agg,
             device=self.device,
-            is_half=self.is_half
+            is_half=self.is_half,
+            backend=self.backend
         )
         
         # Überprüfe, ob das Modell auf dem richtigen Gerät ist
-        if hasattr(self.model, 'device'):
-            logger.info(f"Modell verwendet Gerät: {self.model.device}")
-        
-        # Überprüfe, ob das Modell half-precision verwendet
-        if hasattr(self.model, 'is_half'):
-            logger.info(f"Modell verwendet Half-Precision: {self.model.is_half}")
+        if hasattr(model, 'device'):
+            logger.info(f"Modell verwendet Gerät: {model.device} (Backend: {getattr(model, 'backend', 'torch')})")
     
     def separate(self, audio_path):
         """Führt die Audio-Separation durch und gibt die Ergebnisse zurück."""
         try:
-            # Erstelle temporäre Verzeichnisse für die Ausgabe
-            temp_dir = os.path.dirname(audio_path)
-            inst_dir = os.path.join(temp_dir, "separated", "instrumental")
-            vocal_dir = os.path.join(temp_dir, "separated", "vocals")
-            
-            os.makedirs(inst_dir, exist_ok=True)
-            os.makedirs(vocal_dir, exist_ok=True)
+            from vr import path_audio_multi
             
             logger.info(f"Führe UVR5-Separation durch für: {audio_path}")
-            logger.info(f"Instrumental-Ordner: {inst_dir}")
-            logger.info(f"Vocal-Ordner: {vocal_dir}")
-            
-            # Nutze die _path_audio_ Methode direkt
-            self.model._path_audio_(audio_path, inst_dir, vocal_dir, format="wav")
-            
-            # Finde die generierten Dateien
-            vocal_files = [f for f in os.listdir(vocal_dir) if f.endswith(".wav")]
-            inst_files = [f for f in os.listdir(inst_dir) if f.endswith(".wav")]
             
-            if not vocal_files or not inst_files:
-                raise FileNotFoundError("Keine Ausgabedateien gefunden.")
+            # Stems direkt im Speicher übernehmen statt als WAV zu schreiben und neu zu laden
+            with self.pool.acquire(self.model_path, agg=self.agg, device=self.device, is_half=self.is_half,
+                                   backend=self.backend) as model:
+                result = path_audio_multi(
+                    [{"model": model, "keep": ("instrumental", "vocals")}],
+                    audio_path,
+                )[0]
             
-            # Lade die Ausgabedateien zurück
-            vocal_path = os.path.join(vocal_dir, vocal_files[0])
-            inst_path = os.path.join(inst_dir, inst_files[0])
+            if result['vocals'] is None or result['instrumental'] is None:
+                raise RuntimeError("UVR5 hat keine Stems geliefert.")
             
-            logger.info(f"Vocal-Datei gefunden: {vocal_path}")
-            logger.info(f"Instrumental-Datei gefunden: {inst_path}")
-            
-            # Nutze librosa zum Laden der Dateien
-            vocal_data, sample_rate = librosa.load(vocal_path, sr=None, mono=False)
-            inst_data, _ = librosa.load(inst_path, sr=None, mono=False)
+            # Form (Kanäle, Samples) wie bisher von librosa.load(mono=False)
+            vocal_data = np.asarray(result['vocals']).T
+            inst_data = np.asarray(result['instrumental']).T
+            sample_rate = result['sample_rate']
             
             logger.info(f"Separation erfolgreich. Sample-Rate: {sample_rate}")
             logger.info(f"Vocal-Daten Shape: {vocal_data.shape}")
@@ -145,6 +130,102 @@ class UVR5Wrapper:
             logger.error(f"Fehler bei der UVR5 Separation: {e}")
             raise
 
+def separate_with_models(audio_path, model_choices=("HP5", "HP2"), vocals_for=None, in_memory=False, backend=None,
+                         wave=None, wave_sr=None):
+    """
+    Trennt eine Audio-Datei mit mehreren UVR5-Modellen in einem Durchgang.
+    Das Multi-Band-Spektrogramm wird nur einmal berechnet und von allen Modellen
+    mit gleichen modelparams (HP2/HP5: 4band_v2) gemeinsam genutzt.
+    
+    Args:
+        audio_path: Eingabedatei
+        model_choices: Modelle in Verarbeitungsreihenfolge
+        vocals_for: Modelle, für die eine Vocals-Spur erzeugt wird (None = alle)
+        in_memory: Stems als AudioBuffer zurückgeben statt WAV-Dateien zu schreiben
+        backend: Inferenz-Backend der Modelle (None = UVR5_VR_BACKEND), z.B. 'onnx_int8'
+                 als schnelleres CPU-Profil
+        wave, wave_sr: Bereits dekodiertes Signal (Kanäle, Samples) zu audio_path, z.B. das
+                       float-PCM aus dem ffmpeg-Graph der Separation; audio_path wird dann
+                       nicht dekodiert
+    
+    Returns:
+        Dict model_choice -> {'instrumental': ..., 'vocals': ...} mit WAV-Pfaden
+        bzw. AudioBuffer-Objekten (in_memory=True), None für nicht erzeugte Stems
+    """
+    from contextlib import ExitStack
+    from vr import path_audio_multi
+    
+    wrappers = [UVR5Wrapper(model_choice=choice, backend=backend) for choice in model_choices]
+    sep_dir = os.path.join(os.path.dirname(audio_path), "separated")
+    
+    def wants_vocals(choice):
+        return vocals_for is None or choice in vocals_for
+    
+    # Pro Modell eigene Ausgabeordner, damit sich die Ergebnisse nicht überschreiben
+    roots = {}
+    for wrapper in wrappers:
+        model_dir = os.path.join(sep_dir, wrapper.model_choice.lower())
+        roots[wrapper.model_choice] = (
+            os.path.join(model_dir, "instrumental"),
+            os.path.join(model_dir, "vocals"),
+        )
+    
+    logger.info(f"Führe UVR5-Separation ({', '.join(model_choices)}) in einem Durchgang durch für: {audio_path}")
+    
+    with ExitStack() as stack:
+        # Feste Sperr-Reihenfolge verhindert Deadlocks zwischen parallelen Jobs
+        models = {}
+        for wrapper in sorted(wrappers, key=lambda w: w.model_path):
+            models[wrapper.model_choice] = stack.enter_context(
+                wrapper.pool.acquire(wrapper.model_path, agg=wrapper.agg, device=wrapper.device, is_half=wrapper.is_half,
+                                     backend=wrapper.backend)
+            )
+        if in_memory:
+            jobs = [
+                {
+                    "model": models[wrapper.model_choice],
+                    "keep": ("instrumental", "vocals") if wants_vocals(wrapper.model_choice) else ("instrumental",),
+                }
+                for wrapper in wrappers
+            ]
+        else:
+            jobs = [
+                {
+                    "model": models[wrapper.model_choice],
+                    "ins_root": roots[wrapper.model_choice][0],
+                    "vocal_root": roots[wrapper.model_choice][1] if wants_vocals(wrapper.model_choice) else None,
+                }
+                for wrapper in wrappers
+            ]
+        stem_results = path_audio_multi(jobs, audio_path, format="wav", wave=wave, wave_sr=wave_sr)
+    
+    results = {}
+    if in_memory:
+        from modules.audio_buffer import AudioBuffer
+        for wrapper, stem_result in zip(wrappers, stem_results):
+            sr = stem_result['sample_rate']
+            results[wrapper.model_choice] = {
+                stem: AudioBuffer.from_array(stem_result[stem], sr) if stem_result[stem] is not None else None
+                for stem in ('instrumental', 'vocals')
+            }
+            logger.info(f"{wrapper.model_choice}-Ergebnisse im Speicher: {[k for k, v in results[wrapper.model_choice].items() if v is not None]}")
+        return results
+    
+    # Dateinamen folgen dem Schema aus vr._write_stems: instrument_/vocal_{name}_{agg}.wav
+    name = os.path.basename(audio_path)
+    for wrapper in wrappers:
+        choice = wrapper.model_choice
+        inst_dir, vocal_dir = roots[choice]
+        inst_path = os.path.join(inst_dir, f"instrument_{name}_{wrapper.agg}.wav")
+        vocal_path = os.path.join(vocal_dir, f"vocal_{name}_{wrapper.agg}.wav")
+        results[choice] = {
+            'instrumental': inst_path if os.path.exists(inst_path) else None,
+            'vocals': vocal_path if os.path.exists(vocal_path) else None,
+        }
+        logger.info(f"{choice}-Ergebnisse: {results[choice]}")
+    
+    return results
+
 def reduce_volume(input_audio, output_wav, reduction_db=-2):
     """Reduziert die Lautstärke der Eingabe-Audiodatei um reduction_db dB und speichert als WAV."""
     # Überprüfe, ob die Eingabedatei existiert
@@ -273,13 +354,14 @@ def separate_audio_with_uvr5_correct(folder_path, model_type='HP2'):
         # Speichere die Instrumental-Daten als MP3
         logger.info(f"Speichere Instrumental-Audio als: {output_file}")
         
-        # Konvertiere zu MP3
-        if not convert_to_mp3(temp_file.replace('.wav', '_instrumental.wav'), output_file):
-            # Fallback: Speichere direkt mit librosa
-            logger.info("Fallback: Speichere direkt mit librosa")
-            sf.write(output_file.replace('.mp3', '_temp.wav'), inst_data.T, sample_rate)
-            convert_to_mp3(output_file.replace('.mp3', '_temp.wav'), output_file)
-            os.remove(output_file.replace('.mp3', '_temp.wav'))
+        # Kodiere direkt aus dem Speicher zu MP3 (kein Zwischen-WAV)
+        from modules.audio_buffer import AudioBuffer, encode_audio_buffer
+        if not encode_audio_buffer(
+            AudioBuffer.from_array(inst_data, sample_rate),
+            output_file,
+            ["-codec:a", "libmp3lame", "-qscale:a", "2", "-ar", "44100"]
+        ):
+            raise Exception("Fehler beim Kodieren der Instrumental-Spur")
         
         # Bereinige temporäre Dateien
         if os.path.exists(temp_file):